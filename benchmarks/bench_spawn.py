@@ -0,0 +1,97 @@
+"""Benchmark CLI process spawning: direct asyncio spawn vs the spawn helper.
+
+Inflates this process to --heap-mb of touched memory (standing in for a
+long-running bot), then starts --count short-lived children each way,
+exactly as claude_cli does (own session, stdin/stdout piped). Reports
+spawn latency (until the process object is usable), full round trip
+(until exit is observed), and the minor page faults and threads the bot
+process incurred per spawn.
+
+    python benchmarks/bench_spawn.py [--count N] [--heap-mb MB]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from proc_groups import spawn_kwargs  # noqa: E402
+from spawner import SUPPORTED, SpawnHelper  # noqa: E402
+
+CHILD = ["/bin/sh", "-c", "exit 0"]
+
+
+def _ballast(mb: int) -> bytearray:
+    """mb MiB of memory with every page written, so it's really mapped."""
+    block = bytearray(mb * 2**20)
+    for offset in range(0, len(block), 4096):
+        block[offset] = 1
+    return block
+
+
+async def _direct() -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        *CHILD, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL, cwd="/", env=os.environ.copy(), **spawn_kwargs(),
+    )
+
+
+async def _measure(spawn, count: int) -> dict[str, float]:
+    spawn_ms: list[float] = []
+    total_ms: list[float] = []
+    max_threads = threading.active_count()
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    for _ in range(count):
+        start = time.perf_counter()
+        process = await spawn()
+        spawn_ms.append((time.perf_counter() - start) * 1000)
+        max_threads = max(max_threads, threading.active_count())
+        await process.wait()
+        total_ms.append((time.perf_counter() - start) * 1000)
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+    return {
+        "spawn p50": statistics.median(spawn_ms),
+        "spawn p95": sorted(spawn_ms)[int(len(spawn_ms) * 0.95) - 1],
+        "round trip p50": statistics.median(total_ms),
+        "faults/spawn": faults / count,
+        "max threads": max_threads,
+    }
+
+
+async def _run(count: int) -> list[tuple[str, dict[str, float]]]:
+    rows = [("direct (asyncio)", await _measure(_direct, count))]
+    if SUPPORTED:
+        helper = SpawnHelper()
+        await helper.start(os.environ.copy())
+        try:
+            rows.append(("spawn helper", await _measure(lambda: helper.spawn(CHILD, "/"), count)))
+        finally:
+            await helper.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--heap-mb", type=int, default=512, help="touched memory held by this process")
+    args = parser.parse_args()
+
+    ballast = _ballast(args.heap_mb)
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{args.count} spawns of {' '.join(CHILD)!r}, bot RSS ~{rss_mb:.0f} MiB")
+    columns = ["spawn p50", "spawn p95", "round trip p50", "faults/spawn", "max threads"]
+    print(f"{'method':<20}" + "".join(f"{c:>16}" for c in columns))
+    for name, result in asyncio.run(_run(args.count)):
+        print(f"{name:<20}" + "".join(f"{result[c]:>16.2f}" for c in columns))
+    del ballast
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark stream-json decoding: old full json.loads path vs stream_decode.
+
+Builds synthetic transcripts shaped like recorded `claude --output-format
+stream-json --verbose --include-partial-messages` output (init, text
+deltas, tool calls, tool-result echoes, result) and times decoding every
+line, once with the pre-stream_decode approach and once per JSON backend.
+
+    python benchmarks/bench_stream_decode.py [--turns N] [--file-kb KB]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import stream_decode  # noqa: E402
+
+
+def _line(obj: dict) -> bytes:
+    return (json.dumps(obj) + "\n").encode()
+
+
+def synthetic_transcript(turns: int, file_kb: int) -> list[bytes]:
+    """One session: per turn, streamed text, a Read + Write of a file_kb
+    file (with the tool_result echo), a generic tool call, and a result."""
+    body = ("def handler(event):\n    return process(event)\n" * (file_kb * 1024 // 46 + 1))[: file_kb * 1024]
+    lines = [_line({"type": "system", "subtype": "init", "session_id": "s", "tools": ["Bash", "Read"] * 20})]
+    for turn in range(turns):
+        for word in ("I'll ", "read ", "the ", "file ", "and ", "update ", "it."):
+            lines.append(_line({"type": "stream_event", "event": {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": word}}}))
+        lines.append(_line({"type": "stream_event", "event": {
+            "type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": '{"fi'}}}))
+        lines.append(_line({"type": "assistant", "message": {"content": [
+            {"type": "text", "text": "I'll read the file and update it."},
+            {"type": "tool_use", "id": f"r{turn}", "name": "Read", "input": {"file_path": "/src/app.py"}},
+        ]}}))
+        lines.append(_line({"type": "user", "message": {"content": [
+            {"type": "tool_result", "tool_use_id": f"r{turn}", "content": body}]}}))
+        lines.append(_line({"type": "assistant", "message": {"content": [
+            {"type": "tool_use", "id": f"w{turn}", "name": "Write",
+             "input": {"file_path": "/src/app.py", "content": body}},
+            {"type": "tool_use", "id": f"n{turn}", "name": "NotebookEdit",
+             "input": {"notebook_path": "/nb.ipynb", "new_source": body}},
+        ]}}))
+        lines.append(_line({"type": "user", "message": {"content": [
+            {"type": "tool_result", "tool_use_id": f"w{turn}", "content": "ok"}]}}))
+        lines.append(_line({"type": "result", "result": "Updated app.py.", "duration_ms": 1200, "total_cost_usd": 0.01}))
+    return lines
+
+
+def legacy_decode(line: bytes) -> list[tuple]:
+    """What _stream_events did before stream_decode: parse every line fully,
+    preview unknown tools with json.dumps(input)[:60]."""
+    raw = line.decode("utf-8", errors="replace").strip()
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return []
+    items: list[tuple] = []
+    if data.get("type") == "assistant":
+        for block in data.get("message", {}).get("content", []):
+            if block.get("type") == "text":
+                items.append(("text", block.get("text", "")))
+            elif block.get("type") == "tool_use":
+                tool_input = block.get("input", {})
+                name = block.get("name", "")
+                if name in ("Write", "Edit", "Read"):
+                    preview = tool_input.get("file_path", "")
+                else:
+                    preview = json.dumps(tool_input)[:60]
+                items.append(("tool_use", name, block.get("id", ""), preview))
+    return items
+
+
+def _backends() -> dict[str, object]:
+    found = {"json": json.loads}
+    try:
+        import orjson
+        found["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        found["msgspec"] = msgspec.json.decode
+    except ImportError:
+        pass
+    return found
+
+
+def _measure(fn, lines: list[bytes], repeat: int) -> tuple[float, float]:
+    """(best seconds over `repeat` runs, peak MiB allocated during one run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    for line in lines:
+        fn(line)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--file-kb", type=int, default=512, help="size of the file each turn reads/writes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = synthetic_transcript(args.turns, args.file_kb)
+    total_mb = sum(map(len, lines)) / 2**20
+    print(f"{len(lines)} lines, {total_mb:.1f} MiB")
+    print(f"{'decoder':<24}{'time (ms)':>12}{'peak (MiB)':>12}")
+
+    rows = [("legacy json.loads", lambda line: legacy_decode(line))]
+    for name, loads in _backends().items():
+        rows.append((f"stream_decode[{name}]", lambda line, loads=loads: stream_decode.decode_line(line, loads)))
+    for name, fn in rows:
+        seconds, peak = _measure(fn, lines, args.repeat)
+        print(f"{name:<24}{seconds * 1000:>12.1f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,88 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import json
 import logging
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable
 
+import metrics
 from auth import is_authorized
 from claude_cli import (
     PermissionMode,
     StreamEvent,
     ToolUseEvent,
-    generate_session_id,
+    close_persistent_sessions,
+    close_spawn_helper,
+    kill_process,
+    new_session_id,
+    prewarm,
+    reap_orphans,
+    release_session,
     send_message as cli_send_message,
+    start_spawn_helper,
 )
-from config import BOT_DISPLAY_NAME, BOT_TAGLINE, POLL_INTERVAL_SECONDS, SPACE_MODES, WEBEX_MAX_MESSAGE_BYTES, WEBEX_USER_EMAIL
+from cli_governor import CliGovernor, TurnClass
+from config import (
+    BOT_DISPLAY_NAME,
+    BOT_TAGLINE,
+    CATCHUP_MAX_AGE_SECONDS,
+    CATCHUP_MAX_MESSAGES,
+    CLI_DEEP_MODEL,
+    CLI_DEEP_THINKING_TOKENS,
+    CLI_DEFAULT_MODEL,
+    CLI_FAST_MODEL,
+    CLI_MAX_CONCURRENT,
+    CLI_MAX_LOAD_PER_CPU,
+    CLI_MIN_AVAILABLE_MB,
+    CLI_MODEL_ROUTES,
+    CLI_ORPHAN_REAP_INTERVAL_SECONDS,
+    CLI_SPAWN_HELPER,
+    COALESCE_WINDOW_SECONDS,
+    METRICS_HOST,
+    METRICS_PORT,
+    POLL_FETCH_CONCURRENCY,
+    POLL_INTERVAL_SECONDS,
+    POLL_MAX_INTERVAL_SECONDS,
+    RECONCILE_INTERVAL_SECONDS,
+    RESPONSE_ATTACH_BYTES,
+    RESPONSE_SPOOL_BYTES,
+    ROOM_FULL_REFRESH_SECONDS,
+    SESSION_COMPACT_AUTO,
+    SESSION_COMPACT_TOKENS,
+    SPACE_MODES,
+    STREAM_EDIT_INTERVAL_SECONDS,
+    STREAM_REPLIES,
+    WEBEX_MAX_MESSAGE_BYTES,
+    WEBEX_USER_EMAIL,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    turn_timeouts,
+)
+from cursor_store import Cursor, CursorStore, messages_after
+from deadlines import Deadline
+from http_server import HttpServer, Request, Response
 from mentions import strip_mention, thread_id_of
-from session_store import SessionStore
-from sessions import SessionInfo, get_session_by_id, list_recent_sessions
+from model_routing import ModelRouter, Route, parse_rules
+from poll_scheduler import PollScheduler, RoomActivityIndex, parse_webex_time
+from rate_limiter import Priority
+from response_buffer import ResponseBuffer
+from room_index import RoomIndex
+from salvage import TurnActivity, follow_up_prompt, salvage
+from session_lease import IN_PROCESS, OTHER_INSTANCE, SessionLeases
+from session_size import SessionSizes
+from session_store import TTL_SECONDS as SESSION_TTL_SECONDS, SessionStore
+from sessions import SessionInfo, get_session_by_id, list_recent_sessions, session_file
+from streaming import StreamingReply
+from usage import TurnUsage, UsageLedger
 from webex_api import WebexAPI
+from webhooks import MESSAGE_WEBHOOKS, WEBHOOK_PATH, parse_message_event, verify_signature
+from workers import Coalescer, RoomWorkers
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -44,7 +108,13 @@ class BotState:
     processing: bool = False
     _active_process: asyncio.subprocess.Process | None = field(default=None, repr=False)
     _thinking_id: str | None = field(default=None, repr=False)
+    _queue_position: int = field(default=0, repr=False)
+    _deadline: Deadline | None = field(default=None, repr=False)
     _last_tool: str = field(default="", repr=False)
+    _cancelled: bool = field(default=False, repr=False)
+    _session_wait: str = field(default="", repr=False)  # session_lease.IN_PROCESS / OTHER_INSTANCE
+    # Prompt that resumes the last timed-out/cancelled turn (/continue).
+    follow_up: str = ""
 
 
 _room_states: dict[str, BotState] = {}
@@ -52,6 +122,51 @@ _room_states: dict[str, BotState] = {}
 # Disk-backed thread_id -> claude session_id map for group-space conversations.
 _thread_sessions = SessionStore()
 
+# Disk-backed per-room poll cursors + recently dispatched message ids, so a
+# restart catches up on what arrived while down instead of skipping it.
+_cursors = CursorStore()
+
+# One serial worker per conversation (DM room id or space thread id); the poll
+# loop only enqueues, so a long turn never stalls polling or other rooms.
+_workers = RoomWorkers()
+
+# Chat messages (not commands) arriving within COALESCE_WINDOW_SECONDS of each
+# other, or while a turn is running, are merged into the next single turn.
+_batches = Coalescer(_workers, COALESCE_WINDOW_SECONDS)
+
+# Caps concurrent claude turns host-wide; owner DMs go ahead of space mentions.
+_governor = CliGovernor(CLI_MAX_CONCURRENT, CLI_MIN_AVAILABLE_MB, CLI_MAX_LOAD_PER_CPU)
+
+# Serializes turns per Claude session id (in-process + lock file).
+_leases = SessionLeases()
+
+# Per-room/thread/session totals of finished turns' CPU, memory and cost.
+_usage = UsageLedger()
+
+# Incremental size/context-token estimates of session files (compaction check).
+_session_sizes = SessionSizes()
+
+# Model (and thinking budget) per turn; rules compiled once from CLI_MODEL_ROUTES.
+_router = ModelRouter(
+    rules=parse_rules(CLI_MODEL_ROUTES),
+    prefixes={
+        "/fast": Route("fast", model=CLI_FAST_MODEL),
+        "/deep": Route("deep", model=CLI_DEEP_MODEL, thinking_tokens=CLI_DEEP_THINKING_TOKENS),
+    },
+    default=Route("default", model=CLI_DEFAULT_MODEL),
+)
+
+# Strong refs to fire-and-forget tasks (fast-path commands, notices) so they
+# are not garbage-collected mid-flight.
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 
 def get_state(room_id: str) -> BotState:
     if room_id not in _room_states:
@@ -61,21 +176,33 @@ def get_state(room_id: str) -> BotState:
 
 def _cleanup_expired_sessions() -> None:
     """Evict expired thread sessions from disk AND their in-memory BotState,
-    so _room_states does not grow without bound on a long-running bot."""
+    so _room_states does not grow without bound on a long-running bot, and
+    the lock files of sessions unused for as long."""
     for thread in _thread_sessions.cleanup():
         _room_states.pop(thread, None)
+    _leases.cleanup(SESSION_TTL_SECONDS)
 
 
-async def handle_space_mention(api: WebexAPI, room_id: str, message: dict) -> None:
-    """Handle one @mention in a group space: resolve thread, resume/create its
+async def handle_space_mention(api: WebexAPI, room_id: str, *messages: dict) -> None:
+    """Handle @mentions in a group space: resolve thread, resume/create its
     Claude session, and reply in-thread. State is keyed by thread id so each
-    Webex thread has its own conversation context."""
-    thread = thread_id_of(message)
-    question = strip_mention(message.get("text", ""), message.get("html", ""), api.bot_display_name)
+    Webex thread has its own conversation context. Several mentions from one
+    thread (a coalesced burst) are asked as a single question."""
+    thread = thread_id_of(messages[0])
+    parts = [strip_mention(m.get("text", ""), m.get("html", ""), api.bot_display_name) for m in messages]
+    question = "\n\n".join(p for p in parts if p)
     if not question:
         return
 
     state = get_state(thread)
+    if question.strip().lower() == "/continue" and state.follow_up:
+        question = state.follow_up
+
+    # Per-space permission level: listed spaces use their configured mode,
+    # every other space defaults to read-only (strict). Operator-controlled;
+    # never escalatable from chat.
+    state.mode = SPACE_MODES.get(room_id, PermissionMode.STRICT)
+
     existing = _thread_sessions.get(thread)
     if existing:
         state.session_id = existing
@@ -85,18 +212,16 @@ async def handle_space_mention(api: WebexAPI, room_id: str, message: dict) -> No
         if state.session_cwd is None:
             state.session_cwd = str(Path.home())
     elif state.session_id is None:
-        state.session_id = generate_session_id()
-        state.session_is_new = True
         state.session_cwd = str(Path.home())
+        route = _router.decide(question, room_id, state.mode).route
+        state.session_id = new_session_id(state.session_cwd, state.mode, route)
+        state.session_is_new = True
         _thread_sessions.create(thread, state.session_id)
 
-    # Per-space permission level: listed spaces use their configured mode,
-    # every other space defaults to read-only (strict). Operator-controlled;
-    # never escalatable from chat.
-    state.mode = SPACE_MODES.get(room_id, PermissionMode.STRICT)
-
     logger.info("Space mention thread=%s mode=%s: %s", thread[:12], state.mode, question[:80])
-    await handle_text_message(api, room_id, question, state_key=thread, parent_id=thread)
+    await handle_text_message(
+        api, room_id, question, state_key=thread, parent_id=thread, turn_class=TurnClass.SPACE,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -256,6 +381,10 @@ def _build_help_card(state: BotState | None = None) -> tuple[dict, str]:
                     {"title": "/resume N", "value": "Resume session N"},
                     {"title": "/status", "value": "Current session info"},
                     {"title": "/cancel", "value": "Cancel running task"},
+                    {"title": "/continue", "value": "Resume a timed-out or cancelled task"},
+                    {"title": "/compact", "value": "Summarize the session to keep it fast"},
+                    {"title": "/fast msg", "value": "Ask on the fast model"},
+                    {"title": "/deep msg", "value": "Ask on the deep model, thinking longer"},
                     {"title": "/disconnect", "value": "Disconnect from session"},
                     {"title": "/yolo", "value": "Auto-approve all tools"},
                     {"title": "/safe", "value": "Ask before tool use"},
@@ -267,7 +396,8 @@ def _build_help_card(state: BotState | None = None) -> tuple[dict, str]:
 
     fallback = (
         f"{BOT_DISPLAY_NAME} — {status_text}\n\n"
-        "Commands: /new, /sessions, /resume N, /status, /cancel, /disconnect, /yolo, /safe, /strict"
+        "Commands: /new, /sessions, /resume N, /status, /cancel, /continue, /compact, /fast, /deep, /disconnect, "
+        "/yolo, /safe, /strict"
     )
     return card, fallback
 
@@ -444,7 +574,7 @@ async def handle_new_session(api: WebexAPI, room_id: str, arg: str) -> None:
     else:
         cwd = str(Path.home())
 
-    state.session_id = generate_session_id()
+    state.session_id = new_session_id(cwd, state.mode, _router.default)
     state.session_cwd = cwd
     state.session_label = "New session"
     state.session_is_new = True
@@ -544,6 +674,34 @@ async def handle_status(api: WebexAPI, room_id: str) -> None:
             {"title": "Mode", "value": _mode_label(state.mode)},
         ]
 
+    queued = _workers.pending(room_id)
+    if state.processing or queued:
+        if state._session_wait:
+            activity = f"Waiting: session {_SESSION_WAIT_LABELS[state._session_wait]}"
+        elif state._queue_position:
+            activity = f"Waiting for a CLI slot (#{state._queue_position})"
+        else:
+            activity = "Processing" if state.processing else "Idle"
+            if state._deadline is not None:
+                activity += f" (times out in {_format_elapsed(state._deadline.remaining())})"
+        if queued:
+            activity += f" ({queued} queued)"
+        facts.append({"title": "Activity", "value": activity})
+
+    session_path = session_file(state.session_id, state.session_cwd) if state.session_id else None
+    size = _session_sizes.get(session_path) if session_path is not None else None
+    if size is not None:
+        context = f"~{size.tokens // 1000}k tokens ({size.file_bytes // 1024} KB on disk)"
+        facts.append({"title": "Context", "value": context})
+
+    session_usage = _usage.get("session", state.session_id)
+    if session_usage is not None and session_usage.last is not None:
+        facts.append({"title": "Last turn", "value": session_usage.last.describe()})
+        facts.append({"title": "Session usage", "value": session_usage.describe()})
+    room_usage = _usage.get("room", room_id)
+    if room_usage is not None and (session_usage is None or room_usage.turns != session_usage.turns):
+        facts.append({"title": "Room usage", "value": room_usage.describe()})
+
     card = {
         "$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
         "type": "AdaptiveCard",
@@ -569,27 +727,48 @@ async def handle_cancel(api: WebexAPI, room_id: str) -> None:
         await api.send_message(room_id, "Nothing to cancel.")
         return
 
+    # Cancelling the worker's turn task makes cli_send_message kill the CLI
+    # process and handle_text_message reset the state and post whatever the
+    # turn had produced; the direct kill below covers a process that is
+    # still shutting down.
+    thinking_id = state._thinking_id
     process = state._active_process
+    state._cancelled = True
+    if _workers.cancel_current(room_id):
+        thinking_id = None  # the turn's handler updates it
+    else:
+        state._active_process = None
+        state._thinking_id = None
+        state._cancelled = False
+        state.processing = False
+
     if process is not None:
-        try:
-            process.kill()
-            await asyncio.wait_for(process.wait(), timeout=5.0)
-        except (ProcessLookupError, asyncio.TimeoutError):
-            pass
+        await kill_process(process)
 
-    if state._thinking_id:
-        await api.edit_message(state._thinking_id, room_id, "Cancelled.")
+    if thinking_id:
+        await api.edit_message(thinking_id, room_id, "Cancelled.")
 
-    state._active_process = None
-    state._thinking_id = None
-    state.processing = False
     logger.info("Cancelled in room %s", room_id[:12])
 
 
+async def handle_continue(api: WebexAPI, room_id: str) -> None:
+    state = get_state(room_id)
+    if not state.follow_up:
+        await api.send_message(room_id, "Nothing to continue.")
+        return
+    await handle_text_message(api, room_id, state.follow_up)
+
+
 # ---------------------------------------------------------------------------
 # Thinking indicator with tool visibility
 # ---------------------------------------------------------------------------
 
+_SESSION_WAIT_LABELS = {
+    IN_PROCESS: "busy in another conversation",
+    OTHER_INSTANCE: "busy in another bot instance",
+}
+
+
 async def _update_thinking(api: WebexAPI, state: BotState, room_id: str, tool_event: asyncio.Event) -> None:
     start = time.monotonic()
     try:
@@ -602,8 +781,14 @@ async def _update_thinking(api: WebexAPI, state: BotState, room_id: str, tool_ev
                 pass
 
             elapsed = _format_elapsed(time.monotonic() - start)
-            tool_info = f" · {state._last_tool}" if state._last_tool else ""
-            await api.edit_message(state._thinking_id, room_id, f"Thinking... ({elapsed}{tool_info})")
+            if state._session_wait:
+                text = f"Queued... (session {_SESSION_WAIT_LABELS[state._session_wait]} · {elapsed})"
+            elif state._queue_position:
+                text = f"Queued... (#{state._queue_position} in line · {elapsed})"
+            else:
+                tool_info = f" · {state._last_tool}" if state._last_tool else ""
+                text = f"Thinking... ({elapsed}{tool_info})"
+            await api.edit_message(state._thinking_id, room_id, text, priority=Priority.COSMETIC)
     except asyncio.CancelledError:
         pass
 
@@ -615,23 +800,37 @@ async def _update_thinking(api: WebexAPI, state: BotState, room_id: str, tool_ev
 async def handle_text_message(
     api: WebexAPI, room_id: str, text: str,
     state_key: str | None = None, parent_id: str | None = None,
+    turn_class: TurnClass = TurnClass.DIRECT,
 ) -> None:
     state = get_state(state_key or room_id)
 
-    if state.session_id is None:
-        state.session_id = generate_session_id()
-        state.session_is_new = True
-        state.session_cwd = str(Path.home())
-
     if state.processing:
         await api.send_message(room_id, "Still processing. Use `/cancel` to abort.", parent_id=parent_id)
         return
 
+    decision = _router.route(text, room_id, state.mode)
+    if not decision.text.strip():
+        await api.send_message(room_id, f"Usage: `/{decision.route.name} <message>`", parent_id=parent_id)
+        return
+    text = decision.text
+    metrics.incr(f"route.{decision.route.name}")
+
+    if state.session_id is None:
+        state.session_cwd = str(Path.home())
+        state.session_id = new_session_id(state.session_cwd, state.mode, decision.route)
+        state.session_is_new = True
+
     state.processing = True
+    state.follow_up = ""
     state._last_tool = ""
     thinking_id = None
     updater_task = None
+    stream: StreamingReply | None = None
     tool_event = asyncio.Event()
+    response = ResponseBuffer(RESPONSE_SPOOL_BYTES)
+    activity = TurnActivity()
+    usage = TurnUsage()
+    oversized = 0
 
     try:
         thinking = await api.send_message(room_id, "Thinking...", parent_id=parent_id)
@@ -640,40 +839,87 @@ async def handle_text_message(
 
         if thinking_id:
             updater_task = asyncio.create_task(_update_thinking(api, state, room_id, tool_event))
+            if STREAM_REPLIES:
+                stream = StreamingReply(
+                    api, room_id, thinking_id, split_message, STREAM_EDIT_INTERVAL_SECONDS, parent_id=parent_id,
+                )
 
         def on_event(event: StreamEvent) -> None:
             if isinstance(event, ToolUseEvent):
                 state._last_tool = event.tool_name
                 tool_event.set()
-
-        response = await cli_send_message(
-            session_id=state.session_id,
-            message=text,
-            cwd=state.session_cwd,
-            is_new=state.session_is_new,
-            mode=state.mode,
-            on_event=on_event,
-            on_process_started=lambda p: setattr(state, '_active_process', p),
-        )
-
-        if state.session_is_new and not response.startswith("Error:"):
+            elif stream is not None and stream.feed(event) and updater_task is not None:
+                # The answer now owns the thinking message.
+                updater_task.cancel()
+
+        def on_queue_position(position: int) -> None:
+            state._queue_position = position
+            tool_event.set()
+
+        def on_session_wait(reason: str) -> None:
+            state._session_wait = reason
+            tool_event.set()
+
+        idle_timeout, hard_timeout = turn_timeouts(room_id, state.mode)
+        # One turn per Claude session at a time, across conversations and bot
+        # instances; a busy session queues this turn before it takes a CLI slot.
+        async with _leases.lease(state.session_id, on_session_wait) as changed_elsewhere:
+            state._session_wait = ""
+            if changed_elsewhere:
+                await release_session(state.session_id)
+            async with _governor.slot(state_key or room_id, turn_class, on_queue_position):
+                oversized = await _compaction_due(state, text)
+                if oversized and SESSION_COMPACT_AUTO:
+                    state._last_tool = "compacting session"
+                    tool_event.set()
+                    await _compact_session(
+                        state, room_id, state_key, oversized, idle_timeout, hard_timeout, decision.route,
+                    )
+                    state._last_tool = ""
+                    oversized = 0
+                await cli_send_message(
+                    session_id=state.session_id,
+                    message=text,
+                    cwd=state.session_cwd,
+                    is_new=state.session_is_new,
+                    mode=state.mode,
+                    on_event=on_event,
+                    on_process_started=lambda p: setattr(state, '_active_process', p),
+                    idle_timeout=idle_timeout,
+                    hard_timeout=hard_timeout,
+                    on_deadline=lambda d: setattr(state, '_deadline', d),
+                    response=response,
+                    activity=activity,
+                    usage=usage,
+                    route=decision.route,
+                )
+
+        if activity.interrupted:
+            state.follow_up = follow_up_prompt(activity)
+
+        if state.session_is_new and not response.head(16).startswith("Error:"):
             state.session_is_new = False
 
-        chunks = split_message(response)
-
-        if thinking_id:
-            result = await api.edit_message(thinking_id, room_id, chunks[0])
-            if result is None:
-                await api.delete_message(thinking_id)
-                await api.send_message(room_id, chunks[0], parent_id=parent_id)
-        else:
-            await api.send_message(room_id, chunks[0], parent_id=parent_id)
+        if oversized:
+            response.append(
+                f"\n\n_This session's context is ~{oversized // 1000}k tokens; "
+                f"send `{COMPACT_COMMAND}` to shrink it so later turns resume faster._"
+            )
 
-        for chunk in chunks[1:]:
-            await api.send_message(room_id, chunk, parent_id=parent_id)
+        await _deliver(api, room_id, response, thinking_id, parent_id, stream)
 
     except asyncio.CancelledError:
-        pass
+        # /cancel leaves the reply to us so partial output can be kept;
+        # on shutdown there is no one to deliver to.
+        if state._cancelled:
+            if salvage(response, activity, "Cancelled."):
+                state.follow_up = follow_up_prompt(activity)
+                await _deliver(api, room_id, response, thinking_id, parent_id, stream)
+            elif thinking_id:
+                await api.edit_message(thinking_id, room_id, "Cancelled.")
+            else:
+                # Cancelled before "Thinking..." was posted.
+                await api.send_message(room_id, "Cancelled.", parent_id=parent_id)
     except Exception:
         logger.exception("Error processing message")
         error_text = "Something went wrong. Try again, or `/cancel` then retry."
@@ -684,10 +930,125 @@ async def handle_text_message(
     finally:
         if updater_task is not None:
             updater_task.cancel()
+        if stream is not None:
+            stream.stop()
         state._active_process = None
         state._thinking_id = None
         state._last_tool = ""
+        state._queue_position = 0
+        state._session_wait = ""
+        state._deadline = None
+        state._cancelled = False
         state.processing = False
+        response.close()
+        if usage.wall_seconds:
+            _usage.record(
+                usage, room=room_id, thread=state_key if state_key != room_id else None, session=state.session_id,
+                route=decision.route.name,
+            )
+
+
+COMPACT_COMMAND = "/compact"
+
+
+async def _compaction_due(state: BotState, text: str) -> int:
+    """The session's estimated context tokens if it is past
+    SESSION_COMPACT_TOKENS (and the turn isn't a compaction itself), else 0."""
+    if SESSION_COMPACT_TOKENS <= 0 or state.session_is_new or text.strip().lower() == COMPACT_COMMAND:
+        return 0
+    path = session_file(state.session_id, state.session_cwd)
+    if path is None:
+        return 0
+    size = await _session_sizes.measure(path)
+    if size.tokens < SESSION_COMPACT_TOKENS:
+        return 0
+    logger.info(
+        "Session %s is ~%d tokens (%d KB on disk); compaction due",
+        state.session_id[:8], size.tokens, size.file_bytes // 1024,
+    )
+    return size.tokens
+
+
+async def _compact_session(
+    state: BotState, room_id: str, state_key: str | None, tokens: int,
+    idle_timeout: float, hard_timeout: float, route: Route,
+) -> None:
+    """Run `/compact` on the session ahead of the user's turn, on the turn's
+    route so a persistent process is not restarted in between. A failed
+    compaction is logged and the turn goes ahead on the full session."""
+    usage = TurnUsage()
+    try:
+        result = await cli_send_message(
+            session_id=state.session_id,
+            message=COMPACT_COMMAND,
+            cwd=state.session_cwd,
+            is_new=False,
+            mode=state.mode,
+            on_process_started=lambda p: setattr(state, '_active_process', p),
+            idle_timeout=idle_timeout,
+            hard_timeout=hard_timeout,
+            on_deadline=lambda d: setattr(state, '_deadline', d),
+            usage=usage,
+            route=route,
+        )
+        if result.startswith("Error:"):
+            logger.warning("Compacting session %s failed: %s", state.session_id[:8], result[:200])
+        else:
+            metrics.incr("session.compactions")
+            logger.info("Compacted session %s (was ~%d tokens, %s)", state.session_id[:8], tokens, usage.describe())
+    finally:
+        if usage.wall_seconds:
+            _usage.record(
+                usage, room=room_id, thread=state_key if state_key != room_id else None, session=state.session_id,
+                route=route.name,
+            )
+
+
+async def handle_compact(api: WebexAPI, room_id: str) -> None:
+    if get_state(room_id).session_id is None:
+        await api.send_message(room_id, "Not connected to any session.")
+        return
+    await handle_text_message(api, room_id, COMPACT_COMMAND)
+
+
+RESPONSE_ATTACHMENT_NAME = "claude-response.md"
+
+
+async def _deliver(
+    api: WebexAPI, room_id: str, response: ResponseBuffer,
+    thinking_id: str | None, parent_id: str | None, stream: StreamingReply | None,
+) -> None:
+    """Post the reply: into the thinking message (or the streamed preview) and
+    follow-ups, or as a single file attachment past RESPONSE_ATTACH_BYTES."""
+    attach = 0 < RESPONSE_ATTACH_BYTES < len(response)
+    if attach:
+        note = (
+            f"Response too long for chat ({len(response) // 1024} KB) "
+            f"— attached as `{RESPONSE_ATTACHMENT_NAME}`."
+        )
+        chunks: Iterable[str] = [note]
+    else:
+        chunks = response.chunks(WEBEX_MAX_MESSAGE_BYTES)
+
+    if stream is not None and stream.started:
+        await stream.finish(note if attach else response.getvalue())
+    else:
+        first = True
+        for chunk in chunks:
+            if first and thinking_id:
+                result = await api.edit_message(thinking_id, room_id, chunk)
+                if result is None:
+                    await api.delete_message(thinking_id)
+                    await api.send_message(room_id, chunk, parent_id=parent_id)
+            else:
+                await api.send_message(room_id, chunk, parent_id=parent_id)
+            first = False
+
+    if attach:
+        await api.send_file(
+            room_id, f"`{RESPONSE_ATTACHMENT_NAME}`", RESPONSE_ATTACHMENT_NAME,
+            response.fileobj(), parent_id=parent_id,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -700,6 +1061,8 @@ COMMANDS = {
     "/disconnect": handle_disconnect,
     "/status": handle_status,
     "/cancel": handle_cancel,
+    "/continue": handle_continue,
+    "/compact": handle_compact,
 }
 
 MODE_COMMANDS = {
@@ -708,6 +1071,15 @@ MODE_COMMANDS = {
     "/strict": PermissionMode.STRICT,
 }
 
+# Control commands that bypass the room queue so they take effect while a
+# turn is still running.
+FAST_PATH_COMMANDS = {"/cancel", "/status"}
+
+
+def _is_fast_path(text: str) -> bool:
+    parts = text.strip().split(None, 1)
+    return bool(parts) and parts[0].lower() in FAST_PATH_COMMANDS
+
 
 async def dispatch(api: WebexAPI, room_id: str, text: str) -> None:
     stripped = text.strip()
@@ -728,10 +1100,76 @@ async def dispatch(api: WebexAPI, room_id: str, text: str) -> None:
         await handle_mode(api, room_id, MODE_COMMANDS[command])
     elif command in COMMANDS:
         await COMMANDS[command](api, room_id)
+    elif command in _router.prefixes:
+        await handle_text_message(api, room_id, stripped)
     else:
         await api.send_message(room_id, f"Unknown command: `{command}`\nType `/help` for commands.")
 
 
+# ---------------------------------------------------------------------------
+# Ingestion (enqueue only; execution happens on the room workers)
+# ---------------------------------------------------------------------------
+
+def _claim_message(message_id: str) -> bool:
+    """True the first time a message is dispatched. Webhook delivery and the
+    poller (incl. post-restart catch-up) can both see the same message."""
+    return _cursors.claim(message_id)
+
+
+def _accept_direct(api: WebexAPI, room_id: str, msg: dict) -> None:
+    if msg.get("personId") == api.bot_id:
+        return
+    sender_email = msg.get("personEmail", "")
+    if not is_authorized(sender_email):
+        return
+    text = msg.get("text", "").strip()
+    if not text:
+        return
+    if not _claim_message(msg["id"]):
+        return
+
+    logger.info("Message from %s: %s", sender_email, text[:80])
+    _ingest_direct(api, room_id, text)
+
+
+def _accept_mention(api: WebexAPI, room_id: str, msg: dict) -> None:
+    if msg.get("personId") == api.bot_id:
+        return
+    if not _claim_message(msg["id"]):
+        return
+    _ingest_space_mention(api, room_id, msg)
+
+
+async def _run_text_batch(api: WebexAPI, room_id: str, texts: list[str]) -> None:
+    await handle_text_message(api, room_id, "\n\n".join(texts))
+
+
+async def _run_mention_batch(api: WebexAPI, room_id: str, messages: list[dict]) -> None:
+    await handle_space_mention(api, room_id, *messages)
+
+
+def _ingest_direct(api: WebexAPI, room_id: str, text: str) -> None:
+    if _is_fast_path(text):
+        _spawn(dispatch(api, room_id, text))
+        return
+
+    if text.startswith("/"):
+        # Keep any chat typed before the command ahead of it in the queue.
+        _batches.seal(room_id)
+        _workers.submit(room_id, functools.partial(dispatch, api, room_id, text))
+        return
+
+    started = _batches.add(room_id, text, functools.partial(_run_text_batch, api, room_id))
+    if started and _workers.busy(room_id):
+        _spawn(api.send_message(
+            room_id, "Queued for the next turn (follow-ups are sent along). Use `/cancel` to abort the current one.",
+        ))
+
+
+def _ingest_space_mention(api: WebexAPI, room_id: str, message: dict) -> None:
+    _batches.add(thread_id_of(message), message, functools.partial(_run_mention_batch, api, room_id))
+
+
 # ---------------------------------------------------------------------------
 # Polling loop
 # ---------------------------------------------------------------------------
@@ -781,20 +1219,124 @@ async def _send_startup_welcome(api: WebexAPI) -> str | None:
         return None
 
 
-async def poll_loop(api: WebexAPI) -> None:
-    last_seen: dict[str, str] = {}
-    initialized_rooms: set[str] = set()
+_FIRST_PAGE = 10
 
+
+async def _fetch_since(api: WebexAPI, room: dict, cursor: Cursor | None) -> list[dict]:
+    """A room's messages (mentions, for spaces) newer than the cursor, newest first.
+
+    One small page covers the steady state. If that page is full and does not
+    reach the cursor, walk back page by page until it does, capped at
+    CATCHUP_MAX_MESSAGES so a huge backlog can't stall the cycle.
+    """
+    room_id = room["id"]
+    mentioned = room.get("type") == "group"
+    if mentioned:
+        messages = await api.list_mentions(room_id, max_messages=_FIRST_PAGE)
+    else:
+        messages = await api.list_messages(room_id, max_messages=_FIRST_PAGE)
+
+    if cursor is None or len(messages) < _FIRST_PAGE or len(messages_after(messages, cursor)) < len(messages):
+        return messages
+
+    pages = 1
+    async for page in api.iter_message_pages(room_id, mentioned=mentioned, before_message=messages[-1]["id"]):
+        pages += 1
+        messages.extend(page)
+        if len(messages_after(page, cursor)) < len(page) or len(messages) >= CATCHUP_MAX_MESSAGES:
+            break
+
+    if pages > 1:
+        metrics.incr("poll.catchup_multi_page")
+        metrics.incr("poll.catchup_pages", pages)
+    if len(messages_after(messages, cursor)) < len(messages):
+        logger.info("Caught up %s over %d pages", room_id[:12], pages)
+    elif len(messages) >= CATCHUP_MAX_MESSAGES:
+        metrics.incr("poll.catchup_truncated")
+        logger.warning(
+            "Catch-up for %s hit the %d-message cap before reaching its cursor; older messages skipped",
+            room_id[:12], CATCHUP_MAX_MESSAGES,
+        )
+    else:
+        # The history ran out first: everything before the cursor was deleted.
+        logger.info("Caught up %s to the start of its history over %d pages", room_id[:12], pages)
+    return messages[:CATCHUP_MAX_MESSAGES]
+
+
+async def _refresh_room_index(
+    api: WebexAPI, room_index: RoomIndex, activity: RoomActivityIndex, scheduler: PollScheduler,
+) -> None:
+    """Replace the room index with a full paginated listing.
+
+    Newly indexed rooms are not fetched just to baseline them: a room with no
+    cursor gets one at its lastActivity, and a room whose cursor is already at
+    or past its lastActivity has nothing new. Either way it is marked in the
+    activity index, so it is fetched only once its lastActivity moves.
+    """
+    listed: list[dict] = []
+    try:
+        for room_type in ("direct", "group"):
+            async for page in api.iter_rooms(room_type):
+                listed.extend(page)
+    except (SystemExit, asyncio.CancelledError):
+        raise
+    except Exception:
+        logger.exception("Full room listing failed; keeping the current index")
+        return
+
+    added, removed = room_index.replace(listed, time.monotonic())
+    for room in added:
+        room_id, last_activity = room["id"], room.get("lastActivity", "")
+        cursor = _cursors.get(room_id)
+        if cursor is None:
+            _cursors.baseline(room_id, last_activity)
+            activity.mark(room_id, last_activity)
+        elif last_activity and cursor.created and last_activity <= cursor.created:
+            activity.mark(room_id, last_activity)
+
+    keep = room_index.ids()
+    activity.forget(keep)
+    scheduler.forget(keep)
+    if keep:
+        # An empty listing is more likely an API hiccup than the bot having
+        # left every room; don't wipe the cursors over it.
+        _cursors.prune(keep)
+    logger.info("Room index refreshed: %d rooms (+%d, -%d)", len(room_index), len(added), len(removed))
+
+
+async def poll_loop(api: WebexAPI, interval: float = POLL_INTERVAL_SECONDS) -> None:
     startup_room = await _send_startup_welcome(api)
-    if startup_room:
-        initialized_rooms.add(startup_room)
+    if startup_room and _cursors.get(startup_room) is None:
+        # First run: baseline past the welcome card. With a saved cursor the
+        # first cycle catches up from it instead (the card itself is ours and
+        # filtered out).
         msgs = await api.list_messages(startup_room, max_messages=1)
         if msgs:
-            last_seen[startup_room] = msgs[0]["id"]
+            _cursors.advance(startup_room, msgs[0])
+
+    # A room is fetched only when its lastActivity moved since its last fetch.
+    # Rooms listed without a lastActivity fall back to the adaptive scheduler
+    # (every cycle while active, backing off to POLL_MAX_INTERVAL_SECONDS).
+    activity = RoomActivityIndex()
+    scheduler = PollScheduler(min_interval=interval, max_interval=POLL_MAX_INTERVAL_SECONDS)
+
+    def should_fetch(room: dict) -> bool:
+        last_activity = room.get("lastActivity", "")
+        if last_activity:
+            return activity.changed(room["id"], last_activity)
+        return scheduler.due(room["id"], time.monotonic())
+
+    async def fetch(room: dict) -> list[dict]:
+        return await _fetch_since(api, room, _cursors.get(room["id"]))
+
+    room_index = RoomIndex(full_refresh_seconds=ROOM_FULL_REFRESH_SECONDS)
 
     _cleanup_expired_sessions()
     last_cleanup = time.monotonic()
-    logger.info("Polling started (interval=%.1fs)", POLL_INTERVAL_SECONDS)
+    logger.info(
+        "Polling started (interval=%.1fs, max per-room=%ds, concurrency=%d)",
+        interval, POLL_MAX_INTERVAL_SECONDS, POLL_FETCH_CONCURRENCY,
+    )
 
     while True:
         try:
@@ -803,48 +1345,12 @@ async def poll_loop(api: WebexAPI) -> None:
                 _cleanup_expired_sessions()
                 last_cleanup = time.monotonic()
 
-            rooms = await api.list_direct_rooms(max_rooms=50)
-
-            for room in rooms:
-                room_id = room["id"]
-                messages = await api.list_messages(room_id, max_messages=10)
-
-                if not messages:
-                    continue
-
-                newest_id = messages[0]["id"]
-
-                if room_id not in initialized_rooms:
-                    initialized_rooms.add(room_id)
-                    last_seen[room_id] = newest_id
-                    logger.info("Initialized room %s", room_id[:12])
-                    continue
-
-                if last_seen.get(room_id) == newest_id:
-                    continue
-
-                new_messages = []
-                for msg in messages:
-                    if msg["id"] == last_seen.get(room_id):
-                        break
-                    new_messages.append(msg)
+            if room_index.full_refresh_due(time.monotonic()):
+                await _refresh_room_index(api, room_index, activity, scheduler)
 
-                new_messages.reverse()
-
-                for msg in new_messages:
-                    if msg.get("personId") == api.bot_id:
-                        continue
-                    sender_email = msg.get("personEmail", "")
-                    if not is_authorized(sender_email):
-                        continue
-                    text = msg.get("text", "").strip()
-                    if not text:
-                        continue
-
-                    logger.info("Message from %s: %s", sender_email, text[:80])
-                    await dispatch(api, room_id, text)
-
-                last_seen[room_id] = newest_id
+            # Cheap per-cycle update: the first page of each room type sorted
+            # by lastactivity holds every room that changed recently.
+            rooms = await api.list_direct_rooms(max_rooms=50)
 
             # --- group spaces (mention-driven) ---
             try:
@@ -852,57 +1358,194 @@ async def poll_loop(api: WebexAPI) -> None:
             except Exception:
                 group_rooms = []
 
-            for room in group_rooms:
+            for room in room_index.merge(rooms + group_rooms):
+                if room_index.has_full_listing:
+                    # Absent from the last full listing, so the bot joined it
+                    # since: everything in it is new.
+                    _cursors.baseline(room["id"], room.get("created", ""))
+
+            indexed = room_index.rooms()
+            now, wall_now = time.monotonic(), time.time()
+            for room in indexed:
+                scheduler.observe(room["id"], room.get("lastActivity", ""), now, wall_now)
+
+            # Fetch concurrently; results come back in room order and each
+            # room's messages are handed over oldest-first, so per-room
+            # ordering is unchanged.
+            targets = [room for room in indexed if should_fetch(room)]
+            results = await api.map_concurrent(fetch, targets, POLL_FETCH_CONCURRENCY)
+
+            for room, messages in zip(targets, results):
                 room_id = room["id"]
-                mentions = await api.list_mentions(room_id, max_messages=10)
-                if not mentions:
+                is_space = room.get("type") == "group"
+                if isinstance(messages, Exception):
+                    # Left unmarked in the activity index, so retried next cycle.
+                    logger.warning("Fetch failed for %s %s: %s", "space" if is_space else "room", room_id[:12], messages)
                     continue
 
-                newest_id = mentions[0]["id"]
+                activity.mark(room_id, room.get("lastActivity", ""))
+                cursor = _cursors.get(room_id)
+                scheduler.record(
+                    room_id,
+                    had_new=bool(messages) and (cursor is None or cursor.message_id != messages[0]["id"]),
+                    now=time.monotonic(),
+                )
 
-                if room_id not in initialized_rooms:
-                    initialized_rooms.add(room_id)
-                    last_seen[room_id] = newest_id
-                    logger.info("Initialized space %s", room_id[:12])
+                if not messages:
                     continue
 
-                if last_seen.get(room_id) == newest_id:
+                if cursor is None:
+                    _cursors.advance(room_id, messages[0])
+                    logger.info("Initialized %s %s", "space" if is_space else "room", room_id[:12])
                     continue
 
-                new_mentions = []
-                for msg in mentions:
-                    if msg["id"] == last_seen.get(room_id):
-                        break
-                    new_mentions.append(msg)
-
-                new_mentions.reverse()
+                if cursor.message_id == messages[0]["id"]:
+                    continue
 
-                for msg in new_mentions:
-                    if msg.get("personId") == api.bot_id:
+                # Don't replay a backlog from a long outage; anything older
+                # than CATCHUP_MAX_AGE_SECONDS is acknowledged but skipped.
+                oldest_allowed = time.time() - CATCHUP_MAX_AGE_SECONDS
+                for msg in messages_after(messages, cursor):
+                    created = parse_webex_time(msg.get("created", ""))
+                    if created is not None and created < oldest_allowed:
+                        logger.info("Skipping stale message %s in %s", msg["id"][:12], room_id[:12])
                         continue
-                    await handle_space_mention(api, room_id, msg)
+                    if is_space:
+                        _accept_mention(api, room_id, msg)
+                    else:
+                        _accept_direct(api, room_id, msg)
 
-                last_seen[room_id] = newest_id
+                _cursors.advance(room_id, messages[0])
 
         except SystemExit:
             raise
         except Exception:
             logger.exception("Error during poll cycle")
-            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            await asyncio.sleep(interval)
+
+        await asyncio.sleep(interval)
+
+
+# ---------------------------------------------------------------------------
+# Webhook ingestion
+# ---------------------------------------------------------------------------
+
+async def _ingest_webhook_event(api: WebexAPI, event: dict) -> None:
+    try:
+        msg = await api.get_message(event["id"])
+    except Exception:
+        # The reconcile poll picks the message up later.
+        logger.exception("Failed to fetch webhook message %s", event["id"][:12])
+        return
+
+    room_id = msg.get("roomId") or event["roomId"]
+    if msg.get("roomType", event.get("roomType")) == "group":
+        if api.bot_id in msg.get("mentionedPeople", []):
+            _accept_mention(api, room_id, msg)
+    else:
+        _accept_direct(api, room_id, msg)
+
 
-        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+def _webhook_handler(api: WebexAPI):
+    async def handle(request: Request) -> Response:
+        signature = request.headers.get("x-spark-signature", "")
+        if not verify_signature(request.body, signature, WEBHOOK_SECRET):
+            logger.warning("Rejected webhook with bad signature")
+            return Response(status=401)
+
+        event = parse_message_event(request.body)
+        # Skip our own replies before spending a GET on them.
+        if event is not None and event.get("personId") != api.bot_id:
+            _spawn(_ingest_webhook_event(api, event))
+        # Acknowledge fast; Webex disables hooks that respond slowly.
+        return Response(status=200)
+
+    return handle
+
+
+async def _start_webhooks(api: WebexAPI) -> HttpServer:
+    server = HttpServer(WEBHOOK_HOST, WEBHOOK_PORT)
+    server.add_route("POST", WEBHOOK_PATH, _webhook_handler(api))
+    await server.start()
+    target = WEBHOOK_URL.rstrip("/")
+    if not target.endswith(WEBHOOK_PATH):
+        target += WEBHOOK_PATH
+    try:
+        await api.ensure_webhooks(MESSAGE_WEBHOOKS, target, WEBHOOK_SECRET)
+    except BaseException:
+        await server.close()
+        raise
+    return server
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
+METRICS_PATH = "/metrics"
+
+
+async def _metrics_handler(request: Request) -> Response:
+    body = {
+        "counters": metrics.snapshot(),
+        "usage": _usage.snapshot(),
+        "cli": {"running": _governor.running, "queued": _governor.queued()},
+    }
+    return Response(body=json.dumps(body).encode(), content_type="application/json")
+
+
+async def _start_metrics() -> HttpServer:
+    server = HttpServer(METRICS_HOST, METRICS_PORT)
+    server.add_route("GET", METRICS_PATH, _metrics_handler)
+    await server.start()
+    return server
+
+
+async def _flush_cursors_forever() -> None:
+    # flush() is a no-op unless dirty and its debounce interval has passed.
+    while True:
+        await asyncio.sleep(1.0)
+        _cursors.flush()
+
+
+async def _reap_orphans_forever() -> None:
+    while True:
+        await asyncio.sleep(CLI_ORPHAN_REAP_INTERVAL_SECONDS)
+        try:
+            await reap_orphans()
+        except Exception:
+            logger.exception("Orphan reaper failed")
+
+
 async def async_main() -> None:
     api = WebexAPI()
     await api.start()
+    server: HttpServer | None = None
+    metrics_server = await _start_metrics() if METRICS_PORT else None
+    flusher = asyncio.create_task(_flush_cursors_forever())
+    reaper = asyncio.create_task(_reap_orphans_forever()) if CLI_ORPHAN_REAP_INTERVAL_SECONDS > 0 else None
+    if CLI_SPAWN_HELPER:
+        await start_spawn_helper()
+    # New DM conversations start in $HOME with the default mode.
+    prewarm(str(Path.home()), BotState().mode, _router.default)
     try:
-        await poll_loop(api)
+        if WEBHOOK_URL:
+            server = await _start_webhooks(api)
+            await poll_loop(api, interval=RECONCILE_INTERVAL_SECONDS)
+        else:
+            await poll_loop(api)
     finally:
+        if server is not None:
+            await server.close()
+        if metrics_server is not None:
+            await metrics_server.close()
+        flusher.cancel()
+        if reaper is not None:
+            reaper.cancel()
+        _cursors.flush(force=True)
+        await _workers.close()
+        await close_persistent_sessions()
+        await close_spawn_helper()
         await api.close()
 
 
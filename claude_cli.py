@@ -5,11 +5,35 @@ import json
 import logging
 import os
 import shutil
+import time
 import uuid
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any, Callable
 
-from config import CLI_IDLE_TIMEOUT_SECONDS, CLI_TIMEOUT_SECONDS
+import metrics
+from config import (
+    CLI_IDLE_TIMEOUT_SECONDS,
+    CLI_KILL_GRACE_SECONDS,
+    CLI_MAX_LINE_BYTES,
+    CLI_PERSISTENT_SESSIONS,
+    CLI_SESSION_IDLE_TTL_SECONDS,
+    CLI_TIMEOUT_SECONDS,
+    CLI_USAGE_SAMPLE_SECONDS,
+    CLI_WARM_POOL_SIZE,
+    CLI_WARM_POOL_TTL_SECONDS,
+    RESPONSE_SPOOL_BYTES,
+    STREAM_REPLIES,
+)
+from deadlines import HARD, IDLE, Deadline, DeadlineScheduler
+from model_routing import DEFAULT_ROUTE, Route
+from proc_groups import OrphanReaper, ReapReport, kill_tree, spawn_kwargs
+from response_buffer import ResponseBuffer
+from salvage import TurnActivity, salvage
+from spawner import HelperProcess, SpawnHelper, SpawnHelperError
+from stream_decode import LineReader, decode_line, decode_truncated
+from usage import TurnMeter, TurnUsage, UsageSampler
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +96,17 @@ class TextEvent(StreamEvent):
         self.text = text
 
 
+@dataclass
+class TextDeltaEvent(StreamEvent):
+    """A fragment of assistant text (--include-partial-messages); the full
+    block still arrives afterwards as a TextEvent."""
+    text: str = ""
+
+    def __init__(self, text: str = ""):
+        super().__init__(type="text_delta")
+        self.text = text
+
+
 @dataclass
 class ResultEvent(StreamEvent):
     text: str = ""
@@ -97,45 +132,45 @@ class _HardTimeoutError(Exception):
     pass
 
 
-class _ActivityTracker:
-    def __init__(self) -> None:
-        self.last_activity: float = asyncio.get_running_loop().time()
-
-    def touch(self) -> None:
-        self.last_activity = asyncio.get_running_loop().time()
-
-
-async def _wait_with_activity_timeout(
-    stream_task: asyncio.Task[str],
-    activity: _ActivityTracker,
-) -> str:
-    """Wait for stream_task, enforcing idle timeout and hard cap."""
-    start = asyncio.get_running_loop().time()
-    check_interval = 5.0
+# One heap + loop timer for every running turn (see deadlines.py).
+_deadlines = DeadlineScheduler()
 
-    while not stream_task.done():
-        await asyncio.sleep(check_interval)
-        now = asyncio.get_running_loop().time()
 
-        if now - start > CLI_TIMEOUT_SECONDS:
-            stream_task.cancel()
-            try:
-                await stream_task
-            except (asyncio.CancelledError, Exception):
-                pass
+async def _wait_for_turn(stream_task: asyncio.Task[str], deadline: Deadline) -> str:
+    """Wait for stream_task; the deadline cancels it the moment a timeout is due."""
+    try:
+        await asyncio.wait({stream_task})
+    except asyncio.CancelledError:
+        stream_task.cancel()
+        raise
+    finally:
+        deadline.cancel()
+    if stream_task.cancelled():
+        if deadline.expired == HARD:
             raise _HardTimeoutError()
-
-        if now - activity.last_activity > CLI_IDLE_TIMEOUT_SECONDS:
-            stream_task.cancel()
-            try:
-                await stream_task
-            except (asyncio.CancelledError, Exception):
-                pass
+        if deadline.expired == IDLE:
             raise _IdleTimeoutError()
-
     return stream_task.result()
 
 
+def _start_turn(
+    stream: Callable[[Deadline], Any],
+    idle_timeout: float | None,
+    hard_timeout: float | None,
+    on_deadline: Callable[[Deadline], None] | None,
+) -> tuple[asyncio.Task[str], Deadline]:
+    """Start stream(deadline) as a task under a fresh idle/hard deadline."""
+    deadline = _deadlines.start(
+        idle_timeout or CLI_IDLE_TIMEOUT_SECONDS,
+        hard_timeout or CLI_TIMEOUT_SECONDS,
+        lambda kind: stream_task.cancel(),
+    )
+    stream_task = asyncio.create_task(stream(deadline))
+    if on_deadline:
+        on_deadline(deadline)
+    return stream_task, deadline
+
+
 # ---------------------------------------------------------------------------
 # Core: send a message (spawn per turn, stream events)
 # ---------------------------------------------------------------------------
@@ -144,19 +179,73 @@ def generate_session_id() -> str:
     return str(uuid.uuid4())
 
 
+# Started at boot when CLI_SPAWN_HELPER is set; otherwise spawns are direct.
+_spawner = SpawnHelper()
+
+
 def _clean_env() -> dict[str, str]:
     env = os.environ.copy()
     env.pop("CLAUDECODE", None)
     return env
 
 
+_claude_paths: dict[str | None, str] = {}
+
+
+def _which_claude() -> str | None:
+    """shutil.which("claude"), remembered per PATH value while it stays executable."""
+    path_env = os.environ.get("PATH")
+    found = _claude_paths.get(path_env)
+    if found is None or not os.access(found, os.X_OK):
+        found = shutil.which("claude", path=path_env)
+        if found is None:
+            _claude_paths.pop(path_env, None)
+            return None
+        _claude_paths[path_env] = found
+    return found
+
+
+async def start_spawn_helper() -> None:
+    """Route CLI spawns through the spawn helper (see spawner.py)."""
+    try:
+        await _spawner.start(_clean_env())
+    except SpawnHelperError as e:
+        logger.warning("%s; spawning CLI processes directly", e)
+
+
+async def close_spawn_helper() -> None:
+    await _spawner.close()
+
+
+async def _spawn(cmd: list[str], cwd: str) -> asyncio.subprocess.Process | HelperProcess:
+    """Start a CLI process in its own session, via the spawn helper when it's up."""
+    if _spawner.running:
+        try:
+            return await _spawner.spawn(cmd, cwd)
+        except SpawnHelperError as e:
+            logger.warning("%s; spawning directly", e)
+    return await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        cwd=cwd,
+        env=_clean_env(),
+        **spawn_kwargs(),
+    )
+
+
 def _build_cmd(
     session_id: str,
-    message: str,
+    message: str | None,
     is_new: bool,
     mode: str,
+    route: Route = DEFAULT_ROUTE,
 ) -> list[str]:
-    claude_path = shutil.which("claude")
+    """Build the claude argv. message=None builds a persistent process that
+    reads user turns as stream-json lines on stdin. `route` adds the turn's
+    model flags (see model_routing.py)."""
+    claude_path = _which_claude()
     if claude_path is None:
         raise FileNotFoundError("'claude' CLI not found on PATH")
 
@@ -166,6 +255,10 @@ def _build_cmd(
         "--output-format", "stream-json",
         "--verbose",
     ]
+    if message is None:
+        cmd.extend(["--input-format", "stream-json"])
+    if STREAM_REPLIES:
+        cmd.append("--include-partial-messages")
 
     if is_new:
         cmd.extend(["--session-id", session_id])
@@ -178,8 +271,11 @@ def _build_cmd(
         cmd.extend(["--allowedTools", ",".join(STRICT_ALLOWED_TOOLS)])
     # SAFE mode: no permission flags — Claude will emit permission requests
 
-    cmd.append("--")
-    cmd.append(message)
+    cmd.extend(route.cli_args())
+
+    if message is not None:
+        cmd.append("--")
+        cmd.append(message)
     return cmd
 
 
@@ -192,152 +288,576 @@ async def send_message(
     on_event: Callable[[StreamEvent], Any] | None = None,
     on_permission: Callable[[PermissionEvent], Any] | None = None,
     on_process_started: Callable[[asyncio.subprocess.Process], None] | None = None,
+    idle_timeout: float | None = None,
+    hard_timeout: float | None = None,
+    on_deadline: Callable[[Deadline], None] | None = None,
+    response: ResponseBuffer | None = None,
+    activity: TurnActivity | None = None,
+    usage: TurnUsage | None = None,
+    route: Route = DEFAULT_ROUTE,
 ) -> str:
     """
     Send a message to Claude Code. Spawns a process, streams events, returns final text.
 
     Uses activity-based timeout: process stays alive as long as events are being received,
-    killed only after CLI_IDLE_TIMEOUT_SECONDS of inactivity or CLI_TIMEOUT_SECONDS total.
+    killed only after idle_timeout seconds of inactivity or hard_timeout total (defaults
+    CLI_IDLE_TIMEOUT_SECONDS / CLI_TIMEOUT_SECONDS). on_deadline gets the turn's Deadline,
+    e.g. to show the time remaining.
+
+    With CLI_PERSISTENT_SESSIONS the turn goes to a long-lived process for the
+    session instead (see _send_persistent), falling back to a fresh spawn if
+    that process can't take the turn.
+
+    With `response`, the reply (or error text) is written there instead and ""
+    is returned; the buffer spills to disk past RESPONSE_SPOOL_BYTES, so a huge
+    answer never has to be held as one string.
+
+    A turn that times out keeps what it had written, followed by a summary of
+    the tools it ran (see salvage.py); tool calls are also recorded into
+    `activity` so a caller can do the same after cancelling the turn.
+
+    `usage`, if given, is filled in with the turn's wall time, CPU time and
+    peak RSS (sampled from /proc, see usage.py) and its reported cost.
+
+    `route` picks the model (and thinking budget) the turn runs on.
     """
+    parts = response if response is not None else ResponseBuffer(RESPONSE_SPOOL_BYTES)
+    if activity is None:
+        activity = TurnActivity()
+    if usage is None:
+        usage = TurnUsage()
     try:
-        cmd = _build_cmd(session_id, message, is_new, mode)
+        status = await _run_turn(
+            parts, activity, usage, session_id, message, cwd, is_new, mode, on_event, on_permission, on_process_started,
+            idle_timeout, hard_timeout, on_deadline, route,
+        )
+        if response is not None:
+            if status is not None:
+                response.replace(status)
+            return ""
+        return status if status is not None else parts.getvalue()
+    finally:
+        if response is None:
+            parts.close()
+
+
+async def _run_turn(
+    parts: ResponseBuffer,
+    activity: TurnActivity,
+    usage: TurnUsage,
+    session_id: str,
+    message: str,
+    cwd: str,
+    is_new: bool,
+    mode: str,
+    on_event: Callable[[StreamEvent], Any] | None,
+    on_permission: Callable[[PermissionEvent], Any] | None,
+    on_process_started: Callable[[asyncio.subprocess.Process], None] | None,
+    idle_timeout: float | None,
+    hard_timeout: float | None,
+    on_deadline: Callable[[Deadline], None] | None,
+    route: Route = DEFAULT_ROUTE,
+) -> str | None:
+    """send_message's body: returns an error/status text, or None once the
+    answer is in `parts`."""
+    if CLI_PERSISTENT_SESSIONS:
+        try:
+            return await _send_persistent(
+                parts, activity, usage, session_id, message, cwd, is_new, mode, on_event, on_permission, on_process_started,
+                idle_timeout, hard_timeout, on_deadline, route,
+            )
+        except _SessionUnavailable:
+            logger.warning("Persistent CLI session %s unavailable; spawning per turn", session_id[:8])
+
+    try:
+        cmd = _build_cmd(session_id, message, is_new, mode, route)
     except FileNotFoundError as e:
         return f"Error: {e}"
 
     logger.info("CLI: %s (cwd=%s, mode=%s)", " ".join(cmd[:6]) + " ...", cwd, mode)
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.DEVNULL,
-            cwd=cwd,
-            env=_clean_env(),
-        )
+        process = await _spawn(cmd, cwd)
     except FileNotFoundError:
         return "Error: 'claude' CLI not found on PATH."
     except OSError as e:
         return f"Error starting CLI: {e}"
 
+    _orphans.track(process)
     if on_process_started:
         on_process_started(process)
 
-    text_parts: list[str] = []
-    activity = _ActivityTracker()
-
-    def wrapped_on_event(event: StreamEvent) -> Any:
-        activity.touch()
-        if on_event:
-            return on_event(event)
-
+    meter = _sampler.start(process.pid, usage)
+    stream_task, deadline = _start_turn(
+        lambda d: _stream_events(process, parts, on_event, on_permission, d, tools=activity, meter=meter),
+        idle_timeout, hard_timeout, on_deadline,
+    )
     try:
-        stream_task = asyncio.create_task(
-            _stream_events(process, text_parts, wrapped_on_event, on_permission, activity)
-        )
-        result_text = await _wait_with_activity_timeout(stream_task, activity)
+        result_text = await _wait_for_turn(stream_task, deadline)
     except _IdleTimeoutError:
-        process.kill()
-        try:
-            await asyncio.wait_for(process.wait(), timeout=5.0)
-        except asyncio.TimeoutError:
-            pass
-        idle_min = CLI_IDLE_TIMEOUT_SECONDS // 60
-        return f"Error: Claude timed out after {idle_min}m of inactivity."
+        await kill_process(process)
+        return _interrupted(parts, activity, _idle_timeout_message(deadline.idle))
     except _HardTimeoutError:
-        process.kill()
-        try:
-            await asyncio.wait_for(process.wait(), timeout=5.0)
-        except asyncio.TimeoutError:
-            pass
-        hard_min = CLI_TIMEOUT_SECONDS // 60
-        return f"Error: Claude hit the {hard_min}m hard timeout."
+        await kill_process(process)
+        return _interrupted(parts, activity, _hard_timeout_message(deadline.hard))
     except asyncio.CancelledError:
-        process.kill()
-        try:
-            await asyncio.wait_for(process.wait(), timeout=5.0)
-        except asyncio.TimeoutError:
-            pass
+        await kill_process(process)
         raise
+    finally:
+        _sampler.stop(meter)
 
     await process.wait()
 
-    if process.returncode != 0 and not text_parts and not result_text:
+    if process.returncode != 0 and not parts and not result_text:
         return "Claude encountered an error. Try sending your message again."
 
-    return result_text or "".join(text_parts) or "Claude completed but returned no output."
+    return _settle(parts, result_text)
+
+
+def _settle(parts: ResponseBuffer, result_text: str) -> str | None:
+    """The turn's answer is its `result` text, else all text blocks joined."""
+    if result_text:
+        parts.replace(result_text)
+        return None
+    if parts:
+        return None
+    return "Claude completed but returned no output."
+
+
+def _interrupted(parts: ResponseBuffer, activity: TurnActivity, notice: str) -> str | None:
+    """Keep a timed-out turn's partial output (plus `notice`) if it had any."""
+    return None if salvage(parts, activity, notice) else notice
+
+
+def _format_timeout(seconds: float) -> str:
+    return f"{int(seconds) // 60}m" if seconds >= 60 else f"{int(seconds)}s"
+
+
+def _idle_timeout_message(seconds: float) -> str:
+    return f"Error: Claude timed out after {_format_timeout(seconds)} of inactivity."
+
+
+def _hard_timeout_message(seconds: float) -> str:
+    return f"Error: Claude hit the {_format_timeout(seconds)} hard timeout."
+
+
+async def kill_process(process: asyncio.subprocess.Process) -> None:
+    """Stop a CLI process and everything it started (see proc_groups.py)."""
+    await kill_tree(process, CLI_KILL_GRACE_SECONDS)
+
+
+# Samples each running turn's process tree for per-turn usage.
+_sampler = UsageSampler(CLI_USAGE_SAMPLE_SECONDS)
+
+# Leftover descendants of exited CLI processes; swept by reap_orphans().
+_orphans = OrphanReaper(CLI_KILL_GRACE_SECONDS)
+
+
+async def reap_orphans() -> ReapReport:
+    """Kill whatever exited CLI processes left running."""
+    return await _orphans.reap()
+
+
+# ---------------------------------------------------------------------------
+# Persistent sessions (one long-lived process per session, stream-json stdin)
+# ---------------------------------------------------------------------------
+
+REAP_INTERVAL_SECONDS = 30.0
+
+
+@dataclass
+class _PersistentSession:
+    session_id: str
+    cwd: str
+    mode: str
+    process: asyncio.subprocess.Process
+    route: Route = DEFAULT_ROUTE
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def close(self) -> None:
+        """Close stdin so claude exits on its own; kill it if it lingers."""
+        if self.alive and self.process.stdin and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5.0)
+        except asyncio.TimeoutError:
+            await kill_process(self.process)
+
+
+_persistent: dict[str, _PersistentSession] = {}
+_reaper_task: asyncio.Task | None = None
+
+
+def _user_line(message: str) -> bytes:
+    payload = {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": message}]}}
+    return (json.dumps(payload) + "\n").encode()
+
+
+async def _spawn_persistent(
+    session_id: str, cwd: str, is_new: bool, mode: str, route: Route = DEFAULT_ROUTE,
+) -> _PersistentSession:
+    cmd = _build_cmd(session_id, None, is_new, mode, route)
+    logger.info("CLI (persistent): %s (cwd=%s, mode=%s)", " ".join(cmd[:8]) + " ...", cwd, mode)
+    process = await _spawn(cmd, cwd)
+    _orphans.track(process)
+    return _PersistentSession(session_id=session_id, cwd=cwd, mode=mode, process=process, route=route)
+
+
+async def _drop_persistent(session: _PersistentSession, kill: bool = False) -> None:
+    """Forget the session's process and stop it (kill=True: mid-turn, don't wait)."""
+    if _persistent.get(session.session_id) is session:
+        del _persistent[session.session_id]
+    if kill:
+        await kill_process(session.process)
+    else:
+        await session.close()
+
+
+async def release_session(session_id: str) -> None:
+    """Close the session's persistent process, if any, so the next turn
+    resumes from disk (e.g. another bot instance has written to it)."""
+    session = _persistent.get(session_id)
+    if session is not None:
+        await _drop_persistent(session)
+
+
+class _SessionUnavailable(Exception):
+    """The persistent process never saw the turn; spawn one per turn instead."""
+
+
+async def _send_persistent(
+    parts: ResponseBuffer,
+    activity: TurnActivity,
+    usage: TurnUsage,
+    session_id: str,
+    message: str,
+    cwd: str,
+    is_new: bool,
+    mode: str,
+    on_event: Callable[[StreamEvent], Any] | None,
+    on_permission: Callable[[PermissionEvent], Any] | None,
+    on_process_started: Callable[[asyncio.subprocess.Process], None] | None,
+    idle_timeout: float | None = None,
+    hard_timeout: float | None = None,
+    on_deadline: Callable[[Deadline], None] | None = None,
+    route: Route = DEFAULT_ROUTE,
+) -> str | None:
+    """Run one turn on the session's long-lived process (returns like _run_turn).
+
+    Raises _SessionUnavailable when the turn never reached Claude (spawn
+    failed, stdin broken, or the process died before emitting anything) so
+    the caller can fall back to spawn-per-turn without running it twice.
+    """
+    session = _persistent.get(session_id)
+    if session is not None and (not session.alive or (session.cwd, session.mode, session.route) != (cwd, mode, route)):
+        # /cwd, /mode or the turn's route changed (or /cancel killed it): the
+        # flags are baked into the process, so start a fresh one for the session.
+        await _drop_persistent(session)
+        session = None
+    if session is None:
+        try:
+            session = await _spawn_persistent(session_id, cwd, is_new, mode, route)
+        except OSError as e:  # includes FileNotFoundError
+            logger.warning("Failed to start persistent CLI for %s: %s", session_id[:8], e)
+            raise _SessionUnavailable from e
+        _persistent[session_id] = session
+        _ensure_reaper()
+
+    async with session.lock:
+        process = session.process
+        if on_process_started:
+            on_process_started(process)
+        try:
+            assert process.stdin
+            process.stdin.write(_user_line(message))
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError, AssertionError) as e:
+            await _drop_persistent(session)
+            raise _SessionUnavailable from e
+
+        meter = _sampler.start(process.pid, usage, fresh=False)
+        stream_task, deadline = _start_turn(
+            lambda d: _stream_events(
+                process, parts, on_event, on_permission, d, stop_at_result=True, tools=activity, meter=meter,
+            ),
+            idle_timeout, hard_timeout, on_deadline,
+        )
+        try:
+            result_text = await _wait_for_turn(stream_task, deadline)
+        except _IdleTimeoutError:
+            await _drop_persistent(session, kill=True)
+            return _interrupted(parts, activity, _idle_timeout_message(deadline.idle))
+        except _HardTimeoutError:
+            await _drop_persistent(session, kill=True)
+            return _interrupted(parts, activity, _hard_timeout_message(deadline.hard))
+        except asyncio.CancelledError:
+            await _drop_persistent(session, kill=True)
+            raise
+        finally:
+            _sampler.stop(meter)
+        session.last_used = time.monotonic()
+
+    assert process.stdout
+    if process.stdout.at_eof():
+        # Exited instead of finishing the turn; never reuse it.
+        await _drop_persistent(session)
+        if not deadline.touched:
+            raise _SessionUnavailable
+        if not parts and not result_text:
+            return "Claude encountered an error. Try sending your message again."
+
+    return _settle(parts, result_text)
+
+
+def _ensure_reaper() -> None:
+    global _reaper_task
+    if _reaper_task is None or _reaper_task.done():
+        _reaper_task = asyncio.create_task(_reap_idle_forever())
+
+
+async def reap_idle_sessions(ttl: float = CLI_SESSION_IDLE_TTL_SECONDS) -> int:
+    """Close persistent processes idle for longer than `ttl`. Returns how many."""
+    now = time.monotonic()
+    idle = [
+        s for s in list(_persistent.values())
+        if not s.lock.locked() and (not s.alive or now - s.last_used > ttl)
+    ]
+    for session in idle:
+        logger.info("Reaping idle CLI process for session %s", session.session_id[:8])
+        await _drop_persistent(session)
+    return len(idle)
+
+
+async def _reap_idle_forever() -> None:
+    while True:
+        await asyncio.sleep(REAP_INTERVAL_SECONDS)
+        try:
+            await reap_idle_sessions()
+            await _pool.expire()
+        except Exception:
+            logger.exception("CLI reaper failed")
+
+
+async def close_persistent_sessions() -> None:
+    """Shut down every persistent process (bot shutdown)."""
+    global _reaper_task
+    if _reaper_task is not None:
+        _reaper_task.cancel()
+        _reaper_task = None
+    await _pool.close()
+    await asyncio.gather(*(_drop_persistent(s) for s in list(_persistent.values())), return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Warm pool (pre-spawned persistent processes for brand-new sessions)
+# ---------------------------------------------------------------------------
+
+# (cwd, mode, route) combinations kept warm; the least recently used is dropped.
+WARM_POOL_MAX_KEYS = 4
+
+
+class _WarmPool:
+    """Idle persistent processes started with a fresh --session-id, waiting
+    on stdin for their first turn. Keyed by (cwd, mode, route) since all
+    three are fixed at spawn; each key is refilled to `size` in the background."""
+
+    def __init__(self, size: int, ttl: float) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._idle: dict[tuple[str, str, Route], list[_PersistentSession]] = {}
+        self._keys: OrderedDict[tuple[str, str, Route], None] = OrderedDict()
+        self._refills: dict[tuple[str, str, Route], asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return sum(len(sessions) for sessions in self._idle.values())
+
+    def take(self, cwd: str, mode: str, route: Route = DEFAULT_ROUTE) -> _PersistentSession | None:
+        """Pop a live warm process for (cwd, mode, route) and schedule a refill."""
+        key = (cwd, mode, route)
+        self.want(key)
+        sessions = self._idle.get(key, [])
+        now = time.monotonic()
+        while sessions:
+            session = sessions.pop(0)
+            if session.alive and now - session.last_used <= self.ttl:
+                return session
+            _close_later(session)
+        return None
+
+    def want(self, key: tuple[str, str, Route]) -> None:
+        """Keep `key` warm, evicting the least recently used key if needed."""
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > WARM_POOL_MAX_KEYS:
+            old, _ = self._keys.popitem(last=False)
+            for session in self._idle.pop(old, []):
+                _close_later(session)
+        self._schedule_refill(key)
+
+    def _schedule_refill(self, key: tuple[str, str, Route]) -> None:
+        task = self._refills.get(key)
+        if task is None or task.done():
+            self._refills[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: tuple[str, str, Route]) -> None:
+        cwd, mode, route = key
+        sessions = self._idle.setdefault(key, [])
+        while key in self._keys and len(sessions) < self.size:
+            try:
+                session = await _spawn_persistent(generate_session_id(), cwd, True, mode, route)
+            except OSError as e:
+                logger.warning("Warm pool spawn failed for %s (%s): %s", cwd, mode, e)
+                return
+            if key not in self._keys:
+                await session.close()
+                return
+            sessions.append(session)
+        _ensure_reaper()
+
+    async def expire(self) -> None:
+        """Close warm processes past the TTL (or dead) and refill their keys."""
+        now = time.monotonic()
+        for key, sessions in self._idle.items():
+            stale = [s for s in sessions if not s.alive or now - s.last_used > self.ttl]
+            for session in stale:
+                sessions.remove(session)
+                await session.close()
+            if stale and key in self._keys:
+                self._schedule_refill(key)
+
+    async def close(self) -> None:
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+        self._keys.clear()
+        sessions = [s for pool in self._idle.values() for s in pool]
+        self._idle.clear()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+# Strong refs to fire-and-forget closes so they are not garbage-collected.
+_closing: set[asyncio.Task] = set()
+
+
+def _close_later(session: _PersistentSession) -> None:
+    task = asyncio.create_task(session.close())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+_pool = _WarmPool(CLI_WARM_POOL_SIZE, CLI_WARM_POOL_TTL_SECONDS)
+
+
+def _pool_enabled() -> bool:
+    return CLI_PERSISTENT_SESSIONS and _pool.size > 0
+
+
+def prewarm(cwd: str, mode: str, route: Route = DEFAULT_ROUTE) -> None:
+    """Start keeping warm processes for (cwd, mode, route) before anyone asks."""
+    if _pool_enabled():
+        _pool.want((cwd, mode, route))
+
+
+def new_session_id(cwd: str, mode: str, route: Route = DEFAULT_ROUTE) -> str:
+    """Session id for a brand-new conversation in `cwd` under `mode`, whose
+    first turn is expected to run on `route`.
+
+    With the warm pool enabled this hands over a pooled process's session id
+    and registers the process as that session's persistent process, so the
+    first turn skips CLI startup. Otherwise it is generate_session_id().
+    """
+    if not _pool_enabled():
+        return generate_session_id()
+    session = _pool.take(cwd, mode, route)
+    if session is None:
+        metrics.incr("cli.warm_pool_miss")
+        return generate_session_id()
+    metrics.incr("cli.warm_pool_hit")
+    session.last_used = time.monotonic()
+    _persistent[session.session_id] = session
+    _ensure_reaper()
+    return session.session_id
+
+
+# One reader per process, so bytes buffered past a persistent process's
+# `result` line are still there for its next turn.
+_readers: weakref.WeakKeyDictionary[Any, LineReader] = weakref.WeakKeyDictionary()
+
+
+def _line_reader(process: asyncio.subprocess.Process) -> LineReader:
+    reader = _readers.get(process)
+    if reader is None:
+        assert process.stdout
+        reader = _readers[process] = LineReader(process.stdout, CLI_MAX_LINE_BYTES)
+    return reader
 
 
 async def _stream_events(
     process: asyncio.subprocess.Process,
-    text_parts: list[str],
+    text_parts: list[str] | ResponseBuffer,
     on_event: Callable[[StreamEvent], Any] | None,
     on_permission: Callable[[PermissionEvent], Any] | None,
-    activity: _ActivityTracker | None = None,
+    activity: Deadline | None = None,
+    stop_at_result: bool = False,
+    tools: TurnActivity | None = None,
+    meter: TurnMeter | None = None,
 ) -> str:
-    """Read stream-json lines from stdout, dispatch events, return result text."""
+    """Read stream-json lines from stdout, dispatch events, return result text.
+
+    Lines are decoded by stream_decode.decode_line, which skips event types
+    the bot doesn't use without parsing them.
+
+    Reads to EOF, or with stop_at_result only up to the turn's `result` event
+    (a persistent process keeps running after it).
+    """
     assert process.stdout
 
     result_text = ""
 
-    while True:
-        line = await process.stdout.readline()
-        if not line:
-            break
-
+    async for line, truncated in _line_reader(process):
         if activity:
             activity.touch()
 
-        raw = line.decode("utf-8", errors="replace").strip()
-        if not raw:
-            continue
-
-        try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
-            continue
-
-        event_type = data.get("type", "")
-
-        if event_type == "assistant":
-            content = data.get("message", {}).get("content", [])
-            for block in content:
-                block_type = block.get("type", "")
-                if block_type == "text":
-                    text = block.get("text", "")
-                    text_parts.append(text)
-                    if on_event:
-                        evt = TextEvent(text=text)
-                        await _call(on_event, evt)
-                elif block_type == "tool_use":
-                    tool_name = block.get("name", "")
-                    tool_id = block.get("id", "")
-                    tool_input = block.get("input", {})
-                    preview = _tool_preview(tool_name, tool_input)
-                    if on_event:
-                        evt = ToolUseEvent(tool_name=tool_name, tool_id=tool_id, input_preview=preview)
-                        await _call(on_event, evt)
-
-        elif event_type == "result":
-            result_text = data.get("result", "")
+        for item in decode_truncated(line) if truncated else decode_line(line):
+            kind = item[0]
+            if kind == "text":
+                text_parts.append(item[1])
+                if on_event:
+                    await _call(on_event, TextEvent(text=item[1]))
+            elif kind == "tool_use":
+                if tools is not None:
+                    tools.record(item[1], item[3])
+                if on_event:
+                    _, tool_name, tool_id, preview = item
+                    await _call(on_event, ToolUseEvent(tool_name=tool_name, tool_id=tool_id, input_preview=preview))
+            elif kind == "text_delta":
+                if on_event:
+                    await _call(on_event, TextDeltaEvent(text=item[1]))
+            elif kind == "result":
+                data = item[1]
+                result_text = data.get("result", "")
+                event = ResultEvent(
+                    text=result_text,
+                    duration_ms=data.get("duration_ms") or 0,
+                    cost_usd=data.get("total_cost_usd") or data.get("cost_usd") or 0.0,
+                )
+                if meter is not None:
+                    _sampler.sample([meter])  # before the process exits
+                    meter.usage.cost_usd = event.cost_usd
+                    meter.usage.duration_ms = event.duration_ms
+                if on_event:
+                    await _call(on_event, event)
+                if stop_at_result:
+                    return result_text
 
     return result_text
 
 
-def _tool_preview(tool_name: str, tool_input: dict) -> str:
-    """Generate a short preview of what a tool is doing."""
-    if tool_name == "Bash":
-        cmd = tool_input.get("command", "")
-        return cmd[:80] if cmd else ""
-    elif tool_name == "Read":
-        return tool_input.get("file_path", "")
-    elif tool_name == "Write" or tool_name == "Edit":
-        return tool_input.get("file_path", "")
-    elif tool_name == "Grep":
-        return tool_input.get("pattern", "")
-    return json.dumps(tool_input)[:60] if tool_input else ""
-
-
 async def _call(fn: Callable, *args: Any) -> Any:
     """Call a function, awaiting if it's async."""
     result = fn(*args)
@@ -0,0 +1,191 @@
+"""Global cap on concurrent `claude` turns, with priority and admission control.
+
+Turns wait for one of `max_concurrent` slots. Waiters are served by class
+(owner DMs before space mentions) and, within a class, round-robin across
+conversations, so one busy room can't starve the rest. A free slot is only
+handed out while the host has memory and CPU headroom (see procfs.py); if
+it doesn't, the queue is re-checked every few seconds. The first turn is
+always admitted when nothing is running, so a host that stays loaded for
+other reasons slows the bot down instead of stalling it.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import AsyncIterator, Callable
+
+import metrics
+from procfs import HostLoad, read_host_load
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_RETRY_SECONDS = 2.0
+
+
+class TurnClass(IntEnum):
+    DIRECT = 0  # the owner's DMs
+    SPACE = 1   # @mentions in group spaces
+
+
+@dataclass
+class _Waiter:
+    key: str
+    future: asyncio.Future[None]
+    on_position: Callable[[int], None] | None
+    position: int = field(default=0)
+
+
+class CliGovernor:
+    """Slots for concurrent CLI turns. max_concurrent <= 0 means unlimited."""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        min_available_mb: float = 0,
+        max_load_per_cpu: float = 0,
+        probe: Callable[[], HostLoad | None] = read_host_load,
+        retry_seconds: float = ADMISSION_RETRY_SECONDS,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.min_available_mb = min_available_mb
+        self.max_load_per_cpu = max_load_per_cpu
+        self._probe = probe
+        self._retry_seconds = retry_seconds
+        self.running = 0
+        self._queues: dict[TurnClass, OrderedDict[str, deque[_Waiter]]] = {c: OrderedDict() for c in TurnClass}
+        self._retry: asyncio.TimerHandle | None = None
+
+    def queued(self) -> int:
+        return sum(len(q) for rooms in self._queues.values() for q in rooms.values())
+
+    def position(self, key: str) -> int | None:
+        """1-based place in line of `key`'s first waiting turn, if any."""
+        for waiter in self._order():
+            if waiter.key == key:
+                return waiter.position
+        return None
+
+    @asynccontextmanager
+    async def slot(
+        self, key: str, turn_class: TurnClass = TurnClass.DIRECT,
+        on_position: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[None]:
+        """Hold a slot for one turn. on_position(n) reports the place in line
+        while waiting (1 = next) and 0 once admitted."""
+        await self._acquire(key, turn_class, on_position)
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._dispatch()
+
+    async def _acquire(self, key: str, turn_class: TurnClass, on_position: Callable[[int], None] | None) -> None:
+        if self.max_concurrent <= 0 or (not self.queued() and self._admissible()):
+            self.running += 1
+            return
+
+        waiter = _Waiter(key, asyncio.get_running_loop().create_future(), on_position)
+        self._queues[turn_class].setdefault(key, deque()).append(waiter)
+        metrics.incr("cli.turns_queued")
+        self._notify()
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted in the same tick as the cancel: give the slot back.
+                self.running -= 1
+                self._dispatch()
+            else:
+                self._remove(waiter)
+                self._notify()
+            raise
+
+    def _admissible(self) -> bool:
+        if self.running >= self.max_concurrent:
+            return False
+        if self.running == 0:
+            return True
+        return self._host_ok()
+
+    def _host_ok(self) -> bool:
+        if self.min_available_mb <= 0 and self.max_load_per_cpu <= 0:
+            return True
+        load = self._probe()
+        if load is None:
+            return True
+        if self.min_available_mb > 0 and load.mem_available_mb is not None \
+                and load.mem_available_mb < self.min_available_mb:
+            logger.info("Deferring CLI turn: %.0f MiB available", load.mem_available_mb)
+            metrics.incr("cli.admission_deferred_memory")
+            return False
+        per_cpu = load.load_per_cpu
+        if self.max_load_per_cpu > 0 and per_cpu is not None and per_cpu > self.max_load_per_cpu:
+            logger.info("Deferring CLI turn: load %.2f per CPU", per_cpu)
+            metrics.incr("cli.admission_deferred_load")
+            return False
+        return True
+
+    def _dispatch(self) -> None:
+        admitted = False
+        while self.queued() and self._admissible():
+            waiter = self._pop_next()
+            if waiter.future.done():  # cancelled while queued
+                continue
+            self.running += 1
+            waiter.future.set_result(None)
+            if waiter.on_position:
+                waiter.on_position(0)
+            admitted = True
+        if admitted:
+            self._notify()
+        if self.queued() and self.running < self.max_concurrent and self._retry is None:
+            # Slot free but host too busy: look again shortly.
+            self._retry = asyncio.get_running_loop().call_later(self._retry_seconds, self._retry_dispatch)
+
+    def _retry_dispatch(self) -> None:
+        self._retry = None
+        self._dispatch()
+
+    def _pop_next(self) -> _Waiter:
+        for rooms in self._queues.values():
+            if rooms:
+                key, waiters = next(iter(rooms.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    rooms.move_to_end(key)
+                else:
+                    del rooms[key]
+                return waiter
+        raise IndexError("no waiters")
+
+    def _remove(self, waiter: _Waiter) -> None:
+        for rooms in self._queues.values():
+            waiters = rooms.get(waiter.key)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del rooms[waiter.key]
+                return
+
+    def _order(self) -> list[_Waiter]:
+        """Waiters in the order _pop_next would admit them."""
+        order: list[_Waiter] = []
+        for rooms in self._queues.values():
+            lanes = [list(waiters) for waiters in rooms.values()]
+            depth = 0
+            while any(depth < len(lane) for lane in lanes):
+                order.extend(lane[depth] for lane in lanes if depth < len(lane))
+                depth += 1
+        return order
+
+    def _notify(self) -> None:
+        for i, waiter in enumerate(self._order(), start=1):
+            if waiter.position != i:
+                waiter.position = i
+                if waiter.on_position:
+                    waiter.on_position(i)
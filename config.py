@@ -36,6 +36,31 @@ def _parse_space_modes(raw: str) -> dict[str, str]:
     return result
 
 
+def _parse_timeouts(name: str, raw: str) -> dict[str, tuple[int | None, int | None]]:
+    """Parse 'key:idle/hard,key:idle/hard' into {key: (idle, hard)} seconds.
+
+    Either number may be left blank to inherit ('roomA:/7200'). Malformed
+    entries are skipped with a warning. Empty/blank -> {}.
+    """
+    result: dict[str, tuple[int | None, int | None]] = {}
+    for chunk in raw.split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        key, sep, value = chunk.rpartition(":")
+        idle_raw, slash, hard_raw = value.partition("/")
+        try:
+            if not sep or not key.strip() or not slash:
+                raise ValueError
+            idle = int(idle_raw) if idle_raw.strip() else None
+            hard = int(hard_raw) if hard_raw.strip() else None
+        except ValueError:
+            print(f"Warning: {name} entry {chunk!r} is not 'key:idle/hard'; skipping.", file=sys.stderr)
+            continue
+        result[key.strip()] = (idle, hard)
+    return result
+
+
 def _require_env(name: str) -> str:
     """Read a required environment variable, exiting with a helpful message if missing or empty."""
     value = os.environ.get(name, "").strip()
@@ -69,9 +94,154 @@ def _int_env(name: str, default: int) -> int:
         return default
 
 
+# Idle rooms back off from POLL_INTERVAL_SECONDS up to this per-room interval.
+POLL_MAX_INTERVAL_SECONDS: int = _int_env("POLL_MAX_INTERVAL_SECONDS", 300)
+# Full paginated /rooms listing interval; between listings only the first
+# page (most recently active rooms) is fetched each cycle.
+ROOM_FULL_REFRESH_SECONDS: int = _int_env("ROOM_FULL_REFRESH_SECONDS", 3600)
+# Max room fetches in flight at once during a poll cycle.
+POLL_FETCH_CONCURRENCY: int = max(1, _int_env("POLL_FETCH_CONCURRENCY", 8))
+# After a restart, messages that arrived while down are caught up from the
+# saved poll cursors unless older than this.
+CATCHUP_MAX_AGE_SECONDS: int = _int_env("CATCHUP_MAX_AGE_SECONDS", 3600)
+# Max messages walked back per room when more than one page arrived between
+# polls (or during downtime) before giving up on reaching the cursor.
+CATCHUP_MAX_MESSAGES: int = max(10, _int_env("CATCHUP_MAX_MESSAGES", 200))
+
+def _float_env(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        print(f"Warning: {name}={raw!r} is not a valid number, using default ({default})", file=sys.stderr)
+        return default
+
+
+def _bool_env(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    print(f"Warning: {name}={raw!r} is not a valid boolean, using default ({default})", file=sys.stderr)
+    return default
+
+
+# Client-side token bucket shared by every Webex API call (0 disables it).
+WEBEX_REQUESTS_PER_SECOND: float = _float_env("WEBEX_REQUESTS_PER_SECOND", 5.0)
+WEBEX_BURST: int = _int_env("WEBEX_BURST", 10)
+
+# Chat messages arriving within this many seconds of each other (or while a
+# turn is running) are merged into one Claude turn. 0 = only merge mid-turn.
+COALESCE_WINDOW_SECONDS: float = _float_env("COALESCE_WINDOW_SECONDS", 1.5)
+
 CLI_TIMEOUT_SECONDS: int = _int_env("CLI_TIMEOUT_SECONDS", 2400)
 CLI_IDLE_TIMEOUT_SECONDS: int = _int_env("CLI_IDLE_TIMEOUT_SECONDS", 180)
 
+# Start CLI processes from a small helper process spawned at boot (Linux)
+# instead of forking the bot for every turn; falls back to direct spawns.
+CLI_SPAWN_HELPER: bool = _bool_env("CLI_SPAWN_HELPER", False)
+
+# Cancelled/timed-out turns get SIGTERM, then SIGKILL after this grace period
+# (sent to the whole process group). Leftover descendants of finished CLI
+# processes are looked for every CLI_ORPHAN_REAP_INTERVAL_SECONDS (0 = never).
+CLI_KILL_GRACE_SECONDS: float = _float_env("CLI_KILL_GRACE_SECONDS", 3.0)
+CLI_ORPHAN_REAP_INTERVAL_SECONDS: float = _float_env("CLI_ORPHAN_REAP_INTERVAL_SECONDS", 60.0)
+
+# Running turns' process trees are sampled from /proc this often for per-turn
+# CPU/RSS accounting (0 = only at the start and end of each turn).
+CLI_USAGE_SAMPLE_SECONDS: float = _float_env("CLI_USAGE_SAMPLE_SECONDS", 2.0)
+
+# Optional JSON metrics endpoint (GET /metrics): counters and per-room/thread/
+# session usage totals. Off unless a port is set; binds to localhost by default.
+METRICS_HOST: str = os.environ.get("METRICS_HOST", "127.0.0.1").strip() or "127.0.0.1"
+METRICS_PORT: int = _int_env("METRICS_PORT", 0)
+
+# Per-mode and per-room overrides, 'key:idle/hard' seconds, e.g.
+# CLI_MODE_TIMEOUTS="strict:60/600" or CLI_ROOM_TIMEOUTS="roomId:/7200".
+# A room override beats a mode override beats the defaults above.
+CLI_MODE_TIMEOUTS = _parse_timeouts("CLI_MODE_TIMEOUTS", os.environ.get("CLI_MODE_TIMEOUTS", ""))
+CLI_ROOM_TIMEOUTS = _parse_timeouts("CLI_ROOM_TIMEOUTS", os.environ.get("CLI_ROOM_TIMEOUTS", ""))
+
+
+def turn_timeouts(room_id: str, mode: str) -> tuple[int, int]:
+    """(idle, hard) timeout seconds for a turn in `room_id` under `mode`."""
+    idle, hard = CLI_IDLE_TIMEOUT_SECONDS, CLI_TIMEOUT_SECONDS
+    for override in (CLI_MODE_TIMEOUTS.get(mode), CLI_ROOM_TIMEOUTS.get(room_id)):
+        if override:
+            idle = override[0] or idle
+            hard = override[1] or hard
+    return idle, hard
+
+
+# Longest CLI stdout line held in memory. Longer lines the bot doesn't use
+# (e.g. big tool results) are skipped as they stream; longer wanted lines are
+# cut to this many bytes and only their tool calls are recovered.
+CLI_MAX_LINE_BYTES: int = _int_env("CLI_MAX_LINE_BYTES", 8 * 1024 * 1024)
+
+# Keep one `claude` process alive per active session (stream-json on stdin)
+# instead of spawning per turn; idle processes are reaped after the TTL.
+CLI_PERSISTENT_SESSIONS: bool = _bool_env("CLI_PERSISTENT_SESSIONS", False)
+CLI_SESSION_IDLE_TTL_SECONDS: int = _int_env("CLI_SESSION_IDLE_TTL_SECONDS", 600)
+
+# Pre-spawned persistent processes per (cwd, mode) waiting for a new session's
+# first turn (needs CLI_PERSISTENT_SESSIONS; 0 disables). Warm processes older
+# than the TTL are replaced.
+CLI_WARM_POOL_SIZE: int = _int_env("CLI_WARM_POOL_SIZE", 0)
+CLI_WARM_POOL_TTL_SECONDS: int = _int_env("CLI_WARM_POOL_TTL_SECONDS", 900)
+
+# At most this many claude turns run at once across all rooms (0 = no cap).
+# Beyond the first, a turn also waits while MemAvailable is below
+# CLI_MIN_AVAILABLE_MB or the 1-minute load per CPU is above
+# CLI_MAX_LOAD_PER_CPU (read from /proc; 0 disables either check).
+CLI_MAX_CONCURRENT: int = _int_env("CLI_MAX_CONCURRENT", 4)
+CLI_MIN_AVAILABLE_MB: int = _int_env("CLI_MIN_AVAILABLE_MB", 512)
+CLI_MAX_LOAD_PER_CPU: float = _float_env("CLI_MAX_LOAD_PER_CPU", 2.0)
+
+# Per-turn model routing (see model_routing.py). CLI_MODEL_ROUTES is a JSON
+# list of rules, inline or a file path; "/fast ..." and "/deep ..." prompts
+# use the fast/deep models. Empty model = the CLI's default.
+CLI_MODEL_ROUTES: str = os.environ.get("CLI_MODEL_ROUTES", "")
+CLI_DEFAULT_MODEL: str = os.environ.get("CLI_DEFAULT_MODEL", "").strip()
+CLI_FAST_MODEL: str = os.environ.get("CLI_FAST_MODEL", "haiku").strip()
+CLI_DEEP_MODEL: str = os.environ.get("CLI_DEEP_MODEL", "opus").strip()
+CLI_DEEP_THINKING_TOKENS: int = _int_env("CLI_DEEP_THINKING_TOKENS", 16000)
+
+# A turn's reply is buffered in memory up to RESPONSE_SPOOL_BYTES, then in a
+# temp file. Replies over RESPONSE_ATTACH_BYTES are sent as one .md file
+# attachment instead of a long run of messages (0 = never attach).
+RESPONSE_SPOOL_BYTES: int = _int_env("RESPONSE_SPOOL_BYTES", 1024 * 1024)
+RESPONSE_ATTACH_BYTES: int = _int_env("RESPONSE_ATTACH_BYTES", 64 * 1024)
+
+# Before a turn on a session whose context is estimated above
+# SESSION_COMPACT_TOKENS (0 = never check), run `/compact` on it first, or
+# with SESSION_COMPACT_AUTO=false just suggest it in the reply.
+SESSION_COMPACT_TOKENS: int = _int_env("SESSION_COMPACT_TOKENS", 100_000)
+SESSION_COMPACT_AUTO: bool = _bool_env("SESSION_COMPACT_AUTO", True)
+
+# Stream Claude's answer into the reply as it is generated (partial messages),
+# editing at most once per STREAM_EDIT_INTERVAL_SECONDS per turn.
+STREAM_REPLIES: bool = _bool_env("STREAM_REPLIES", False)
+STREAM_EDIT_INTERVAL_SECONDS: float = _float_env("STREAM_EDIT_INTERVAL_SECONDS", 2.0)
+
 # room_id -> permission mode for group spaces. Unlisted spaces default to strict
 # (read-only) at the call site. See agent-platform-space-perms-spec.
 SPACE_MODES: dict[str, str] = _parse_space_modes(os.environ.get("SPACE_MODES", ""))
+
+# Webhook ingestion (optional). When WEBHOOK_URL is set the bot registers
+# messages:created webhooks pointing at it and serves them on
+# WEBHOOK_HOST:WEBHOOK_PORT; polling then runs only every
+# RECONCILE_INTERVAL_SECONDS as a safety net for missed deliveries.
+WEBHOOK_URL: str = os.environ.get("WEBHOOK_URL", "").strip()
+WEBHOOK_SECRET: str = os.environ.get("WEBHOOK_SECRET", "").strip()
+WEBHOOK_HOST: str = os.environ.get("WEBHOOK_HOST", "0.0.0.0").strip() or "0.0.0.0"
+WEBHOOK_PORT: int = _int_env("WEBHOOK_PORT", 8080)
+RECONCILE_INTERVAL_SECONDS: int = _int_env("RECONCILE_INTERVAL_SECONDS", 60)
+
+if WEBHOOK_URL and not WEBHOOK_SECRET:
+    print("Error: WEBHOOK_SECRET is required when WEBHOOK_URL is set.", file=sys.stderr)
+    sys.exit(1)
@@ -0,0 +1,142 @@
+"""Per-room poll cursors, persisted so restarts neither drop nor replay messages.
+
+Maps Webex room IDs to the newest message the poller has processed (id +
+created timestamp), plus a bounded list of recently dispatched message ids
+so a message delivered by webhook before the restart is not replayed by the
+catch-up after it. Writes are debounced: updates mark the store dirty and
+flush() persists at most once per flush interval (force=True on shutdown).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".claude" / "webex_poll_cursors.json"
+FLUSH_INTERVAL_SECONDS = 5.0
+RECENT_IDS_MAX = 2000
+
+
+@dataclass
+class Cursor:
+    message_id: str
+    created: str  # Webex ISO-8601, e.g. 2026-01-01T00:00:00.000Z
+
+
+class CursorStore:
+    """Persistent room_id -> Cursor map with debounced atomic writes."""
+
+    def __init__(self, path: Path = DEFAULT_PATH, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self._path = Path(path)
+        self._flush_interval = flush_interval
+        self._cursors: dict[str, Cursor] = {}
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._dirty = False
+        self._last_flush: float | None = None
+        self._load()
+
+    def _load(self):
+        if not self._path.exists():
+            return
+        try:
+            data = json.loads(self._path.read_text())
+            self._cursors = {
+                room_id: Cursor(message_id=c["id"], created=c.get("created", ""))
+                for room_id, c in data.get("rooms", {}).items()
+            }
+            self._recent = OrderedDict.fromkeys(data.get("recent", [])[-RECENT_IDS_MAX:])
+        except (json.JSONDecodeError, OSError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Failed to load poll cursors: %s", e)
+            self._cursors = {}
+            self._recent = OrderedDict()
+
+    def _save(self):
+        # Same atomic temp-file + os.replace pattern as SessionStore.
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "rooms": {room_id: {"id": c.message_id, "created": c.created} for room_id, c in self._cursors.items()},
+            "recent": list(self._recent),
+        }
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self._path)
+
+    def get(self, room_id: str) -> Cursor | None:
+        return self._cursors.get(room_id)
+
+    def advance(self, room_id: str, message: dict) -> None:
+        """Move the room's cursor to `message` (the newest one processed)."""
+        cursor = self._cursors.get(room_id)
+        if cursor is not None and cursor.message_id == message["id"]:
+            return
+        self._cursors[room_id] = Cursor(message_id=message["id"], created=message.get("created", ""))
+        self._dirty = True
+
+    def baseline(self, room_id: str, created: str) -> None:
+        """Give a room with no cursor one at `created`, without a message id.
+
+        Everything created after that timestamp counts as new (see
+        messages_after), so a room can be tracked without fetching it.
+        """
+        if room_id in self._cursors:
+            return
+        self._cursors[room_id] = Cursor(message_id="", created=created)
+        self._dirty = True
+
+    def prune(self, keep: set[str]) -> None:
+        """Drop cursors for rooms the bot is no longer in."""
+        stale = [room_id for room_id in self._cursors if room_id not in keep]
+        for room_id in stale:
+            del self._cursors[room_id]
+        if stale:
+            self._dirty = True
+
+    def claim(self, message_id: str) -> bool:
+        """Return True the first time a message id is dispatched, False afterwards."""
+        if message_id in self._recent:
+            return False
+        self._recent[message_id] = None
+        if len(self._recent) > RECENT_IDS_MAX:
+            self._recent.popitem(last=False)
+        self._dirty = True
+        return True
+
+    def flush(self, force: bool = False) -> None:
+        """Persist pending changes if the flush interval has passed (or force)."""
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and self._last_flush is not None and now - self._last_flush < self._flush_interval:
+            return
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning("Failed to save poll cursors: %s", e)
+            return
+        self._dirty = False
+        self._last_flush = now
+
+
+def messages_after(messages: list[dict], cursor: Cursor) -> list[dict]:
+    """Messages newer than the cursor, oldest first.
+
+    `messages` is a newest-first page. Stops at the cursor's id, or at the
+    first message not newer than the cursor's timestamp (covers a cursor
+    message that has since been deleted).
+    """
+    newer: list[dict] = []
+    for msg in messages:
+        if msg["id"] == cursor.message_id:
+            break
+        created = msg.get("created", "")
+        if cursor.created and created and created <= cursor.created:
+            break
+        newer.append(msg)
+    newer.reverse()
+    return newer
@@ -0,0 +1,124 @@
+"""Event-driven idle/hard deadlines for CLI turns.
+
+One DeadlineScheduler per event loop keeps every running turn in a heap and
+arms a single loop timer for the earliest entry, so nothing wakes up until a
+deadline is actually due. touch() only records the time; when a turn's heap
+entry comes due and it has seen activity since, the entry is pushed back to
+its new deadline instead of firing (lazy re-arm, O(1) per stream event).
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from typing import Callable
+
+IDLE = "idle"
+HARD = "hard"
+
+
+class Deadline:
+    """Idle + hard deadline for one turn. Create via DeadlineScheduler.start()."""
+
+    def __init__(
+        self, scheduler: DeadlineScheduler, idle: float, hard: float, on_expire: Callable[[str], None],
+    ) -> None:
+        self._scheduler = scheduler
+        now = scheduler.time()
+        self.idle = idle
+        self.hard = hard
+        self.started = now
+        self.last_activity = now
+        self.touched = False
+        self.expired: str | None = None  # IDLE or HARD once fired
+        self.cancelled = False
+        self._on_expire = on_expire
+
+    def touch(self) -> None:
+        self.last_activity = self._scheduler.time()
+        self.touched = True
+
+    def due(self) -> tuple[float, str]:
+        """(loop time, kind) of whichever deadline comes first."""
+        idle_at = self.last_activity + self.idle
+        hard_at = self.started + self.hard
+        return (idle_at, IDLE) if idle_at < hard_at else (hard_at, HARD)
+
+    def remaining(self) -> float:
+        """Seconds until this turn times out (0 once expired or cancelled)."""
+        if self.expired or self.cancelled:
+            return 0.0
+        return max(self.due()[0] - self._scheduler.time(), 0.0)
+
+    def cancel(self) -> None:
+        """Stop tracking (turn finished); the heap entry is dropped lazily."""
+        self.cancelled = True
+
+    def _fire(self, kind: str) -> None:
+        self.expired = kind
+        self._on_expire(kind)
+
+
+class DeadlineScheduler:
+    """Heap of turn deadlines driven by one loop.call_at timer."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Deadline]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_at = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __len__(self) -> int:
+        return sum(1 for _, _, d in self._heap if not d.cancelled and not d.expired)
+
+    @staticmethod
+    def time() -> float:
+        return asyncio.get_running_loop().time()
+
+    def start(self, idle: float, hard: float, on_expire: Callable[[str], None]) -> Deadline:
+        """Track a new turn; on_expire(IDLE|HARD) is called once, exactly when due."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new loop (e.g. asyncio.run again): old entries can never fire.
+            self._heap.clear()
+            self._timer = None
+            self._loop = loop
+        deadline = Deadline(self, idle, hard, on_expire)
+        self._push(deadline)
+        return deadline
+
+    def _push(self, deadline: Deadline) -> None:
+        when, _ = deadline.due()
+        heapq.heappush(self._heap, (when, next(self._seq), deadline))
+        if self._timer is None or when < self._timer_at:
+            self._arm()
+
+    def _arm(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._heap and (self._heap[0][2].cancelled or self._heap[0][2].expired):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        self._timer_at = self._heap[0][0]
+        self._timer = self._loop.call_at(self._timer_at, self._run)
+
+    def _run(self) -> None:
+        self._timer = None
+        now = self.time()
+        requeue: list[Deadline] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, deadline = heapq.heappop(self._heap)
+            if deadline.cancelled or deadline.expired:
+                continue
+            when, kind = deadline.due()
+            if when <= now:
+                deadline._fire(kind)
+            else:
+                requeue.append(deadline)  # touched since it was queued
+        for deadline in requeue:
+            when, _ = deadline.due()
+            heapq.heappush(self._heap, (when, next(self._seq), deadline))
+        self._arm()
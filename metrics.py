@@ -0,0 +1,22 @@
+"""In-process counters for operational events (no I/O).
+
+Counters are bumped from hot paths with incr() and read back as a plain
+dict with snapshot(); callers decide whether to log or expose them.
+"""
+from __future__ import annotations
+
+from collections import Counter
+
+_counters: Counter[str] = Counter()
+
+
+def incr(name: str, value: int = 1) -> None:
+    _counters[name] += value
+
+
+def get(name: str) -> int:
+    return _counters[name]
+
+
+def snapshot() -> dict[str, int]:
+    return dict(_counters)
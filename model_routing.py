@@ -0,0 +1,158 @@
+"""Per-turn model routing: which model (and thinking budget) a turn runs on.
+
+A ModelRouter is built once at startup from CLI_MODEL_ROUTES, a JSON list
+of rules (inline, or the path of a JSON file). The first rule whose
+conditions all hold picks the route; a turn no rule matches runs on the
+default route. A rule looks like:
+
+    {"name": "quick", "model": "haiku", "modes": ["strict"], "max_chars": 200}
+
+Conditions (all optional): "rooms" (room ids), "modes" (permission modes),
+"min_chars" / "max_chars" (prompt length), "pattern" (regex searched in the
+prompt, case-insensitive). Route fields: "model", "fallback_model" and
+"thinking_tokens" (MAX_THINKING_TOKENS for the turn; 0 leaves it unset).
+
+A prompt starting with /fast or /deep skips the rules and takes that route;
+the prefix is removed before the prompt goes to Claude.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    model: str = ""  # "" = the CLI's default model
+    fallback_model: str = ""
+    thinking_tokens: int = 0  # 0 = the CLI's default budget
+
+    def cli_args(self) -> list[str]:
+        args: list[str] = []
+        if self.model:
+            args.extend(["--model", self.model])
+        if self.fallback_model:
+            args.extend(["--fallback-model", self.fallback_model])
+        if self.thinking_tokens:
+            settings = {"env": {"MAX_THINKING_TOKENS": str(self.thinking_tokens)}}
+            args.extend(["--settings", json.dumps(settings)])
+        return args
+
+
+DEFAULT_ROUTE = Route("default")
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    route: Route
+    rooms: frozenset[str] = frozenset()  # empty = any room
+    modes: frozenset[str] = frozenset()  # empty = any mode
+    min_chars: int = 0
+    max_chars: int = 0  # 0 = no limit
+    pattern: re.Pattern | None = None
+
+    def matches(self, text: str, room_id: str, mode: str) -> bool:
+        if self.rooms and room_id not in self.rooms:
+            return False
+        if self.modes and mode not in self.modes:
+            return False
+        if len(text) < self.min_chars or (self.max_chars and len(text) > self.max_chars):
+            return False
+        return self.pattern is None or self.pattern.search(text) is not None
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    route: Route
+    text: str  # the prompt, without a /fast or /deep prefix
+    reason: str  # what picked the route, for the log
+
+
+def _str_set(value: object) -> frozenset[str]:
+    if isinstance(value, str):
+        return frozenset([value])
+    return frozenset(str(v) for v in value or ())
+
+
+def _compile_rule(index: int, raw: dict) -> RouteRule:
+    route = Route(
+        name=str(raw.get("name") or f"rule{index}"),
+        model=str(raw.get("model") or ""),
+        fallback_model=str(raw.get("fallback_model") or ""),
+        thinking_tokens=int(raw.get("thinking_tokens") or 0),
+    )
+    pattern = raw.get("pattern")
+    return RouteRule(
+        route=route,
+        rooms=_str_set(raw.get("rooms")),
+        modes=_str_set(raw.get("modes")),
+        min_chars=int(raw.get("min_chars") or 0),
+        max_chars=int(raw.get("max_chars") or 0),
+        pattern=re.compile(pattern, re.IGNORECASE) if pattern else None,
+    )
+
+
+def parse_rules(raw: str) -> list[RouteRule]:
+    """Compile CLI_MODEL_ROUTES: inline JSON, or the path of a JSON file.
+
+    Blank -> []. Invalid rules are skipped with a warning, like the other
+    list-valued settings in config.py.
+    """
+    raw = raw.strip()
+    if not raw:
+        return []
+    try:
+        if not raw.startswith("["):
+            raw = Path(raw).expanduser().read_text(encoding="utf-8")
+        entries = json.loads(raw)
+    except (OSError, ValueError) as e:
+        print(f"Warning: CLI_MODEL_ROUTES could not be read ({e}); routing disabled.", file=sys.stderr)
+        return []
+    if not isinstance(entries, list):
+        print("Warning: CLI_MODEL_ROUTES must be a JSON list of rules; routing disabled.", file=sys.stderr)
+        return []
+
+    rules: list[RouteRule] = []
+    for index, entry in enumerate(entries, 1):
+        try:
+            if not isinstance(entry, dict):
+                raise TypeError("not an object")
+            rules.append(_compile_rule(index, entry))
+        except (TypeError, ValueError, re.error) as e:
+            print(f"Warning: CLI_MODEL_ROUTES rule {index} skipped: {e}", file=sys.stderr)
+    return rules
+
+
+@dataclass
+class ModelRouter:
+    rules: list[RouteRule] = field(default_factory=list)
+    prefixes: dict[str, Route] = field(default_factory=dict)  # "/fast" -> Route
+    default: Route = DEFAULT_ROUTE
+
+    def route(self, text: str, room_id: str, mode: str) -> RouteDecision:
+        """decide(), logged: call once per turn."""
+        decision = self.decide(text, room_id, mode)
+        logger.info(
+            "Route %s (%s) model=%s room=%s mode=%s chars=%d",
+            decision.route.name, decision.reason, decision.route.model or "default",
+            room_id[:12], mode, len(decision.text),
+        )
+        return decision
+
+    def decide(self, text: str, room_id: str, mode: str) -> RouteDecision:
+        stripped = text.strip()
+        parts = stripped.split(None, 1)
+        if parts and parts[0].lower() in self.prefixes:
+            prefix = parts[0].lower()
+            return RouteDecision(self.prefixes[prefix], parts[1] if len(parts) > 1 else "", f"prefix {prefix}")
+        for rule in self.rules:
+            if rule.matches(stripped, room_id, mode):
+                return RouteDecision(rule.route, text, f"rule {rule.route.name}")
+        return RouteDecision(self.default, text, "no rule matched")
@@ -0,0 +1,115 @@
+"""Activity-aware per-room poll scheduling (no I/O, unit-tested).
+
+RoomActivityIndex remembers each room's `lastActivity` from the room listing;
+a room whose value has not moved since its last fetch has nothing new and is
+skipped outright.
+
+PollScheduler covers rooms the listing gives no usable `lastActivity` for.
+Each gets its own poll interval: a room that just had traffic is polled every
+cycle; each empty poll stretches its interval by DECAY up to the configured
+maximum, and a newer `lastActivity` promotes it straight back.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+DECAY = 2.0
+# A never-seen room idle for N seconds starts at N * AGE_FACTOR (clamped).
+AGE_FACTOR = 0.1
+
+
+def parse_webex_time(value: str) -> float | None:
+    """Parse a Webex ISO-8601 timestamp ('2026-01-01T00:00:00.000Z') to epoch seconds."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class RoomActivityIndex:
+    """room_id -> lastActivity as of the room's last successful fetch."""
+
+    def __init__(self) -> None:
+        self._seen: dict[str, str] = {}
+
+    def changed(self, room_id: str, last_activity: str) -> bool:
+        """True if the room is new or its lastActivity moved since mark()."""
+        return self._seen.get(room_id) != last_activity
+
+    def mark(self, room_id: str, last_activity: str) -> None:
+        """Record lastActivity once the room's messages have been fetched."""
+        self._seen[room_id] = last_activity
+
+    def forget(self, keep: set[str]) -> None:
+        for room_id in [r for r in self._seen if r not in keep]:
+            del self._seen[room_id]
+
+
+@dataclass
+class _RoomSchedule:
+    interval: float
+    next_due: float
+    last_activity: str = ""
+
+
+class PollScheduler:
+    """Tracks when each room is next due for a message fetch.
+
+    `now` arguments are monotonic seconds; `wall_now` is epoch seconds used
+    only to age a room's lastActivity on first sight.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self._rooms: dict[str, _RoomSchedule] = {}
+
+    def observe(self, room_id: str, last_activity: str, now: float, wall_now: float) -> None:
+        """Feed a room's lastActivity from the room listing."""
+        room = self._rooms.get(room_id)
+        if room is None:
+            activity = parse_webex_time(last_activity)
+            age = max(wall_now - activity, 0.0) if activity is not None else 0.0
+            # First sight is always due now so the caller can baseline it.
+            self._rooms[room_id] = _RoomSchedule(
+                interval=self._clamp(age * AGE_FACTOR), next_due=now, last_activity=last_activity,
+            )
+            return
+        # ISO-8601 strings in the same format order lexicographically.
+        if last_activity and last_activity > room.last_activity:
+            room.last_activity = last_activity
+            room.interval = self.min_interval
+            room.next_due = now
+
+    def due(self, room_id: str, now: float) -> bool:
+        room = self._rooms.get(room_id)
+        return room is None or now >= room.next_due
+
+    def record(self, room_id: str, had_new: bool, now: float) -> None:
+        """Update a room's interval after fetching it."""
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = _RoomSchedule(interval=self.min_interval, next_due=now)
+        if had_new:
+            room.interval = self.min_interval
+        else:
+            room.interval = self._clamp(room.interval * DECAY)
+        room.next_due = now + room.interval
+
+    def interval(self, room_id: str) -> float | None:
+        room = self._rooms.get(room_id)
+        return room.interval if room is not None else None
+
+    def forget(self, keep: set[str]) -> None:
+        """Drop schedules for rooms no longer listed."""
+        for room_id in [r for r in self._rooms if r not in keep]:
+            del self._rooms[room_id]
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.min_interval), self.max_interval)
@@ -0,0 +1,139 @@
+"""Process-tree ownership for CLI turns.
+
+Every `claude` process is started in its own session (start_new_session), so
+it leads a process group holding everything it spawns: shells, test runners,
+dev servers. kill_tree() signals that whole group, SIGTERM first and SIGKILL
+after a grace period, instead of just the direct child.
+
+Anything that escapes the group (a tool that puts its own children in a new
+group) still carries the session id. OrphanReaper remembers the session of
+every CLI process it is told about and, once that process has exited, kills
+whatever is still running in its session, reporting the CPU time and RSS it
+took back.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+from dataclasses import dataclass
+from pathlib import Path
+
+import metrics
+from procfs import PROC, ProcStat, list_processes
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED = hasattr(os, "killpg")
+
+
+def spawn_kwargs() -> dict:
+    """Extra create_subprocess_exec arguments giving the child its own group."""
+    return {"start_new_session": True} if SUPPORTED else {}
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    """Signal a process group; False if it no longer exists."""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        logger.warning("Not allowed to signal process group %d", pgid)
+        return False
+
+
+async def kill_tree(process: asyncio.subprocess.Process, grace: float) -> None:
+    """Stop `process` and everything in its process group: SIGTERM, wait up
+    to `grace` seconds for the leader, then SIGKILL whatever is left."""
+    if not SUPPORTED:
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+    else:
+        # The leader's pid is the group id (start_new_session).
+        if process.returncode is None and _signal_group(process.pid, signal.SIGTERM):
+            try:
+                await asyncio.wait_for(process.wait(), timeout=grace)
+            except asyncio.TimeoutError:
+                pass
+        _signal_group(process.pid, signal.SIGKILL)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=5.0)
+    except asyncio.TimeoutError:
+        pass
+
+
+@dataclass
+class ReapReport:
+    killed: int = 0
+    cpu_seconds: float = 0.0  # CPU time the killed processes had used
+    rss_mb: float = 0.0  # resident memory they held
+
+
+class OrphanReaper:
+    """Finds and kills leftover descendants of CLI processes that have exited."""
+
+    def __init__(self, grace: float, proc: Path = PROC) -> None:
+        self._grace = grace
+        self._proc = proc
+        self._sessions: dict[int, asyncio.subprocess.Process] = {}  # session id -> leader
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def track(self, process: asyncio.subprocess.Process) -> None:
+        if SUPPORTED:
+            self._sessions[process.pid] = process
+
+    def orphans(self) -> list[ProcStat]:
+        """Live processes in the session of a tracked leader that has exited."""
+        finished = {sid for sid, leader in self._sessions.items() if leader.returncode is not None}
+        if not finished:
+            return []
+        own = os.getpid()
+        return [
+            p for p in list_processes(self._proc)
+            if p.session in finished and p.pid != p.session and p.pid != own and p.state not in ("Z", "X")
+        ]
+
+    async def reap(self) -> ReapReport:
+        """Kill orphans (SIGTERM, then SIGKILL after the grace period) and
+        forget sessions that have nothing left running."""
+        found = self.orphans()
+        report = ReapReport()
+        for p in found:
+            self._signal(p.pid, signal.SIGTERM)
+        if found:
+            await asyncio.sleep(self._grace)
+        for p in found:
+            self._signal(p.pid, signal.SIGKILL)
+            report.killed += 1
+            report.cpu_seconds += p.cpu_seconds
+            report.rss_mb += p.rss_mb
+
+        still_used = {p.session for p in found}
+        for sid, leader in list(self._sessions.items()):
+            if leader.returncode is not None and sid not in still_used:
+                del self._sessions[sid]
+
+        if report.killed:
+            logger.warning(
+                "Reaped %d orphaned CLI descendant(s): %.1fs CPU used, %.0f MB RSS reclaimed",
+                report.killed, report.cpu_seconds, report.rss_mb,
+            )
+            metrics.incr("cli.orphans_reaped", report.killed)
+            metrics.incr("cli.orphan_rss_reclaimed_mb", round(report.rss_mb))
+            metrics.incr("cli.orphan_cpu_seconds", round(report.cpu_seconds))
+        return report
+
+    @staticmethod
+    def _signal(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
@@ -0,0 +1,115 @@
+"""Host and process readings from /proc (Linux only, no other dependencies).
+
+Readers return None (or []) when /proc (or the field) is unavailable, e.g. on
+macOS, so callers can treat the reading as "unknown" and skip whatever it gates.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+PROC = Path("/proc")
+
+
+@dataclass
+class HostLoad:
+    mem_available_mb: float | None
+    load1: float | None
+    cpus: int
+
+    @property
+    def load_per_cpu(self) -> float | None:
+        return self.load1 / self.cpus if self.load1 is not None else None
+
+
+def read_mem_available_mb(proc: Path = PROC) -> float | None:
+    """MemAvailable from /proc/meminfo, in MiB."""
+    try:
+        with open(proc / "meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024  # kB
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def read_load1(proc: Path = PROC) -> float | None:
+    """1-minute load average from /proc/loadavg."""
+    try:
+        return float((proc / "loadavg").read_text().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_host_load(proc: Path = PROC) -> HostLoad | None:
+    mem = read_mem_available_mb(proc)
+    load1 = read_load1(proc)
+    if mem is None and load1 is None:
+        return None
+    return HostLoad(mem_available_mb=mem, load1=load1, cpus=os.cpu_count() or 1)
+
+
+@dataclass
+class ProcStat:
+    pid: int
+    ppid: int
+    pgrp: int
+    session: int
+    state: str
+    cpu_seconds: float  # user + system time used so far
+    rss_mb: float
+    children_cpu_seconds: float = 0.0  # CPU of exited children it has waited for
+
+
+def _sysconf(name: str, default: int) -> int:
+    try:
+        return os.sysconf(name)
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+_CLK_TCK = _sysconf("SC_CLK_TCK", 100)
+_PAGE_SIZE = _sysconf("SC_PAGE_SIZE", 4096)
+
+
+def read_proc_stat(pid: int, proc: Path = PROC) -> ProcStat | None:
+    """One process's /proc/<pid>/stat (None if it's gone or unreadable)."""
+    try:
+        raw = (proc / str(pid) / "stat").read_text()
+        # comm (field 2) may contain spaces and parens; the rest follows the last ")".
+        fields = raw[raw.rindex(")") + 2:].split()
+        return ProcStat(
+            pid=pid,
+            ppid=int(fields[1]),
+            pgrp=int(fields[2]),
+            session=int(fields[3]),
+            state=fields[0],
+            cpu_seconds=(int(fields[11]) + int(fields[12])) / _CLK_TCK,
+            rss_mb=int(fields[21]) * _PAGE_SIZE / (1024 * 1024),
+            children_cpu_seconds=(int(fields[13]) + int(fields[14])) / _CLK_TCK,
+        )
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def list_processes(proc: Path = PROC) -> list[ProcStat]:
+    """Every process in /proc ([] where there is no /proc)."""
+    try:
+        pids = [int(entry.name) for entry in proc.iterdir() if entry.name.isdigit()]
+    except OSError:
+        return []
+    return [stat for stat in (read_proc_stat(pid, proc) for pid in pids) if stat is not None]
+
+
+def read_peak_rss_mb(pid: int, proc: Path = PROC) -> float | None:
+    """VmHWM (peak resident set over the process's life) from /proc/<pid>/status."""
+    try:
+        with open(proc / str(pid) / "status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # kB
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
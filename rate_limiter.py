@@ -0,0 +1,95 @@
+"""Shared, priority-aware token bucket for Webex API calls.
+
+Every request takes a token first. When tokens run out, waiters are served in
+priority order (user-visible replies, then polling, then cosmetic "Thinking..."
+edits), FIFO within a priority. A 429 from any call puts everyone on hold for
+its Retry-After, instead of each caller discovering the limit on its own.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    REPLY = 0
+    POLL = 1
+    COSMETIC = 2
+
+
+class RateLimiter:
+    """Token bucket refilled at `rate` tokens/s up to `burst`. rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._hold_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task[None] | None = None
+
+    def hold(self, seconds: float) -> float:
+        """Pause all callers for `seconds` (extends, never shortens, a hold).
+
+        Returns the hold deadline; the caller that already slept it out passes
+        it back to acquire() as `waited_until` so it isn't held twice.
+        """
+        self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+        return self._hold_until
+
+    def congested(self) -> bool:
+        """True when a call made now would have to wait."""
+        if not self.enabled:
+            return False
+        self._refill()
+        return bool(self._waiters) or self._tokens < 1 or time.monotonic() < self._hold_until
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, priority: Priority = Priority.REPLY, waited_until: float = 0.0) -> None:
+        """Wait for a token (and any global hold) in priority order."""
+        if not self.enabled:
+            return
+        if not self._waiters and self._try_take(waited_until):
+            return
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+        await fut
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, waited_until: float = 0.0) -> bool:
+        if time.monotonic() < self._hold_until and self._hold_until > waited_until:
+            return False
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _run_pump(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].done():  # cancelled waiter
+                heapq.heappop(self._waiters)
+                continue
+            if self._try_take():
+                _, _, fut = heapq.heappop(self._waiters)
+                fut.set_result(None)
+                continue
+            self._refill()
+            token_wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            hold_wait = self._hold_until - time.monotonic()
+            await asyncio.sleep(max(token_wait, hold_wait, 0.001))
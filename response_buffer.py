@@ -0,0 +1,131 @@
+"""Spooled accumulation of a turn's reply text.
+
+ResponseBuffer keeps the text in memory until it passes `spool_bytes`, then
+moves it to an anonymous temp file, so a huge answer (or several at once)
+doesn't sit in the bot's heap. chunks() reads it back in message-sized
+pieces, split exactly like bot.split_message but without ever loading the
+whole text.
+"""
+from __future__ import annotations
+
+import tempfile
+from typing import IO, Iterator
+
+DEFAULT_SPOOL_BYTES = 1024 * 1024
+
+
+def _char_boundary(data: bytes, limit: int) -> int:
+    """Largest cut <= limit that doesn't split a UTF-8 sequence in `data`."""
+    cut = min(limit, len(data))
+    while 0 < cut < len(data) and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return cut
+
+
+class ResponseBuffer:
+    def __init__(self, spool_bytes: int = DEFAULT_SPOOL_BYTES) -> None:
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes, mode="w+b")
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Size in UTF-8 bytes."""
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """True once the text has moved to disk."""
+        return bool(getattr(self._file, "_rolled", False))
+
+    def append(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._file.seek(0, 2)
+        self._file.write(data)
+        self._size += len(data)
+
+    def replace(self, text: str) -> None:
+        """Discard the contents and start over with `text`."""
+        self._file.seek(0)
+        self._file.truncate()
+        self._size = 0
+        self.append(text)
+
+    def getvalue(self) -> str:
+        self._file.seek(0)
+        return self._file.read().decode("utf-8", errors="replace")
+
+    def head(self, max_bytes: int) -> str:
+        """The first ~max_bytes of the text."""
+        self._file.seek(0)
+        data = self._file.read(max_bytes + 4)
+        return data[:_char_boundary(data, max_bytes)].decode("utf-8", errors="replace")
+
+    def tail(self, max_bytes: int) -> str:
+        """The last ~max_bytes of the text."""
+        start = max(self._size - max_bytes, 0)
+        self._file.seek(start)
+        data = self._file.read()
+        skip = 0
+        while skip < min(len(data), 3) and data[skip] & 0xC0 == 0x80:
+            skip += 1  # don't start mid-character
+        return data[skip:].decode("utf-8", errors="replace")
+
+    def fileobj(self) -> IO[bytes]:
+        """The underlying binary file, rewound (e.g. for an upload)."""
+        self._file.seek(0)
+        return self._file
+
+    def chunks(self, max_bytes: int) -> Iterator[str]:
+        """The text in pieces of at most max_bytes, split on newlines as
+        bot.split_message does; reads one line (or max_bytes) at a time."""
+        if self._size <= max_bytes:
+            yield self.getvalue()
+            return
+        current = b""
+        for segment, fragment in self._segments(max_bytes):
+            if fragment:
+                # Part of a line longer than max_bytes: always its own chunk.
+                if current:
+                    yield current.decode("utf-8", errors="replace")
+                    current = b""
+                yield segment.decode("utf-8", errors="replace")
+                continue
+            candidate = current + b"\n" + segment if current else segment
+            if len(candidate) > max_bytes:
+                if current:
+                    yield current.decode("utf-8", errors="replace")
+                current = segment
+            else:
+                current = candidate
+        if current:
+            yield current.decode("utf-8", errors="replace")
+
+    def _segments(self, max_bytes: int) -> Iterator[tuple[bytes, bool]]:
+        """(line without newline, False) or (<= max_bytes fragment of a longer line, True)."""
+        f = self._file
+        f.seek(0)
+        in_long_line = False
+        ended = False
+        while True:
+            piece = f.readline(max_bytes + 1)
+            if not piece:
+                if ended:
+                    yield b"", False  # text ends with a newline: an empty last line
+                return
+            ended = piece.endswith(b"\n")
+            body = piece[:-1] if ended else piece
+            if not in_long_line and len(body) <= max_bytes:
+                yield body, False
+                continue
+            # Hard-split a long line at character boundaries.
+            in_long_line = True
+            if len(body) > max_bytes:
+                cut = _char_boundary(body, max_bytes)
+                f.seek(cut - len(piece), 1)
+                body, ended = body[:cut], False
+            if body:
+                yield body, True
+            if ended:
+                in_long_line = False
+
+    def close(self) -> None:
+        self._file.close()
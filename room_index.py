@@ -0,0 +1,52 @@
+"""Full index of the rooms the bot belongs to (no I/O, unit-tested).
+
+`GET /rooms` pages are capped, and only the first page sorted by
+lastactivity is cheap enough to fetch every cycle. The index keeps every
+room from an occasional full paginated listing and folds the per-cycle
+first pages into it, so coverage extends past the 50 most recently active
+rooms without adding per-cycle API calls.
+"""
+from __future__ import annotations
+
+
+class RoomIndex:
+    """room_id -> room dict, refreshed fully every `full_refresh_seconds`."""
+
+    def __init__(self, full_refresh_seconds: float) -> None:
+        self._full_refresh_seconds = full_refresh_seconds
+        self._rooms: dict[str, dict] = {}
+        self._last_full: float | None = None
+
+    @property
+    def has_full_listing(self) -> bool:
+        """False until one full listing has been applied."""
+        return self._last_full is not None
+
+    def full_refresh_due(self, now: float) -> bool:
+        return self._last_full is None or now - self._last_full >= self._full_refresh_seconds
+
+    def replace(self, rooms: list[dict], now: float) -> tuple[list[dict], list[str]]:
+        """Apply a full listing. Returns (rooms not indexed before, ids dropped)."""
+        fresh = {room["id"]: room for room in rooms}
+        added = [room for room_id, room in fresh.items() if room_id not in self._rooms]
+        removed = [room_id for room_id in self._rooms if room_id not in fresh]
+        self._rooms = fresh
+        self._last_full = now
+        return added, removed
+
+    def merge(self, rooms: list[dict]) -> list[dict]:
+        """Fold in a partial listing (e.g. a first page). Returns newly seen rooms."""
+        added = [room for room in rooms if room["id"] not in self._rooms]
+        for room in rooms:
+            self._rooms[room["id"]] = room
+        return added
+
+    def rooms(self) -> list[dict]:
+        """Every indexed room, most recently active first."""
+        return sorted(self._rooms.values(), key=lambda r: r.get("lastActivity", ""), reverse=True)
+
+    def ids(self) -> set[str]:
+        return set(self._rooms)
+
+    def __len__(self) -> int:
+        return len(self._rooms)
@@ -0,0 +1,114 @@
+"""Partial-result salvage for turns that time out or are cancelled.
+
+TurnActivity records the tool calls a turn made (from its ToolUseEvents).
+When the turn is cut short, salvage() appends a notice and a summary of
+that activity (files changed and read, commands run) to whatever text the
+turn had already written, so the work isn't thrown away. follow_up_prompt()
+turns the same summary into a short message that asks Claude to resume on
+the same session instead of starting over (`/continue`).
+"""
+from __future__ import annotations
+
+from collections import Counter
+
+from response_buffer import ResponseBuffer
+
+_CHANGE_TOOLS = {"Write", "Edit"}
+_READ_TOOLS = {"Read"}
+_COMMAND_TOOLS = {"Bash"}
+MAX_LISTED = 10
+TAIL_BYTES = 600
+
+
+def _listing(items: list[str], code: bool = True) -> str:
+    shown = [f"`{i}`" if code else i for i in items[:MAX_LISTED]]
+    more = len(items) - MAX_LISTED
+    return ", ".join(shown) + (f" (+{more} more)" if more > 0 else "")
+
+
+def _unique(items: list[str]) -> list[str]:
+    return list(dict.fromkeys(i for i in items if i))
+
+
+class TurnActivity:
+    """Tool calls seen during one turn, in order."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []  # (tool name, input preview)
+        self.interrupted = ""  # why the turn was cut short, once salvaged
+        self.partial_tail = ""  # end of the text it had written by then
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def record(self, tool_name: str, preview: str) -> None:
+        self.calls.append((tool_name, preview))
+
+    def _previews(self, tools: set[str]) -> list[str]:
+        return _unique([p.replace("`", "'") for name, p in self.calls if name in tools])
+
+    @property
+    def files_changed(self) -> list[str]:
+        return self._previews(_CHANGE_TOOLS)
+
+    @property
+    def files_read(self) -> list[str]:
+        changed = set(self.files_changed)
+        return [f for f in self._previews(_READ_TOOLS) if f not in changed]
+
+    @property
+    def commands(self) -> list[str]:
+        return self._previews(_COMMAND_TOOLS)
+
+    def other_tools(self) -> Counter[str]:
+        known = _CHANGE_TOOLS | _READ_TOOLS | _COMMAND_TOOLS
+        return Counter(name for name, _ in self.calls if name not in known)
+
+    def summary_lines(self) -> list[str]:
+        lines: list[str] = []
+        if self.files_changed:
+            lines.append(f"- Changed: {_listing(self.files_changed)}")
+        if self.files_read:
+            lines.append(f"- Read: {_listing(self.files_read)}")
+        if self.commands:
+            lines.append(f"- Ran: {_listing(self.commands)}")
+        other = self.other_tools()
+        if other:
+            lines.append("- Other: " + _listing([f"{n} ×{c}" for n, c in other.most_common()], code=False))
+        return lines
+
+
+def salvage(response: ResponseBuffer, activity: TurnActivity | None, notice: str) -> bool:
+    """Append `notice` and the activity summary after the partial text in
+    `response`. Returns False (response untouched) if there is nothing to
+    salvage: no text written and no tools run."""
+    if not response and not activity:
+        return False
+    if activity is not None:
+        activity.interrupted = notice.removeprefix("Error: ").rstrip(".")
+        activity.partial_tail = response.tail(TAIL_BYTES)
+    out = ["\n\n---\n"] if response else []
+    out.append(notice + (" Partial output is above." if response else ""))
+    if activity:
+        out.append(f"\n\n**Done before it stopped** ({len(activity)} tool calls):\n")
+        out.append("\n".join(activity.summary_lines()))
+    out.append("\n\nSend `/continue` to pick up from here.")
+    response.append("".join(out))
+    return True
+
+
+def follow_up_prompt(activity: TurnActivity) -> str:
+    """A message asking Claude to resume a salvaged turn without redoing it."""
+    lines = [f"Your previous turn was interrupted ({activity.interrupted}) before you finished."]
+    summary = activity.summary_lines()
+    if summary:
+        lines.append("Work already done in that turn:")
+        lines.extend(summary)
+    if activity.partial_tail.strip():
+        lines.append("The last thing you wrote was:")
+        lines.extend("> " + line for line in activity.partial_tail.strip().splitlines())
+    lines.append(
+        "Continue from where you left off. Don't redo work that is already done; "
+        "check the current state of any changed files first if you need to."
+    )
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+"""Per-session leases so only one turn at a time runs on a Claude session.
+
+Two conversations can end up on the same session id (two rooms /resume it,
+or a DM and a space thread map to it); two `claude --resume` processes on one
+session would both append to its JSONL. SessionLeases serializes turns per
+session id: an asyncio lock per id covers this bot process, and an exclusive
+fcntl lock on `<lock_dir>/<session_id>.lock` covers other bot instances on
+the same host. A turn that has to wait is told why (on_wait) and queued
+until the holder finishes.
+
+The lock file also holds a generation counter, bumped whenever a lease is
+released. An instance that finds it moved since its own last lease knows
+another instance ran a turn on the session in between, even if that turn
+had finished long before, so its persistent process is out of date.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: in-process locking only
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_DIR = Path.home() / ".claude" / "webex_session_locks"
+POLL_SECONDS = 0.5  # retry interval while another instance holds the file lock
+
+# Why a turn is waiting, passed to on_wait.
+IN_PROCESS = "in_process"  # another conversation in this bot
+OTHER_INSTANCE = "other_instance"  # another bot instance on this host
+
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class _Entry:
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0  # holders + waiters, to know when the entry can go
+
+
+class SessionLeases:
+    def __init__(self, lock_dir: Path = DEFAULT_LOCK_DIR, poll_seconds: float = POLL_SECONDS) -> None:
+        self._lock_dir = Path(lock_dir)
+        self._poll = poll_seconds
+        self._entries: dict[str, _Entry] = {}
+        self._seen: dict[str, int] = {}  # session id -> generation we left it at
+
+    def busy(self, session_id: str) -> bool:
+        """True while a turn in this process holds the session."""
+        entry = self._entries.get(session_id)
+        return entry is not None and entry.lock.locked()
+
+    @asynccontextmanager
+    async def lease(
+        self, session_id: str, on_wait: Callable[[str], None] | None = None,
+    ) -> AsyncIterator[bool]:
+        """Hold the session for one turn. Yields True if another bot instance
+        has held it since this one last did (its turn changed the session
+        under us)."""
+        entry = self._entries.setdefault(session_id, _Entry())
+        entry.users += 1
+        try:
+            if entry.lock.locked() and on_wait:
+                on_wait(IN_PROCESS)
+            async with entry.lock:
+                fd, waited = await self._lock_file(session_id, on_wait)
+                generation = _read_generation(fd) if fd is not None else 0
+                seen = self._seen.get(session_id)
+                try:
+                    yield waited or (seen is not None and generation != seen)
+                finally:
+                    if fd is not None:
+                        try:
+                            _write_generation(fd, generation + 1)
+                            self._seen[session_id] = generation + 1
+                        except OSError as e:
+                            logger.warning("Could not update session lock %s: %s", session_id[:8], e)
+                            self._seen.pop(session_id, None)
+                        os.close(fd)  # releases the flock
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self._entries.pop(session_id, None)
+
+    def cleanup(self, max_age: float) -> int:
+        """Remove lock files of sessions nobody has leased for `max_age`
+        seconds (and nobody holds now); returns how many were removed."""
+        if fcntl is None:
+            return 0
+        now = time.time()
+        removed = 0
+        try:
+            paths = list(self._lock_dir.glob("*.lock"))
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                if now - path.stat().st_mtime <= max_age:
+                    continue
+                fd = os.open(path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                path.unlink()
+                removed += 1
+            except OSError:  # held (BlockingIOError) or already gone
+                pass
+            finally:
+                os.close(fd)
+        if removed:
+            self._seen = {sid: gen for sid, gen in self._seen.items() if self._lock_path(sid).exists()}
+            logger.info("Removed %d expired session lock file(s)", removed)
+        return removed
+
+    def _lock_path(self, session_id: str) -> Path:
+        return self._lock_dir / f"{_SAFE_ID.sub('_', session_id)}.lock"
+
+    async def _lock_file(
+        self, session_id: str, on_wait: Callable[[str], None] | None,
+    ) -> tuple[int | None, bool]:
+        if fcntl is None:
+            return None, False
+        path = self._lock_path(session_id)
+        waited = False
+        while True:
+            try:
+                self._lock_dir.mkdir(parents=True, exist_ok=True)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError as e:
+                logger.warning("Session lock file unavailable (%s); locking in-process only", e)
+                return None, False
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if not waited:
+                            waited = True
+                            logger.info("Session %s is in use by another bot instance; waiting", session_id[:8])
+                            if on_wait:
+                                on_wait(OTHER_INSTANCE)
+                        await asyncio.sleep(self._poll)
+            except BaseException:
+                os.close(fd)
+                raise
+            if _same_file(fd, path):
+                return fd, waited
+            os.close(fd)  # cleanup() removed the file while we waited: lock the new one
+
+
+def _same_file(fd: int, path: Path) -> bool:
+    try:
+        return os.fstat(fd).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+
+def _read_generation(fd: int) -> int:
+    try:
+        return int(os.pread(fd, 32, 0).strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_generation(fd: int, generation: int) -> None:
+    data = str(generation).encode()
+    os.pwrite(fd, data, 0)
+    os.ftruncate(fd, len(data))
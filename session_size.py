@@ -0,0 +1,128 @@
+"""Incremental size and context-token estimate for Claude session files.
+
+A long session makes every `--resume` slower: the CLI reloads the JSONL and
+sends everything after the last compaction back to the model. SessionSizes
+keeps, per session file, how far it has read, and on each measure() scans
+only the bytes appended since then (a complete line at a time).
+
+The token estimate is the context the model saw on the last assistant
+message (its `usage`: input + cache read + cache creation + output tokens),
+plus roughly one token per BYTES_PER_TOKEN bytes of whatever was written
+after it. A `compact_boundary` entry starts the count over; the file size
+keeps growing, since compaction appends rather than rewrites.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+BYTES_PER_TOKEN = 4
+READ_CHUNK_BYTES = 1024 * 1024
+
+_USAGE_FIELDS = ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens", "output_tokens")
+
+
+@dataclass
+class SessionSize:
+    path: Path
+    offset: int = 0  # bytes read so far (complete lines only)
+    inode: int = 0
+    context_tokens: int = 0  # from the last assistant usage since the last compaction
+    pending_bytes: int = 0  # bytes written after that usage
+    compactions: int = 0
+
+    @property
+    def file_bytes(self) -> int:
+        return self.offset
+
+    @property
+    def tokens(self) -> int:
+        return self.context_tokens + self.pending_bytes // BYTES_PER_TOKEN
+
+    def _reset(self, inode: int) -> None:
+        self.offset = 0
+        self.inode = inode
+        self.context_tokens = 0
+        self.pending_bytes = 0
+        self.compactions = 0
+
+    def _add_line(self, line: bytes) -> None:
+        # Most lines need no parsing; only compaction markers and assistant
+        # messages carrying usage change the estimate.
+        if b'"compact_boundary"' not in line and b'"usage"' not in line:
+            self.pending_bytes += len(line)
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            self.pending_bytes += len(line)
+            return
+        if entry.get("type") == "system" and entry.get("subtype") == "compact_boundary":
+            self.context_tokens = 0
+            self.pending_bytes = 0
+            self.compactions += 1
+            return
+        message = entry.get("message")
+        usage = message.get("usage") if isinstance(message, dict) else None
+        if entry.get("type") == "assistant" and isinstance(usage, dict):
+            self.context_tokens = sum(int(usage.get(f) or 0) for f in _USAGE_FIELDS)
+            self.pending_bytes = 0
+        else:
+            self.pending_bytes += len(line)
+
+
+def scan(size: SessionSize) -> SessionSize:
+    """Read what was appended to size.path since the last scan. A file that
+    was replaced or truncated is read again from the start."""
+    try:
+        st = os.stat(size.path)
+    except FileNotFoundError:
+        size._reset(0)
+        return size
+    if st.st_ino != size.inode or st.st_size < size.offset:
+        size._reset(st.st_ino)
+    if st.st_size == size.offset:
+        return size
+    with open(size.path, "rb") as f:
+        f.seek(size.offset)
+        carry = b""
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            lines = (carry + chunk).split(b"\n")
+            carry = lines.pop()  # incomplete last line: read it next time
+            for line in lines:
+                size.offset += len(line) + 1
+                if line.strip():
+                    size._add_line(line)
+    return size
+
+
+class SessionSizes:
+    """SessionSize per session file, for the `max_files` most recently measured."""
+
+    def __init__(self, max_files: int = 1000) -> None:
+        self._max_files = max_files
+        self._sizes: OrderedDict[Path, SessionSize] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def get(self, path: Path) -> SessionSize | None:
+        return self._sizes.get(Path(path))
+
+    async def measure(self, path: Path) -> SessionSize:
+        """Bring the estimate for `path` up to date (in a worker thread)."""
+        path = Path(path)
+        size = self._sizes.get(path)
+        if size is None:
+            size = self._sizes[path] = SessionSize(path)
+        self._sizes.move_to_end(path)
+        while len(self._sizes) > self._max_files:
+            self._sizes.popitem(last=False)
+        return await asyncio.to_thread(scan, size)
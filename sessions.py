@@ -34,6 +34,11 @@ def _find_session_file(session_id: str, project: str) -> Path | None:
     return None
 
 
+def session_file(session_id: str, cwd: str) -> Path | None:
+    """The JSONL of a session run in `cwd` (sessions are stored per directory)."""
+    return _find_session_file(session_id, cwd)
+
+
 def _extract_cwd(session_path: Path) -> str:
     """Read the session JSONL and extract the cwd from the first user message."""
     with open(session_path, encoding="utf-8") as f:
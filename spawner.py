@@ -0,0 +1,308 @@
+"""Spawn helper: a small process that starts CLI processes for the bot.
+
+Every direct spawn forks the bot itself, so the cost grows with the bot's
+address space, and on Python < 3.12 asyncio also starts a thread per child
+to wait for it. Instead, SpawnHelper starts this file as a separate, tiny
+Python process at boot with the environment already prepared for `claude`.
+Spawn requests go to it over a Unix socketpair (SOCK_SEQPACKET, one JSON
+message per request). The helper starts the child in its own session,
+passes its stdin/stdout pipes back with SCM_RIGHTS and reports its exit
+status when it ends. HelperProcess wraps those pipes in asyncio streams and
+stands in for asyncio.subprocess.Process.
+
+When the helper is unavailable (unsupported platform, not started, died,
+request too large), SpawnHelperError is raised and callers spawn directly.
+
+The helper side (serve) uses only the standard library and none of the
+bot's modules, so it stays small.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED = hasattr(socket, "SOCK_SEQPACKET") and hasattr(socket, "send_fds") and sys.platform.startswith("linux")
+MAX_MESSAGE_BYTES = 1024 * 1024
+SPAWN_TIMEOUT_SECONDS = 10.0
+WATCH_INTERVAL_SECONDS = 1.0  # liveness polling once the helper is gone
+
+
+class SpawnHelperError(Exception):
+    """The helper can't take this spawn; spawn directly instead."""
+
+
+# ---------------------------------------------------------------------------
+# Bot side
+# ---------------------------------------------------------------------------
+
+class HelperProcess:
+    """asyncio.subprocess.Process look-alike for a child started by the helper."""
+
+    def __init__(self, pid: int, stdin: asyncio.StreamWriter, stdout: asyncio.StreamReader) -> None:
+        self.pid = pid
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = None
+        self.returncode: int | None = None
+        self._exited = asyncio.Event()
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        assert self.returncode is not None
+        return self.returncode
+
+    def send_signal(self, sig: int) -> None:
+        if self.returncode is not None:
+            raise ProcessLookupError(self.pid)
+        os.kill(self.pid, sig)
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+    def _set_returncode(self, code: int) -> None:
+        if self.returncode is None:
+            self.returncode = code
+            self._exited.set()
+
+
+async def _pipe_streams(stdin_fd: int, stdout_fd: int) -> tuple[asyncio.StreamWriter, asyncio.StreamReader]:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(stdout_fd, "rb", 0))
+    transport, protocol = await loop.connect_write_pipe(
+        lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()), os.fdopen(stdin_fd, "wb", 0),
+    )
+    return asyncio.StreamWriter(transport, protocol, None, loop), reader
+
+
+class SpawnHelper:
+    """Client for the helper process; start() once, then spawn() per process."""
+
+    def __init__(self) -> None:
+        self._sock: socket.socket | None = None
+        self._helper: subprocess.Popen | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._children: dict[int, HelperProcess] = {}
+        self._early_exits: dict[int, int] = {}  # exit reported before spawn() built the process
+        self._watchers: set[asyncio.Task] = set()  # strong refs so they are not garbage-collected
+
+    @property
+    def running(self) -> bool:
+        return self._sock is not None and self._loop is asyncio.get_running_loop()
+
+    async def start(self, env: dict[str, str]) -> None:
+        """Start the helper; children it spawns get `env`."""
+        if not SUPPORTED:
+            raise SpawnHelperError("spawn helper needs Linux (SOCK_SEQPACKET + SCM_RIGHTS)")
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            self._helper = subprocess.Popen(
+                [sys.executable, "-S", os.path.abspath(__file__), str(theirs.fileno())],
+                pass_fds=[theirs.fileno()], env=env, stdin=subprocess.DEVNULL, cwd="/",
+            )
+        except OSError as e:
+            ours.close()
+            raise SpawnHelperError(f"could not start spawn helper: {e}") from e
+        finally:
+            theirs.close()
+        ours.setblocking(False)
+        self._sock = ours
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(ours.fileno(), self._on_readable)
+        logger.info("Spawn helper started (pid %d)", self._helper.pid)
+
+    async def spawn(self, argv: list[str], cwd: str) -> HelperProcess:
+        """Start argv in cwd (own session, stdin/stdout piped, stderr discarded).
+
+        OSError from the helper's spawn (e.g. FileNotFoundError) is re-raised
+        as-is; any problem reaching the helper raises SpawnHelperError.
+        """
+        if not self.running:
+            raise SpawnHelperError("spawn helper not running")
+        assert self._sock is not None and self._loop is not None
+        request_id = next(self._ids)
+        payload = json.dumps({"id": request_id, "argv": argv, "cwd": cwd}).encode()
+        if len(payload) > MAX_MESSAGE_BYTES:
+            raise SpawnHelperError("spawn request too large")
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        try:
+            self._sock.send(payload)
+            reply, fds = await asyncio.wait_for(future, SPAWN_TIMEOUT_SECONDS)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise SpawnHelperError(f"spawn helper request failed: {e!r}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+        if "error" in reply:
+            for fd in fds:
+                os.close(fd)
+            raise OSError(reply.get("errno") or 0, reply["error"])
+        if len(fds) != 2:
+            for fd in fds:
+                os.close(fd)
+            raise SpawnHelperError("spawn helper sent no pipes")
+        stdin, stdout = await _pipe_streams(*fds)
+        process = HelperProcess(reply["pid"], stdin, stdout)
+        if process.pid in self._early_exits:
+            process._set_returncode(self._early_exits.pop(process.pid))
+        else:
+            self._children[process.pid] = process
+        return process
+
+    def _on_readable(self) -> None:
+        assert self._sock is not None
+        while True:
+            try:
+                data, fds, _flags, _addr = socket.recv_fds(self._sock, MAX_MESSAGE_BYTES, 2)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self._lost(f"socket error: {e}")
+                return
+            if not data:
+                self._lost("helper exited")
+                return
+            message = json.loads(data)
+            if "exit" in message:
+                process = self._children.pop(message["exit"], None)
+                if process is not None:
+                    process._set_returncode(message["code"])
+                else:
+                    self._early_exits[message["exit"]] = message["code"]
+                continue
+            future = self._pending.get(message.get("id"))
+            if future is None or future.done():
+                for fd in fds:
+                    os.close(fd)
+                continue
+            future.set_result((message, fds))
+
+    def _lost(self, reason: str) -> None:
+        """Helper gone: fail pending spawns and watch its children by pid."""
+        logger.warning("Spawn helper lost (%s); spawning directly from now on", reason)
+        self._detach()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        for process in self._children.values():
+            task = asyncio.ensure_future(_watch_pid(process))
+            self._watchers.add(task)
+            task.add_done_callback(self._watchers.discard)
+        self._children.clear()
+
+    def _detach(self) -> None:
+        if self._sock is not None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+
+    async def close(self) -> None:
+        """Stop the helper (children it started are left to their owners)."""
+        self._detach()
+        if self._helper is not None:
+            helper, self._helper = self._helper, None
+            try:
+                await asyncio.wait_for(asyncio.to_thread(helper.wait), timeout=5.0)
+            except asyncio.TimeoutError:
+                helper.kill()
+
+
+async def _watch_pid(process: HelperProcess) -> None:
+    """Exit status is lost with the helper: mark the process done (-1) once
+    it's gone or a zombie nobody has reaped yet."""
+    from procfs import read_proc_stat
+
+    while process.returncode is None:
+        try:
+            os.kill(process.pid, 0)
+        except ProcessLookupError:
+            process._set_returncode(-1)
+            return
+        except PermissionError:
+            pass
+        stat = read_proc_stat(process.pid)
+        if stat is not None and stat.state in ("Z", "X"):
+            process._set_returncode(-1)
+            return
+        await asyncio.sleep(WATCH_INTERVAL_SECONDS)
+
+
+# ---------------------------------------------------------------------------
+# Helper side
+# ---------------------------------------------------------------------------
+
+def _send(sock: socket.socket, message: dict, fds: list[int] | None = None) -> None:
+    data = json.dumps(message).encode()
+    if fds:
+        socket.send_fds(sock, [data], fds)
+    else:
+        sock.send(data)
+
+
+def _start_child(sock: socket.socket, request: dict, children: dict[int, subprocess.Popen]) -> None:
+    try:
+        child = subprocess.Popen(
+            request["argv"], cwd=request["cwd"], start_new_session=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+    except OSError as e:
+        _send(sock, {"id": request["id"], "error": str(e), "errno": e.errno})
+        return
+    children[child.pid] = child
+    assert child.stdin is not None and child.stdout is not None
+    _send(sock, {"id": request["id"], "pid": child.pid}, [child.stdin.fileno(), child.stdout.fileno()])
+    child.stdin.close()
+    child.stdout.close()
+
+
+def serve(fd: int) -> None:
+    """Helper main loop: spawn on request, report exits, stop when the bot hangs up."""
+    sock = socket.socket(fileno=fd)
+    children: dict[int, subprocess.Popen] = {}
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is the bot's to handle
+
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is sock:
+                data = sock.recv(MAX_MESSAGE_BYTES)
+                if not data:
+                    return
+                _start_child(sock, json.loads(data), children)
+            else:
+                os.read(wake_r, 4096)
+        for pid, child in list(children.items()):
+            code = child.poll()
+            if code is not None:
+                del children[pid]
+                _send(sock, {"exit": pid, "code": code})
+
+
+if __name__ == "__main__":
+    try:
+        serve(int(sys.argv[1]))
+    except (BrokenPipeError, ConnectionResetError, KeyboardInterrupt):
+        pass
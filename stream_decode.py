@@ -0,0 +1,327 @@
+"""Cheap, bounded decoding of `claude --output-format stream-json` lines.
+
+Most of the CLI's output is never shown: `user` lines echo tool results
+(often whole files), `system` lines carry setup chatter, and most
+`stream_event` lines are non-text deltas. decode_line() reads the event
+type from the start of the raw line and drops those lines without parsing
+them; only assistant messages, text deltas and results are decoded.
+Tool-input previews are built from at most PREVIEW_CHARS of the input, and
+an assistant line over SCAN_LINE_BYTES that carries tool calls is not
+parsed at all but scanned (see _scan_assistant), so a Write of a
+multi-megabyte file is never loaded into Python objects.
+
+LineReader splits stdout into lines of any length (asyncio's readline()
+gives up at 64 KiB) while holding at most max_line_bytes of one line:
+longer lines of unused types are discarded as they stream, longer wanted
+lines are cut to a prefix that decode_truncated() mines for text, tool
+calls and the result.
+
+JSON is parsed with orjson or msgspec when installed, else the stdlib.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Callable
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    _loads: Callable[[bytes], Any] = orjson.loads
+    BACKEND = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        _loads = msgspec.json.decode
+        BACKEND = "msgspec"
+    except ImportError:
+        _loads = json.loads
+        BACKEND = "json"
+
+# Invalid JSON / UTF-8 from any backend (orjson/json raise ValueError subclasses).
+_DECODE_ERRORS: tuple[type[Exception], ...] = (ValueError,)
+if BACKEND == "msgspec":
+    _DECODE_ERRORS += (msgspec.DecodeError,)
+
+PREVIEW_CHARS = 60
+SCAN_LINE_BYTES = 64 * 1024  # assistant lines with tool calls past this are scanned, not parsed
+
+# The CLI writes "type" first; anything else falls back to a full parse.
+_LEADING_TYPE = re.compile(rb'\s*\{\s*"type"\s*:\s*"([A-Za-z_]+)"')
+_WANTED = {"assistant", "result", "stream_event"}
+
+
+def line_type(line: bytes) -> str | None:
+    """Top-level event type read from the line prefix, or None if not leading."""
+    match = _LEADING_TYPE.match(line)
+    return match.group(1).decode() if match else None
+
+
+def is_wanted(line_prefix: bytes) -> bool:
+    """False only for lines decode_line is sure to skip."""
+    kind = line_type(line_prefix)
+    return kind is None or kind in _WANTED
+
+
+def decode_line(line: bytes, loads: Callable[[bytes], Any] = _loads) -> list[tuple]:
+    """Decode one stdout line into the items the bot uses, in order:
+
+    ("text", text), ("tool_use", name, id, preview), ("text_delta", text),
+    ("result", result_dict). Returns [] for anything else (or garbage).
+    """
+    kind = line_type(line)
+    if kind is not None and kind not in _WANTED:
+        return []
+    if kind == "stream_event" and b'"text_delta"' not in line:
+        return []
+    if kind == "assistant" and len(line) > SCAN_LINE_BYTES and _TOOL_USE_MARK.search(line):
+        return _scan_assistant(line)
+    try:
+        data = loads(line)
+    except _DECODE_ERRORS:
+        return []
+    if not isinstance(data, dict):
+        return []
+
+    kind = data.get("type", "")
+    if kind == "assistant":
+        items: list[tuple] = []
+        for block in data.get("message", {}).get("content", []):
+            block_type = block.get("type", "")
+            if block_type == "text":
+                items.append(("text", block.get("text", "")))
+            elif block_type == "tool_use":
+                name = block.get("name", "")
+                preview = tool_preview(name, block.get("input", {}))
+                items.append(("tool_use", name, block.get("id", ""), preview))
+        return items
+    if kind == "stream_event":
+        event = data.get("event", {})
+        delta = event.get("delta", {}) if event.get("type") == "content_block_delta" else {}
+        if delta.get("type") == "text_delta":
+            return [("text_delta", delta.get("text", ""))]
+        return []
+    if kind == "result":
+        return [("result", data)]
+    return []
+
+
+def tool_preview(tool_name: str, tool_input: dict) -> str:
+    """Generate a short preview of what a tool is doing."""
+    if tool_name == "Bash":
+        cmd = tool_input.get("command", "")
+        return cmd[:80] if cmd else ""
+    elif tool_name == "Read":
+        return tool_input.get("file_path", "")
+    elif tool_name == "Write" or tool_name == "Edit":
+        return tool_input.get("file_path", "")
+    elif tool_name == "Grep":
+        return tool_input.get("pattern", "")
+    return compact_json(tool_input, PREVIEW_CHARS) if tool_input else ""
+
+
+def compact_json(value: Any, limit: int) -> str:
+    """json.dumps(value)[:limit], serializing no more than about `limit` chars."""
+    out: list[str] = []
+    size = 0
+    for token in _tokens(value, limit):
+        out.append(token)
+        size += len(token)
+        if size >= limit:
+            break
+    return "".join(out)[:limit]
+
+
+def _tokens(value: Any, limit: int):
+    if isinstance(value, str):
+        yield json.dumps(value[:limit])
+    elif isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                yield ", "
+            yield json.dumps(str(key)[:limit]) + ": "
+            yield from _tokens(item, limit)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "["
+        for i, item in enumerate(value):
+            if i:
+                yield ", "
+            yield from _tokens(item, limit)
+        yield "]"
+    else:
+        yield json.dumps(value, default=str)
+
+
+# ---------------------------------------------------------------------------
+# Line reader
+# ---------------------------------------------------------------------------
+
+CHUNK_SIZE = 64 * 1024
+
+_TOOL_USE_MARK = re.compile(rb'"type"\s*:\s*"tool_use"')
+_TEXT_MARK = re.compile(rb'"type"\s*:\s*"text"\s*,\s*"text"\s*:\s*"')
+_RESULT_MARK = re.compile(rb'"result"\s*:\s*"')
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*')
+_NUMBER_FIELD = r'"{}"\s*:\s*(-?[0-9][0-9.eE+-]*)'
+TRUNCATED_NOTE = "\n\n_[Output truncated: too long to read in full.]_"
+_STRING_FIELD = r'"{}"\s*:\s*"((?:[^"\\]|\\.)*)"'
+_PREVIEW_KEYS = ("file_path", "command", "pattern")
+
+
+class LineReader:
+    """Async iterator of (line, truncated) from an asyncio StreamReader.
+
+    Reads in CHUNK_SIZE pieces into one reusable buffer. Lines up to
+    max_line_bytes come out whole with truncated=False. A longer line is
+    never held whole: an unwanted one (see is_wanted) is dropped entirely,
+    a wanted one is yielded as its first max_line_bytes with truncated=True.
+    """
+
+    def __init__(self, stream: asyncio.StreamReader, max_line_bytes: int, chunk_size: int = CHUNK_SIZE) -> None:
+        self._stream = stream
+        self.max_line_bytes = max(max_line_bytes, 1024)
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._scanned = 0  # bytes of _buf already searched for a newline
+
+    def __aiter__(self) -> LineReader:
+        return self
+
+    async def __anext__(self) -> tuple[bytes, bool]:
+        while True:
+            end = self._buf.find(b"\n", self._scanned)
+            if end != -1 and end < self.max_line_bytes:
+                line = bytes(self._buf[:end + 1])
+                del self._buf[:end + 1]
+                self._scanned = 0
+                return line, False
+            if end != -1 or len(self._buf) > self.max_line_bytes:
+                prefix = await self._skip_oversized()
+                if prefix is not None:
+                    return prefix, True
+                continue
+            self._scanned = len(self._buf)
+            chunk = await self._stream.read(self._chunk_size)
+            if not chunk:
+                if not self._buf:
+                    raise StopAsyncIteration
+                line = bytes(self._buf)
+                self._buf.clear()
+                self._scanned = 0
+                return line, False
+            self._buf += chunk
+
+    async def _skip_oversized(self) -> bytes | None:
+        """Drop the current over-limit line, reading on to its newline if needed."""
+        head = bytes(self._buf[:256])
+        wanted = is_wanted(head)
+        prefix = bytes(self._buf[:self.max_line_bytes]) if wanted else None
+        self._scanned = 0
+        end = self._buf.find(b"\n")
+        if end != -1:
+            dropped = end + 1
+            del self._buf[:end + 1]
+        else:
+            dropped = len(self._buf)
+            self._buf.clear()
+        while end == -1:
+            chunk = await self._stream.read(self._chunk_size)
+            if not chunk:
+                break
+            end = chunk.find(b"\n")
+            if end != -1:
+                dropped += end + 1
+                self._buf += chunk[end + 1:]
+                break
+            dropped += len(chunk)
+        logger.warning(
+            "CLI output line over %d bytes (%s, %d bytes): %s",
+            self.max_line_bytes, line_type(head) or "?", dropped, "truncated" if wanted else "skipped",
+        )
+        metrics.incr("cli.oversized_lines_truncated" if wanted else "cli.oversized_lines_skipped")
+        return prefix
+
+
+def decode_truncated(prefix: bytes) -> list[tuple]:
+    """Best-effort items from the start of an over-limit line.
+
+    From an assistant line: the text blocks (the one cut off ends with
+    TRUNCATED_NOTE) and tool calls (name, id and a file_path/command/pattern
+    preview found near each "tool_use" marker), in order. From a result
+    line: a result item holding the start of the answer plus the note, so
+    the turn still ends on it.
+    """
+    kind = line_type(prefix)
+    if kind == "result":
+        return [("result", _truncated_result(prefix))]
+    if kind not in (None, "assistant"):
+        return []
+    return _scan_assistant(prefix)
+
+
+def _scan_assistant(line: bytes) -> list[tuple]:
+    """decode_line's assistant items found by scanning the raw line: text
+    blocks are decoded, tool inputs are only looked into near their start.
+    Escaped quotes inside strings can't fake a marker."""
+    found: list[tuple[int, tuple]] = []
+    for mark in _TEXT_MARK.finditer(line):
+        text, complete = _string_at(line, mark.end())
+        found.append((mark.start(), ("text", text if complete else text + TRUNCATED_NOTE)))
+    for mark in _TOOL_USE_MARK.finditer(line):
+        window = line[max(mark.start() - 256, 0):mark.end() + 1024].decode("utf-8", errors="replace")
+        name = _string_field(window, "name")
+        if not name:
+            continue
+        preview = next((v for v in (_string_field(window, key) for key in _PREVIEW_KEYS) if v), "")
+        found.append((mark.start(), ("tool_use", name, _string_field(window, "id"), preview[:80])))
+    return [item for _, item in sorted(found, key=lambda f: f[0])]
+
+
+def _truncated_result(prefix: bytes) -> dict:
+    head = prefix[:1024].decode("utf-8", errors="replace")
+    data: dict[str, Any] = {"type": "result"}
+    for key in ("duration_ms", "total_cost_usd"):  # present if written before the answer
+        match = re.search(_NUMBER_FIELD.format(key), head)
+        if match:
+            try:
+                data[key] = json.loads(match.group(1))
+            except ValueError:
+                pass
+    mark = _RESULT_MARK.search(prefix)
+    text, _ = _string_at(prefix, mark.end()) if mark else ("", False)
+    data["result"] = text + TRUNCATED_NOTE
+    return data
+
+
+def _string_at(data: bytes, start: int) -> tuple[str, bool]:
+    """The JSON string whose body starts at data[start], up to its closing
+    quote or the end of data; and whether the closing quote was there."""
+    match = _STRING_BODY.match(data, start)
+    assert match is not None  # the pattern matches the empty string
+    complete = data[match.end():match.end() + 1] == b'"'
+    body = match.group(0).decode("utf-8", errors="ignore")  # a character cut in half is dropped
+    for cut in range(6):  # a \uXXXX escape cut in half
+        try:
+            return json.loads(f'"{body[:len(body) - cut]}"'), complete
+        except ValueError:
+            continue
+    return body, complete
+
+
+def _string_field(text: str, key: str) -> str:
+    match = re.search(_STRING_FIELD.format(key), text)
+    if not match:
+        return ""
+    try:
+        return json.loads(f'"{match.group(1)}"')
+    except ValueError:
+        return match.group(1)
@@ -0,0 +1,134 @@
+"""Progressive delivery of a turn's text into Webex messages.
+
+StreamingReply takes over the "Thinking..." message once Claude starts
+writing and re-renders the accumulated text into it at most once per
+interval. Text past the per-message byte limit rolls over into follow-up
+messages. Preview edits and rollover sends go out at COSMETIC priority and
+are skipped while the rate limiter is congested, so streaming never delays
+replies or polling.
+finish() then renders the final answer at REPLY priority, reusing the
+preview messages and deleting any it no longer needs.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+from claude_cli import StreamEvent, TextDeltaEvent, TextEvent
+from rate_limiter import Priority
+from webex_api import WebexAPI
+
+
+def _close_fence(text: str) -> str:
+    """Close a code block left open mid-stream so the preview renders."""
+    return text + "\n```" if text.count("```") % 2 else text
+
+
+class StreamingReply:
+    def __init__(
+        self,
+        api: WebexAPI,
+        room_id: str,
+        message_id: str,
+        split: Callable[[str], list[str]],
+        interval: float,
+        parent_id: str | None = None,
+    ) -> None:
+        self._api = api
+        self._room_id = room_id
+        self._parent_id = parent_id
+        self._split = split
+        self._interval = interval
+        self._blocks: list[str] = []
+        self._in_block = False  # deltas seen since the last complete TextEvent
+        self._message_ids: list[str] = [message_id]
+        self._rendered: list[str] = []  # content currently shown in each message
+        self._dirty = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._blocks)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(b for b in self._blocks if b)
+
+    def feed(self, event: StreamEvent) -> bool:
+        """Take a TextDeltaEvent/TextEvent. Returns True if the text changed."""
+        if isinstance(event, TextDeltaEvent):
+            if not self._in_block:
+                self._blocks.append("")
+                self._in_block = True
+            self._blocks[-1] += event.text
+        elif isinstance(event, TextEvent):
+            if self._in_block:
+                self._blocks[-1] = event.text  # authoritative full block
+                self._in_block = False
+            else:
+                self._blocks.append(event.text)  # no partial messages: whole block at once
+        else:
+            return False
+        self._dirty.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._dirty.wait()
+                started = time.monotonic()
+                if not self._api.limiter.congested():
+                    self._dirty.clear()
+                    await self._render(self._split(_close_fence(self.text)), Priority.COSMETIC)
+                await asyncio.sleep(max(self._interval - (time.monotonic() - started), 0))
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self) -> None:
+        """Stop preview edits (turn cancelled or failed); the preview stays."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def finish(self, final_text: str) -> None:
+        """Replace the preview with the final answer."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        chunks = self._split(final_text)
+        await self._render(chunks, Priority.REPLY)
+        for message_id in self._message_ids[len(chunks):]:
+            await self._api.delete_message(message_id)
+        del self._message_ids[len(chunks):]
+
+    async def _render(self, chunks: list[str], priority: Priority) -> None:
+        final = priority is Priority.REPLY
+        for i, chunk in enumerate(chunks):
+            if i < len(self._rendered) and self._rendered[i] == chunk:
+                continue
+            if i < len(self._message_ids):
+                result = await self._api.edit_message(self._message_ids[i], self._room_id, chunk, priority=priority)
+                if result is None:
+                    if not final:
+                        return  # the message still shows the old text; the next preview retries
+                    # Final render must land: replace the message we couldn't edit.
+                    await self._api.delete_message(self._message_ids[i])
+                    sent = await self._api.send_message(self._room_id, chunk, parent_id=self._parent_id)
+                    if not sent.get("id"):
+                        continue
+                    self._message_ids[i] = sent["id"]
+            else:
+                sent = await self._api.send_message(
+                    self._room_id, chunk, parent_id=self._parent_id, priority=priority,
+                )
+                if not sent.get("id"):
+                    if not final:
+                        return
+                    continue
+                self._message_ids.append(sent["id"])
+            if i < len(self._rendered):
+                self._rendered[i] = chunk
+            else:
+                self._rendered.append(chunk)
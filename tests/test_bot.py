@@ -1,16 +1,21 @@
-"""Tests for bot.py pure functions: split_message, _hard_split_line, _relative_time."""
+"""Tests for bot.py: split_message, _hard_split_line, _relative_time, _fetch_since, metrics, webhook startup, compaction, /cancel and /continue."""
 
+import asyncio
 import os
 import sys
 import time
 
+import pytest
+
 # Ensure config can import without real env vars
 os.environ.setdefault("WEBEX_BOT_TOKEN", "test-token")
 os.environ.setdefault("WEBEX_USER_EMAIL", "test@example.com")
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from bot import split_message, _hard_split_line, _relative_time
+import metrics
+from bot import split_message, _fetch_since, _hard_split_line, _relative_time
+from cursor_store import Cursor
 
 
 # ---------------------------------------------------------------------------
@@ -146,3 +151,302 @@ class TestRelativeTime:
         now_ms = int(time.time() * 1000)
         future = now_ms + (60 * 60 * 1000)  # 1 hour in the future
         assert _relative_time(future) == "just now"
+
+
+# ---------------------------------------------------------------------------
+# _fetch_since (paginated catch-up)
+# ---------------------------------------------------------------------------
+
+
+class _FakeAPI:
+    """Serves a newest-first message history in pages."""
+
+    def __init__(self, count):
+        self.history = [{"id": f"m{i}", "created": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}.000Z"} for i in range(count, 0, -1)]
+        self.page_calls = 0
+
+    async def list_messages(self, room_id, max_messages=10):
+        return self.history[:max_messages]
+
+    async def iter_message_pages(self, room_id, mentioned=False, before_message=None, page_size=50):
+        start = next(i for i, m in enumerate(self.history) if m["id"] == before_message) + 1
+        while start < len(self.history):
+            self.page_calls += 1
+            yield self.history[start:start + page_size]
+            start += page_size
+
+
+def _cursor_at(api, i):
+    msg = next(m for m in api.history if m["id"] == f"m{i}")
+    return Cursor(message_id=msg["id"], created=msg["created"])
+
+
+class TestFetchSince:
+    def test_single_page_when_cursor_in_first_page(self):
+        api = _FakeAPI(30)
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, _cursor_at(api, 25)))
+        assert len(result) == 10
+        assert api.page_calls == 0
+
+    def test_walks_back_until_cursor(self):
+        api = _FakeAPI(100)
+        before = metrics.get("poll.catchup_multi_page")
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, _cursor_at(api, 40)))
+        ids = [m["id"] for m in result]
+        assert "m41" in ids and "m40" in ids
+        assert api.page_calls == 2
+        assert metrics.get("poll.catchup_multi_page") == before + 1
+
+    def test_caps_walk_and_counts_truncation(self):
+        api = _FakeAPI(500)
+        before = metrics.get("poll.catchup_truncated")
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, _cursor_at(api, 1)))
+        assert len(result) == 200
+        assert metrics.get("poll.catchup_truncated") == before + 1
+
+    def test_history_ending_before_cursor_is_not_truncation(self):
+        api = _FakeAPI(30)
+        cursor = Cursor(message_id="gone", created="2025-12-31T23:59:00.000Z")
+        truncated = metrics.get("poll.catchup_truncated")
+        multi_page = metrics.get("poll.catchup_multi_page")
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, cursor))
+        assert len(result) == 30
+        assert metrics.get("poll.catchup_truncated") == truncated
+        assert metrics.get("poll.catchup_multi_page") == multi_page + 1
+
+    def test_no_older_page_is_not_multi_page(self):
+        api = _FakeAPI(10)
+        cursor = Cursor(message_id="gone", created="2025-12-31T23:59:00.000Z")
+        truncated = metrics.get("poll.catchup_truncated")
+        multi_page = metrics.get("poll.catchup_multi_page")
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, cursor))
+        assert len(result) == 10 and api.page_calls == 0
+        assert metrics.get("poll.catchup_truncated") == truncated
+        assert metrics.get("poll.catchup_multi_page") == multi_page
+
+    def test_no_cursor_returns_first_page_only(self):
+        api = _FakeAPI(100)
+        result = asyncio.run(_fetch_since(api, {"id": "R", "type": "direct"}, None))
+        assert len(result) == 10
+        assert api.page_calls == 0
+
+
+# ---------------------------------------------------------------------------
+# Metrics endpoint
+# ---------------------------------------------------------------------------
+
+def test_metrics_endpoint_reports_counters_and_usage():
+    import json
+
+    import bot
+    from http_server import Request
+    from usage import TurnUsage
+
+    bot._usage.record(TurnUsage(wall_seconds=3, cpu_seconds=1.5, cost_usd=0.01), room="metrics-room")
+    response = asyncio.run(bot._metrics_handler(Request("GET", bot.METRICS_PATH)))
+    body = json.loads(response.body)
+    assert response.content_type == "application/json"
+    assert body["usage"]["room"]["metrics-room"]["cpu_seconds"] == 1.5
+    assert "counters" in body and body["cli"]["running"] == 0
+
+
+def test_webhook_server_closed_when_registration_fails(monkeypatch):
+    import bot
+    from http_server import HttpServer
+
+    servers = []
+
+    class RecordingServer(HttpServer):
+        def __init__(self, host, port):
+            super().__init__(host, port)
+            servers.append(self)
+
+    class FailingAPI:
+        async def ensure_webhooks(self, *args):
+            raise RuntimeError("registration failed")
+
+    monkeypatch.setattr(bot, "HttpServer", RecordingServer)
+    monkeypatch.setattr(bot, "WEBHOOK_HOST", "127.0.0.1")
+    monkeypatch.setattr(bot, "WEBHOOK_PORT", 0)
+    monkeypatch.setattr(bot, "WEBHOOK_URL", "https://bot.example.com")
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await bot._start_webhooks(FailingAPI())
+
+    asyncio.run(run())
+    assert servers and servers[0]._server is None
+
+
+# ---------------------------------------------------------------------------
+# Compaction check
+# ---------------------------------------------------------------------------
+
+class TestCompactionDue:
+    def _state(self, tmp_path, monkeypatch, tokens):
+        import json
+
+        import bot
+
+        path = tmp_path / "sess.jsonl"
+        usage = {"input_tokens": tokens}
+        path.write_text(json.dumps({"type": "assistant", "message": {"usage": usage}}) + "\n")
+        monkeypatch.setattr(bot, "session_file", lambda sid, cwd: path)
+        monkeypatch.setattr(bot, "SESSION_COMPACT_TOKENS", 1000)
+        return bot, bot.BotState(session_id="sess", session_cwd=str(tmp_path))
+
+    def test_over_threshold_returns_estimate(self, tmp_path, monkeypatch):
+        bot, state = self._state(tmp_path, monkeypatch, 5000)
+        assert asyncio.run(bot._compaction_due(state, "hello")) == 5000
+
+    def test_under_threshold(self, tmp_path, monkeypatch):
+        bot, state = self._state(tmp_path, monkeypatch, 500)
+        assert asyncio.run(bot._compaction_due(state, "hello")) == 0
+
+    def test_skipped_for_new_sessions_and_compact_itself(self, tmp_path, monkeypatch):
+        bot, state = self._state(tmp_path, monkeypatch, 5000)
+        assert asyncio.run(bot._compaction_due(state, "/compact")) == 0
+        state.session_is_new = True
+        assert asyncio.run(bot._compaction_due(state, "hello")) == 0
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        bot, state = self._state(tmp_path, monkeypatch, 5000)
+        monkeypatch.setattr(bot, "SESSION_COMPACT_TOKENS", 0)
+        assert asyncio.run(bot._compaction_due(state, "hello")) == 0
+
+    def test_compaction_runs_on_the_turns_route(self, tmp_path, monkeypatch):
+        from model_routing import Route
+
+        bot, state = self._state(tmp_path, monkeypatch, 5000)
+        calls = []
+
+        async def fake_send(**kwargs):
+            calls.append(kwargs)
+            return "Compacted."
+
+        monkeypatch.setattr(bot, "cli_send_message", fake_send)
+        fast = Route("fast", model="haiku")
+        asyncio.run(bot._compact_session(state, "R", None, 5000, 60, 600, fast))
+        assert calls[0]["message"] == bot.COMPACT_COMMAND
+        assert calls[0]["route"] is fast
+
+
+# ---------------------------------------------------------------------------
+# /cancel and /continue
+# ---------------------------------------------------------------------------
+
+class _TurnAPI:
+    """Records what a turn posts; "Thinking..." can be held on a gate."""
+
+    def __init__(self):
+        self.sent = []
+        self.edits = []
+        self.thinking_gate = None
+
+    async def send_message(self, room_id, text, parent_id=None, priority=None):
+        if text == "Thinking..." and self.thinking_gate is not None:
+            await self.thinking_gate.wait()
+        self.sent.append(text)
+        return {"id": f"msg{len(self.sent)}"}
+
+    async def edit_message(self, message_id, room_id, text, priority=None):
+        self.edits.append((message_id, text))
+        return {"id": message_id}
+
+    async def delete_message(self, message_id):
+        pass
+
+
+class TestCancelAndContinue:
+    ROOM = "cancel-room"
+
+    @pytest.fixture(autouse=True)
+    def _turn_env(self, tmp_path, monkeypatch):
+        import bot
+        from cli_governor import CliGovernor
+        from session_lease import SessionLeases
+        from workers import RoomWorkers
+
+        monkeypatch.setattr(bot, "_room_states", {})
+        monkeypatch.setattr(bot, "_workers", RoomWorkers())
+        monkeypatch.setattr(bot, "_leases", SessionLeases(tmp_path))
+        monkeypatch.setattr(bot, "_governor", CliGovernor(max_concurrent=0))
+        monkeypatch.setattr(bot, "STREAM_REPLIES", False)
+        monkeypatch.setattr(bot, "new_session_id", lambda cwd, mode, route: "sess")
+        self.bot = bot
+        self.monkeypatch = monkeypatch
+        self.prompts = []
+        self.started = None
+
+    def _fake_cli(self, partial="", tools=()):
+        async def fake_send(**kwargs):
+            self.prompts.append(kwargs["message"])
+            kwargs["response"].append(partial)
+            for name, preview in tools:
+                kwargs["activity"].record(name, preview)
+            self.started.set()
+            await asyncio.Event().wait()  # runs until cancelled
+
+        self.monkeypatch.setattr(self.bot, "cli_send_message", fake_send)
+
+    async def _cancel_turn(self, api, wait_for):
+        self.started = asyncio.Event()
+        self.bot._workers.submit(
+            self.ROOM, lambda: self.bot.handle_text_message(api, self.ROOM, "fix the bug"),
+        )
+        await wait_for()
+        await self.bot.handle_cancel(api, self.ROOM)
+        await self.bot._workers.close()
+        return self.bot.get_state(self.ROOM)
+
+    def test_cancel_delivers_partial_output_and_sets_follow_up(self):
+        self._fake_cli("Half an answer", tools=[("Edit", "app.py")])
+        api = _TurnAPI()
+
+        state = asyncio.run(self._cancel_turn(api, lambda: self.started.wait()))
+        message_id, text = api.edits[-1]
+        assert message_id == "msg1"
+        assert text.startswith("Half an answer") and "Cancelled. Partial output is above." in text
+        assert "/continue" in text
+        assert "Half an answer" in state.follow_up and "app.py" in state.follow_up
+        assert not state.processing
+
+    def test_cancel_without_output_says_cancelled(self):
+        self._fake_cli()
+        api = _TurnAPI()
+
+        state = asyncio.run(self._cancel_turn(api, lambda: self.started.wait()))
+        assert api.edits[-1] == ("msg1", "Cancelled.")
+        assert state.follow_up == "" and not state.processing
+
+    def test_cancel_before_thinking_message_still_replies(self):
+        self._fake_cli()
+        api = _TurnAPI()
+
+        async def run():
+            api.thinking_gate = asyncio.Event()  # "Thinking..." never gets posted
+            return await self._cancel_turn(api, lambda: asyncio.sleep(0.01))
+
+        state = asyncio.run(run())
+        assert api.sent == ["Cancelled."]
+        assert self.prompts == [] and not state.processing
+
+    def test_continue_sends_stored_follow_up(self, monkeypatch):
+        async def fake_send(**kwargs):
+            self.prompts.append(kwargs["message"])
+            kwargs["response"].append("Done.")
+
+        monkeypatch.setattr(self.bot, "cli_send_message", fake_send)
+        api = _TurnAPI()
+        self.bot.get_state(self.ROOM).follow_up = "Continue from where you left off."
+
+        asyncio.run(self.bot.handle_continue(api, self.ROOM))
+        assert self.prompts == ["Continue from where you left off."]
+        assert api.edits[-1] == ("msg1", "Done.")
+        assert self.bot.get_state(self.ROOM).follow_up == ""
+
+    def test_continue_without_follow_up(self):
+        api = _TurnAPI()
+        asyncio.run(self.bot.handle_continue(api, self.ROOM))
+        assert api.sent == ["Nothing to continue."]
+        assert self.prompts == []
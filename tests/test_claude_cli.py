@@ -0,0 +1,340 @@
+"""Tests for claude_cli.py persistent sessions, against a fake `claude` on PATH."""
+
+import asyncio
+import json
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+# Ensure config can import without real env vars
+os.environ.setdefault("WEBEX_BOT_TOKEN", "test-token")
+os.environ.setdefault("WEBEX_USER_EMAIL", "test@example.com")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import claude_cli
+
+# Echoes each stream-json user turn back as an assistant text + result.
+# Argv and pid are recorded so tests can tell spawns apart.
+FAKE_CLAUDE = textwrap.dedent("""\
+    #!{python}
+    import json, os, sys
+    with open(os.environ["FAKE_CLAUDE_LOG"], "a") as log:
+        log.write(json.dumps({{"pid": os.getpid(), "argv": sys.argv[1:]}}) + "\\n")
+    def emit(text):
+        print(json.dumps({{"type": "assistant", "message": {{"content": [{{"type": "text", "text": text}}]}}}}))
+        print(json.dumps({{"type": "result", "result": text}}), flush=True)
+    if "--input-format" not in sys.argv:
+        emit("once:" + sys.argv[-1])
+        sys.exit(0)
+    for line in sys.stdin:
+        text = json.loads(line)["message"]["content"][0]["text"]
+        if text == "die":
+            sys.exit(1)
+        if text == "work-then-hang":
+            content = [
+                {{"type": "text", "text": "Half done."}},
+                {{"type": "tool_use", "name": "Write", "id": "t1", "input": {{"file_path": "/tmp/out.py"}}}},
+            ]
+            print(json.dumps({{"type": "assistant", "message": {{"content": content}}}}), flush=True)
+            text = "hang"
+        if text == "hang":
+            import time
+            time.sleep(60)
+        emit(f"{{os.getpid()}}:{{text}}")
+""")
+
+
+@pytest.fixture
+def fake_claude(tmp_path, monkeypatch):
+    script = tmp_path / "claude"
+    script.write_text(FAKE_CLAUDE.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "spawns.jsonl"
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_CLAUDE_LOG", str(log))
+    monkeypatch.setattr(claude_cli, "CLI_PERSISTENT_SESSIONS", True)
+
+    def spawns():
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+
+    return spawns
+
+
+@pytest.mark.asyncio
+async def test_turns_reuse_one_process(fake_claude, tmp_path):
+    try:
+        first = await claude_cli.send_message("sid", "hello", str(tmp_path), is_new=True)
+        second = await claude_cli.send_message("sid", "again", str(tmp_path))
+        spawns = fake_claude()
+        assert len(spawns) == 1
+        assert "--session-id" in spawns[0]["argv"]
+        pid = spawns[0]["pid"]
+        assert (first, second) == (f"{pid}:hello", f"{pid}:again")
+    finally:
+        await claude_cli.close_persistent_sessions()
+    assert claude_cli._persistent == {}
+
+
+@pytest.mark.asyncio
+async def test_mode_change_respawns_with_resume(fake_claude, tmp_path):
+    try:
+        await claude_cli.send_message("sid", "a", str(tmp_path), is_new=True, mode="yolo")
+        await claude_cli.send_message("sid", "b", str(tmp_path), mode="strict")
+        spawns = fake_claude()
+        assert len(spawns) == 2
+        assert "--resume" in spawns[1]["argv"]
+        assert "--allowedTools" in spawns[1]["argv"]
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_route_change_respawns_with_model_flags(fake_claude, tmp_path):
+    from model_routing import Route
+
+    fast = Route("fast", model="haiku")
+    try:
+        await claude_cli.send_message("sid", "a", str(tmp_path), is_new=True)
+        await claude_cli.send_message("sid", "b", str(tmp_path), route=fast)
+        await claude_cli.send_message("sid", "c", str(tmp_path), route=fast)
+        spawns = fake_claude()
+        assert len(spawns) == 2
+        assert "--model" not in spawns[0]["argv"]
+        argv = spawns[1]["argv"]
+        assert "--resume" in argv
+        assert argv[argv.index("--model") + 1] == "haiku"
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_process_dying_before_output_falls_back_to_spawn(fake_claude, tmp_path):
+    try:
+        reply = await claude_cli.send_message("sid", "die", str(tmp_path))
+        assert reply == "once:die"
+        assert "sid" not in claude_cli._persistent
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_reply_written_to_response_buffer(fake_claude, tmp_path, monkeypatch):
+    from response_buffer import ResponseBuffer
+
+    buf = ResponseBuffer(spool_bytes=4)
+    try:
+        assert await claude_cli.send_message("sid", "spill me", str(tmp_path), response=buf) == ""
+        pid = claude_cli._persistent["sid"].process.pid
+        assert buf.getvalue() == f"{pid}:spill me"
+        assert buf.spilled
+
+        monkeypatch.setattr(claude_cli, "CLI_PERSISTENT_SESSIONS", False)
+        monkeypatch.setenv("PATH", "")
+        assert await claude_cli.send_message("sid2", "x", str(tmp_path), response=buf) == ""
+        assert buf.getvalue() .startswith("Error: 'claude' CLI not found")
+    finally:
+        buf.close()
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_idle_timeout_kills_turn_on_time(fake_claude, tmp_path):
+    loop = asyncio.get_running_loop()
+    deadlines = []
+    try:
+        start = loop.time()
+        reply = await claude_cli.send_message(
+            "sid", "hang", str(tmp_path), idle_timeout=0.3, on_deadline=deadlines.append,
+        )
+        assert reply.startswith("Error: Claude timed out")
+        assert loop.time() - start < 2
+        assert deadlines[0].idle == 0.3
+        assert "sid" not in claude_cli._persistent
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_timeout_keeps_partial_output_and_tool_summary(fake_claude, tmp_path):
+    from salvage import TurnActivity
+
+    activity = TurnActivity()
+    try:
+        reply = await claude_cli.send_message(
+            "sid", "work-then-hang", str(tmp_path), idle_timeout=0.3, activity=activity,
+        )
+        assert reply.startswith("Half done.\n\n---\nError: Claude timed out")
+        assert "- Changed: `/tmp/out.py`" in reply
+        assert activity.calls == [("Write", "/tmp/out.py")]
+        assert activity.interrupted.startswith("Claude timed out")
+        assert activity.partial_tail == "Half done."
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_turn_usage_is_metered(fake_claude, tmp_path):
+    from usage import TurnUsage
+
+    usage = TurnUsage()
+    try:
+        await claude_cli.send_message("sid", "hi", str(tmp_path), usage=usage)
+        assert usage.wall_seconds > 0
+        if os.path.isdir("/proc/self"):
+            assert usage.peak_rss_mb > 0
+        assert len(claude_cli._sampler) == 0
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_turns_through_spawn_helper(fake_claude, tmp_path, monkeypatch):
+    from spawner import SUPPORTED, HelperProcess, SpawnHelper
+
+    if not SUPPORTED:
+        pytest.skip("spawn helper needs Linux")
+    helper = SpawnHelper()
+    monkeypatch.setattr(claude_cli, "_spawner", helper)
+    await helper.start(claude_cli._clean_env())
+    try:
+        first = await claude_cli.send_message("sid", "hello", str(tmp_path), is_new=True)
+        second = await claude_cli.send_message("sid", "again", str(tmp_path))
+        session = claude_cli._persistent["sid"]
+        assert isinstance(session.process, HelperProcess)
+        assert (first, second) == (f"{session.process.pid}:hello", f"{session.process.pid}:again")
+
+        monkeypatch.setattr(claude_cli, "CLI_PERSISTENT_SESSIONS", False)
+        assert await claude_cli.send_message("sid2", "x", str(tmp_path)) == "once:x"
+    finally:
+        await claude_cli.close_persistent_sessions()
+        await helper.close()
+    assert session.process.returncode == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_closes_idle_processes(fake_claude, tmp_path):
+    try:
+        await claude_cli.send_message("sid", "hi", str(tmp_path))
+        process = claude_cli._persistent["sid"].process
+        assert await claude_cli.reap_idle_sessions(ttl=3600) == 0
+        assert await claude_cli.reap_idle_sessions(ttl=0) == 1
+        assert process.returncode is not None
+        assert claude_cli._persistent == {}
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+async def _wait_for_pool(size, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(claude_cli._pool) < size:
+        assert asyncio.get_running_loop().time() < deadline, "warm pool never filled"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_new_session_takes_warm_process_and_pool_refills(fake_claude, tmp_path, monkeypatch):
+    monkeypatch.setattr(claude_cli, "_pool", claude_cli._WarmPool(size=1, ttl=3600))
+    try:
+        claude_cli.prewarm(str(tmp_path), "yolo")
+        await _wait_for_pool(1)
+        warm = claude_cli._pool._idle[(str(tmp_path), "yolo", claude_cli.DEFAULT_ROUTE)][0]
+
+        sid = claude_cli.new_session_id(str(tmp_path), "yolo")
+        assert sid == warm.session_id
+        reply = await claude_cli.send_message(sid, "hi", str(tmp_path), is_new=True, mode="yolo")
+        assert reply == f"{warm.process.pid}:hi"
+
+        await _wait_for_pool(1)
+        spawns = [s for s in fake_claude() if s["pid"] == warm.process.pid]
+        assert spawns[0]["argv"][spawns[0]["argv"].index("--session-id") + 1] == sid
+        assert claude_cli._pool._idle[(str(tmp_path), "yolo", claude_cli.DEFAULT_ROUTE)][0] is not warm
+    finally:
+        await claude_cli.close_persistent_sessions()
+    assert len(claude_cli._pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_pooled_session_survives_its_first_routed_turn(fake_claude, tmp_path, monkeypatch):
+    from model_routing import Route
+
+    fast = Route("fast", model="haiku")
+    monkeypatch.setattr(claude_cli, "_pool", claude_cli._WarmPool(size=1, ttl=3600))
+    try:
+        claude_cli.prewarm(str(tmp_path), "strict", fast)
+        await _wait_for_pool(1)
+        warm = claude_cli._pool._idle[(str(tmp_path), "strict", fast)][0]
+
+        sid = claude_cli.new_session_id(str(tmp_path), "strict", fast)
+        assert sid == warm.session_id
+        reply = await claude_cli.send_message(sid, "hi", str(tmp_path), is_new=True, mode="strict", route=fast)
+        assert reply == f"{warm.process.pid}:hi"
+        assert claude_cli._persistent[sid] is warm
+
+        argv = next(s["argv"] for s in fake_claude() if s["pid"] == warm.process.pid)
+        assert argv[argv.index("--model") + 1] == "haiku"
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_pool_miss_and_expiry(fake_claude, tmp_path, monkeypatch):
+    monkeypatch.setattr(claude_cli, "_pool", claude_cli._WarmPool(size=1, ttl=0))
+    try:
+        sid = claude_cli.new_session_id(str(tmp_path), "strict")  # cold key: miss
+        assert sid not in claude_cli._persistent
+        await _wait_for_pool(1)
+        old = claude_cli._pool._idle[(str(tmp_path), "strict", claude_cli.DEFAULT_ROUTE)][0]
+        await asyncio.sleep(0.01)
+        await claude_cli._pool.expire()
+        assert old.process.returncode is not None
+        await _wait_for_pool(1)
+        assert claude_cli._pool._idle[(str(tmp_path), "strict", claude_cli.DEFAULT_ROUTE)][0] is not old
+    finally:
+        await claude_cli.close_persistent_sessions()
+
+
+@pytest.mark.asyncio
+async def test_stream_events_emits_text_deltas():
+    reader = asyncio.StreamReader()
+    lines = [
+        {"type": "stream_event", "event": {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}}},
+        {"type": "stream_event", "event": {"type": "content_block_delta", "delta": {"type": "input_json_delta"}}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": "Hi"}]}},
+        {"type": "result", "result": "Hi", "total_cost_usd": 0.012, "duration_ms": 950},
+    ]
+    reader.feed_data("".join(json.dumps(line) + "\n" for line in lines).encode())
+    reader.feed_eof()
+    events = []
+    process = type("P", (), {"stdout": reader})()
+    result = await claude_cli._stream_events(process, [], events.append, None)
+    assert result == "Hi"
+    assert [type(e).__name__ for e in events] == ["TextDeltaEvent", "TextEvent", "ResultEvent"]
+    assert (events[-1].cost_usd, events[-1].duration_ms) == (0.012, 950)
+
+
+@pytest.mark.asyncio
+async def test_stream_events_survives_lines_over_readline_limit():
+    reader = asyncio.StreamReader()
+    huge = {"type": "user", "message": {"content": [{"type": "tool_result", "content": "x" * 300_000}]}}
+    for line in (huge, {"type": "result", "result": "fine"}):
+        reader.feed_data((json.dumps(line) + "\n").encode())
+    reader.feed_eof()
+    process = type("P", (), {"stdout": reader})()
+    assert await claude_cli._stream_events(process, [], None, None) == "fine"
+
+
+@pytest.mark.asyncio
+async def test_stream_events_stops_at_over_limit_result(monkeypatch):
+    monkeypatch.setattr(claude_cli, "CLI_MAX_LINE_BYTES", 4096)
+    reader = asyncio.StreamReader()
+    reader.feed_data((json.dumps({"type": "result", "result": "y" * 50_000}) + "\n").encode())
+    # no EOF: a persistent process keeps running after its result
+    process = type("P", (), {"stdout": reader})()
+    text = await asyncio.wait_for(claude_cli._stream_events(process, [], None, None, stop_at_result=True), 2)
+    assert text.startswith("yyyy") and "truncated" in text
@@ -0,0 +1,114 @@
+"""Tests for cli_governor.py: concurrency cap, priority, fairness, admission."""
+
+import asyncio
+
+import pytest
+
+from cli_governor import CliGovernor, TurnClass
+from procfs import HostLoad
+
+
+async def _hold(gov, key, turn_class, release, admitted, positions=None):
+    on_position = (lambda n: positions.append(n)) if positions is not None else None
+    async with gov.slot(key, turn_class, on_position):
+        admitted.append(key)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_cap_and_priority_order():
+    gov = CliGovernor(max_concurrent=1)
+    release = asyncio.Event()
+    admitted = []
+    first = asyncio.create_task(_hold(gov, "busy", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0)
+    space = asyncio.create_task(_hold(gov, "space", TurnClass.SPACE, release, admitted))
+    await asyncio.sleep(0)
+    dm = asyncio.create_task(_hold(gov, "dm", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0.01)
+    assert admitted == ["busy"]
+    assert (gov.position("dm"), gov.position("space")) == (1, 2)
+    release.set()
+    await asyncio.gather(first, space, dm)
+    assert admitted == ["busy", "dm", "space"]
+    assert gov.running == 0
+
+
+@pytest.mark.asyncio
+async def test_round_robin_across_rooms_and_position_updates():
+    gov = CliGovernor(max_concurrent=1)
+    gate = asyncio.Event()
+    admitted = []
+    positions = []
+    blocker = asyncio.create_task(_hold(gov, "x", TurnClass.SPACE, gate, admitted))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(_hold(gov, "a", TurnClass.SPACE, gate, admitted)),
+        asyncio.create_task(_hold(gov, "a", TurnClass.SPACE, gate, admitted)),
+        asyncio.create_task(_hold(gov, "b", TurnClass.SPACE, gate, admitted, positions)),
+    ]
+    await asyncio.sleep(0.01)
+    # b's only turn goes ahead of a's second one.
+    assert positions == [2]
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    assert admitted == ["x", "a", "b", "a"]
+    assert positions == [2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    gov = CliGovernor(max_concurrent=1)
+    release = asyncio.Event()
+    admitted = []
+    first = asyncio.create_task(_hold(gov, "a", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(_hold(gov, "b", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0.01)
+    assert gov.queued() == 1
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert gov.queued() == 0
+    release.set()
+    await first
+    assert admitted == ["a"] and gov.running == 0
+
+
+@pytest.mark.asyncio
+async def test_low_memory_defers_until_it_recovers():
+    load = HostLoad(mem_available_mb=100, load1=0.1, cpus=4)
+    gov = CliGovernor(max_concurrent=4, min_available_mb=512, probe=lambda: load, retry_seconds=0.01)
+    release = asyncio.Event()
+    admitted = []
+    first = asyncio.create_task(_hold(gov, "a", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0)
+    assert admitted == ["a"]  # nothing running: always admitted
+    second = asyncio.create_task(_hold(gov, "b", TurnClass.DIRECT, release, admitted))
+    await asyncio.sleep(0.05)
+    assert admitted == ["a"]
+    load.mem_available_mb = 4096
+    await asyncio.sleep(0.05)
+    assert admitted == ["a", "b"]
+    release.set()
+    await asyncio.gather(first, second)
+
+
+@pytest.mark.asyncio
+async def test_high_load_defers_and_unknown_load_admits():
+    busy = CliGovernor(max_concurrent=4, max_load_per_cpu=2.0, probe=lambda: HostLoad(None, 12.0, 4))
+    unknown = CliGovernor(max_concurrent=4, max_load_per_cpu=2.0, probe=lambda: None)
+    busy.running = unknown.running = 1
+    assert not busy._admissible()
+    assert unknown._admissible()
+
+
+@pytest.mark.asyncio
+async def test_unlimited_never_queues():
+    gov = CliGovernor(max_concurrent=0)
+    release = asyncio.Event()
+    admitted = []
+    tasks = [asyncio.create_task(_hold(gov, str(i), TurnClass.SPACE, release, admitted)) for i in range(5)]
+    await asyncio.sleep(0.01)
+    assert len(admitted) == 5 and gov.queued() == 0
+    release.set()
+    await asyncio.gather(*tasks)
@@ -1,4 +1,5 @@
-from config import _parse_space_modes
+import config
+from config import _parse_space_modes, _parse_timeouts
 
 
 def test_empty_returns_empty_map():
@@ -28,3 +29,19 @@ def test_unknown_mode_falls_back_to_strict():
 def test_malformed_entry_is_skipped():
     # entries without exactly one colon are ignored, valid ones still parsed
     assert _parse_space_modes("noColon,roomB:yolo,a:b:c") == {"roomB": "yolo"}
+
+
+def test_timeouts_parse_blank_sides_and_skip_malformed():
+    assert _parse_timeouts("X", "strict:60/600, roomA:/7200,bad,also:bad/1") == {
+        "strict": (60, 600),
+        "roomA": (None, 7200),
+    }
+
+
+def test_turn_timeouts_room_beats_mode_beats_default(monkeypatch):
+    monkeypatch.setattr(config, "CLI_MODE_TIMEOUTS", {"strict": (60, 600)})
+    monkeypatch.setattr(config, "CLI_ROOM_TIMEOUTS", {"roomA": (None, 7200)})
+    default = (config.CLI_IDLE_TIMEOUT_SECONDS, config.CLI_TIMEOUT_SECONDS)
+    assert config.turn_timeouts("roomB", "yolo") == default
+    assert config.turn_timeouts("roomB", "strict") == (60, 600)
+    assert config.turn_timeouts("roomA", "strict") == (60, 7200)
@@ -0,0 +1,69 @@
+import json
+
+from cursor_store import Cursor, CursorStore, messages_after
+
+
+def _msg(i, created=None):
+    return {"id": f"m{i}", "created": created or f"2026-01-01T00:00:{i:02d}.000Z"}
+
+
+def test_advance_and_get(tmp_path):
+    s = CursorStore(path=tmp_path / "c.json")
+    assert s.get("room") is None
+    s.advance("room", _msg(3))
+    assert s.get("room") == Cursor(message_id="m3", created="2026-01-01T00:00:03.000Z")
+
+
+def test_flush_is_debounced(tmp_path):
+    p = tmp_path / "c.json"
+    s = CursorStore(path=p, flush_interval=3600)
+    s.advance("room", _msg(1))
+    s.flush()
+    assert json.loads(p.read_text())["rooms"]["room"]["id"] == "m1"
+    s.advance("room", _msg(2))
+    s.flush()  # within the interval: nothing written
+    assert json.loads(p.read_text())["rooms"]["room"]["id"] == "m1"
+    s.flush(force=True)
+    assert json.loads(p.read_text())["rooms"]["room"]["id"] == "m2"
+
+
+def test_flush_without_changes_does_not_write(tmp_path):
+    p = tmp_path / "c.json"
+    CursorStore(path=p).flush(force=True)
+    assert not p.exists()
+
+
+def test_persists_cursors_and_claims_across_instances(tmp_path):
+    p = tmp_path / "c.json"
+    s = CursorStore(path=p)
+    s.advance("room", _msg(5))
+    assert s.claim("m5") is True
+    s.flush(force=True)
+
+    reloaded = CursorStore(path=p)
+    assert reloaded.get("room").message_id == "m5"
+    assert reloaded.claim("m5") is False
+    assert reloaded.claim("m6") is True
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    p = tmp_path / "c.json"
+    p.write_text("{ nope")
+    assert CursorStore(path=p).get("room") is None
+
+
+def test_messages_after_stops_at_cursor_id():
+    page = [_msg(5), _msg(4), _msg(3), _msg(2)]
+    cursor = Cursor(message_id="m3", created="2026-01-01T00:00:03.000Z")
+    assert [m["id"] for m in messages_after(page, cursor)] == ["m4", "m5"]
+
+
+def test_messages_after_falls_back_to_timestamp_when_cursor_message_gone():
+    page = [_msg(5), _msg(4), _msg(2)]
+    cursor = Cursor(message_id="m3", created="2026-01-01T00:00:03.000Z")
+    assert [m["id"] for m in messages_after(page, cursor)] == ["m4", "m5"]
+
+
+def test_messages_after_nothing_new():
+    page = [_msg(3), _msg(2)]
+    assert messages_after(page, Cursor(message_id="m3", created="2026-01-01T00:00:03.000Z")) == []
@@ -0,0 +1,58 @@
+"""Tests for deadlines.py: exact firing, lazy re-arm on touch, cancellation."""
+
+import asyncio
+
+import pytest
+
+from deadlines import HARD, IDLE, DeadlineScheduler
+
+
+@pytest.mark.asyncio
+async def test_idle_deadline_fires_on_time():
+    scheduler = DeadlineScheduler()
+    fired = []
+    loop = asyncio.get_running_loop()
+    deadline = scheduler.start(idle=0.05, hard=10, on_expire=lambda kind: fired.append((kind, loop.time())))
+    await asyncio.sleep(0.1)
+    assert [kind for kind, _ in fired] == [IDLE]
+    assert fired[0][1] - deadline.started == pytest.approx(0.05, abs=0.02)
+    assert deadline.expired == IDLE and deadline.remaining() == 0
+
+
+@pytest.mark.asyncio
+async def test_touch_pushes_idle_deadline_back_until_hard_cap():
+    scheduler = DeadlineScheduler()
+    fired = []
+    deadline = scheduler.start(idle=0.04, hard=0.15, on_expire=fired.append)
+    for _ in range(6):
+        await asyncio.sleep(0.02)
+        deadline.touch()
+        if fired:
+            break
+    assert fired == []
+    assert 0 < deadline.remaining() <= 0.04
+    await asyncio.sleep(0.1)
+    assert fired == [HARD]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_deadline_never_fires_and_others_still_do():
+    scheduler = DeadlineScheduler()
+    fired = []
+    first = scheduler.start(idle=0.02, hard=10, on_expire=lambda kind: fired.append("first"))
+    scheduler.start(idle=0.04, hard=10, on_expire=lambda kind: fired.append("second"))
+    assert len(scheduler) == 2
+    first.cancel()
+    await asyncio.sleep(0.08)
+    assert fired == ["second"]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_earlier_deadline_rearms_timer():
+    scheduler = DeadlineScheduler()
+    fired = []
+    scheduler.start(idle=5, hard=10, on_expire=lambda kind: fired.append("late"))
+    scheduler.start(idle=0.02, hard=10, on_expire=lambda kind: fired.append("early"))
+    await asyncio.sleep(0.05)
+    assert fired == ["early"]
@@ -0,0 +1,89 @@
+"""Tests for model_routing.py: rule compilation, matching order, prefixes, CLI flags."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from model_routing import DEFAULT_ROUTE, ModelRouter, Route, parse_rules
+
+RULES = [
+    {"name": "quick", "model": "haiku", "modes": ["strict"], "max_chars": 40},
+    {"name": "big", "model": "opus", "pattern": r"\brefactor", "thinking_tokens": 8000},
+    {"name": "team", "model": "sonnet", "rooms": "ROOM-A", "min_chars": 5},
+]
+
+
+def _router(rules=RULES):
+    return ModelRouter(
+        rules=parse_rules(json.dumps(rules)),
+        prefixes={"/fast": Route("fast", model="haiku"), "/deep": Route("deep", model="opus", thinking_tokens=16000)},
+    )
+
+
+class TestParseRules:
+    def test_blank_is_no_rules(self):
+        assert parse_rules("") == []
+        assert parse_rules("   ") == []
+
+    def test_compiles_conditions(self):
+        quick, big, team = parse_rules(json.dumps(RULES))
+        assert quick.modes == frozenset({"strict"}) and quick.max_chars == 40
+        assert big.pattern.search("Please REFACTOR this")  # case-insensitive
+        assert team.rooms == frozenset({"ROOM-A"})
+
+    def test_reads_file(self, tmp_path):
+        path = tmp_path / "routes.json"
+        path.write_text(json.dumps(RULES[:1]))
+        assert [r.route.name for r in parse_rules(str(path))] == ["quick"]
+
+    def test_invalid_rules_skipped(self, capsys):
+        rules = parse_rules(json.dumps([{"model": "x", "pattern": "("}, "nope", {"model": "y"}]))
+        assert [r.route.model for r in rules] == ["y"]
+        assert rules[0].route.name == "rule3"
+        assert "rule 1 skipped" in capsys.readouterr().err
+
+    def test_unreadable_disables_routing(self, tmp_path, capsys):
+        assert parse_rules(str(tmp_path / "missing.json")) == []
+        assert parse_rules("[not json") == []
+        assert parse_rules('{"model": "x"}') == []
+        assert "CLI_MODEL_ROUTES" in capsys.readouterr().err
+
+
+class TestRoute:
+    def test_first_matching_rule_wins(self):
+        router = _router()
+        assert router.route("what branch am I on?", "R", "strict").route.name == "quick"
+        assert router.route("refactor the parser module please", "R", "yolo").route.name == "big"
+        assert router.route("refactor", "ROOM-A", "yolo").route.name == "big"
+        assert router.route("hello there", "ROOM-A", "yolo").route.name == "team"
+
+    def test_length_limits(self):
+        router = _router()
+        assert router.route("x" * 41, "R", "strict").route is DEFAULT_ROUTE
+        assert router.route("hi", "ROOM-A", "yolo").route is DEFAULT_ROUTE
+
+    def test_prefix_overrides_rules_and_is_stripped(self):
+        decision = _router().route("/deep   why is this slow?", "R", "strict")
+        assert decision.route.name == "deep"
+        assert decision.text == "why is this slow?"
+        assert decision.reason == "prefix /deep"
+
+    def test_bare_prefix_leaves_empty_text(self):
+        assert _router().route("/FAST", "R", "yolo").text == ""
+
+    def test_unmatched_keeps_text(self):
+        decision = _router([]).route("  hello  ", "R", "yolo")
+        assert decision.route is DEFAULT_ROUTE and decision.text == "  hello  "
+
+
+class TestCliArgs:
+    def test_default_adds_nothing(self):
+        assert DEFAULT_ROUTE.cli_args() == []
+
+    def test_model_fallback_and_thinking(self):
+        args = Route("r", model="opus", fallback_model="sonnet", thinking_tokens=8000).cli_args()
+        assert args[:4] == ["--model", "opus", "--fallback-model", "sonnet"]
+        assert args[4] == "--settings"
+        assert json.loads(args[5]) == {"env": {"MAX_THINKING_TOKENS": "8000"}}
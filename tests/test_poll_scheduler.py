@@ -0,0 +1,88 @@
+from poll_scheduler import PollScheduler, RoomActivityIndex, parse_webex_time
+
+WALL = 1_767_225_600.0  # 2026-01-01T00:00:00Z
+
+
+def test_parse_webex_time():
+    assert parse_webex_time("2026-01-01T00:00:00.000Z") == WALL
+    assert parse_webex_time("") is None
+    assert parse_webex_time("garbage") is None
+
+
+def test_new_room_is_due_immediately():
+    s = PollScheduler(2.0, 300.0)
+    s.observe("r", "2025-01-01T00:00:00.000Z", now=0.0, wall_now=WALL)
+    assert s.due("r", 0.0)
+
+
+def test_new_room_interval_scales_with_idle_age():
+    s = PollScheduler(2.0, 300.0)
+    s.observe("fresh", "2026-01-01T00:00:00.000Z", now=0.0, wall_now=WALL + 5)
+    s.observe("stale", "2025-01-01T00:00:00.000Z", now=0.0, wall_now=WALL)
+    assert s.interval("fresh") == 2.0
+    assert s.interval("stale") == 300.0
+
+
+def test_empty_polls_decay_gradually_up_to_max():
+    s = PollScheduler(2.0, 20.0)
+    s.record("r", had_new=True, now=0.0)
+    intervals = []
+    for _ in range(5):
+        s.record("r", had_new=False, now=0.0)
+        intervals.append(s.interval("r"))
+    assert intervals == [4.0, 8.0, 16.0, 20.0, 20.0]
+    assert not s.due("r", 19.0)
+    assert s.due("r", 20.0)
+
+
+def test_new_messages_reset_to_hot():
+    s = PollScheduler(2.0, 300.0)
+    s.record("r", had_new=False, now=0.0)
+    s.record("r", had_new=False, now=0.0)
+    s.record("r", had_new=True, now=0.0)
+    assert s.interval("r") == 2.0
+
+
+def test_newer_last_activity_promotes_instantly():
+    s = PollScheduler(2.0, 300.0)
+    s.observe("r", "2025-01-01T00:00:00.000Z", now=0.0, wall_now=WALL)
+    s.record("r", had_new=False, now=0.0)
+    assert not s.due("r", 10.0)
+    s.observe("r", "2025-01-01T00:00:00.000Z", now=10.0, wall_now=WALL)
+    assert not s.due("r", 10.0)
+    s.observe("r", "2026-01-01T00:00:09.000Z", now=10.0, wall_now=WALL)
+    assert s.due("r", 10.0)
+    assert s.interval("r") == 2.0
+
+
+def test_forget_drops_unlisted_rooms():
+    s = PollScheduler(2.0, 300.0)
+    s.record("a", had_new=False, now=0.0)
+    s.record("b", had_new=False, now=0.0)
+    s.forget({"a"})
+    assert s.interval("a") is not None
+    assert s.interval("b") is None
+
+
+def test_activity_index_changes_only_when_last_activity_moves():
+    idx = RoomActivityIndex()
+    assert idx.changed("r", "2026-01-01T00:00:00.000Z")
+    idx.mark("r", "2026-01-01T00:00:00.000Z")
+    assert not idx.changed("r", "2026-01-01T00:00:00.000Z")
+    assert idx.changed("r", "2026-01-01T00:00:05.000Z")
+
+
+def test_activity_index_unmarked_room_stays_changed():
+    # A failed fetch never reaches mark(), so the room is retried next cycle.
+    idx = RoomActivityIndex()
+    assert idx.changed("r", "t1")
+    assert idx.changed("r", "t1")
+
+
+def test_activity_index_forget():
+    idx = RoomActivityIndex()
+    idx.mark("a", "t")
+    idx.mark("b", "t")
+    idx.forget({"a"})
+    assert not idx.changed("a", "t")
+    assert idx.changed("b", "t")
@@ -0,0 +1,114 @@
+"""Tests for proc_groups.py: whole-tree kills and orphan reaping, with real processes."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import metrics
+from proc_groups import SUPPORTED, OrphanReaper, kill_tree, spawn_kwargs
+from procfs import read_proc_stat
+
+pytestmark = pytest.mark.skipif(
+    not SUPPORTED or not os.path.isdir("/proc/self"), reason="needs process groups and /proc",
+)
+
+
+def _running(pid: int) -> bool:
+    stat = read_proc_stat(pid)
+    return stat is not None and stat.state not in ("Z", "X")
+
+
+async def _spawn(script: str) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec("sh", "-c", script, **spawn_kwargs())
+
+
+async def _read_pid(path, timeout=5.0) -> int:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not (path.exists() and path.read_text().strip()):
+        assert asyncio.get_running_loop().time() < deadline, "child never started"
+        await asyncio.sleep(0.01)
+    return int(path.read_text())
+
+
+async def _wait_exec(pid: int, comm: str, timeout=5.0) -> None:
+    """Wait until `pid` runs `comm` with memory mapped, i.e. has finished exec."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        stat = read_proc_stat(pid)
+        try:
+            with open(f"/proc/{pid}/comm") as f:
+                name = f.read().strip()
+        except OSError:
+            name = ""
+        if name == comm and stat is not None and stat.rss_mb > 0:
+            return
+        assert asyncio.get_running_loop().time() < deadline, f"{pid} never exec'd {comm}"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_kill_tree_takes_down_grandchildren(tmp_path):
+    pid_file = tmp_path / "child"
+    process = await _spawn(f"sleep 60 & echo $! > {pid_file}; wait")
+    child = await _read_pid(pid_file)
+    assert _running(child)
+
+    await kill_tree(process, grace=1.0)
+    assert process.returncode is not None
+    await asyncio.sleep(0.05)
+    assert not _running(child)
+
+
+@pytest.mark.asyncio
+async def test_kill_tree_escalates_to_sigkill(tmp_path):
+    ready = tmp_path / "ready"
+    process = await _spawn(f"trap '' TERM; echo $$ > {ready}; while :; do sleep 0.05; done")
+    await _read_pid(ready)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await kill_tree(process, grace=0.2)
+    assert process.returncode == -9
+    assert loop.time() - start < 3
+
+
+@pytest.mark.asyncio
+async def test_reaper_kills_descendants_of_exited_leader(tmp_path):
+    pid_file = tmp_path / "child"
+    reaper = OrphanReaper(grace=0.1)
+    process = await _spawn(f"sleep 60 & echo $! > {pid_file}")
+    reaper.track(process)
+    child = await _read_pid(pid_file)
+    await _wait_exec(child, "sleep")  # $! is known right after fork, before exec
+    await process.wait()
+
+    assert [p.pid for p in reaper.orphans()] == [child]
+    before = metrics.get("cli.orphans_reaped")
+    report = await reaper.reap()
+    assert report.killed == 1
+    assert report.rss_mb > 0
+    assert metrics.get("cli.orphans_reaped") == before + 1
+    await asyncio.sleep(0.05)
+    assert not _running(child)
+
+    # Nothing left in the session: it is forgotten on the next sweep.
+    assert (await reaper.reap()).killed == 0
+    assert len(reaper) == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_leaves_live_leaders_alone(tmp_path):
+    pid_file = tmp_path / "child"
+    reaper = OrphanReaper(grace=0.1)
+    process = await _spawn(f"sleep 60 & echo $! > {pid_file}; wait")
+    reaper.track(process)
+    await _read_pid(pid_file)
+    try:
+        assert reaper.orphans() == []
+        assert (await reaper.reap()).killed == 0
+        assert len(reaper) == 1
+    finally:
+        await kill_tree(process, grace=0.5)
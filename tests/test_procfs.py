@@ -0,0 +1,36 @@
+"""Tests for procfs.py readers against fake /proc trees."""
+
+from procfs import read_host_load, read_load1, read_mem_available_mb
+
+
+def test_reads_meminfo_and_loadavg(tmp_path):
+    (tmp_path / "meminfo").write_text("MemTotal:       16384000 kB\nMemAvailable:    2097152 kB\n")
+    (tmp_path / "loadavg").write_text("1.50 1.20 0.90 2/345 6789\n")
+    assert read_mem_available_mb(tmp_path) == 2048
+    assert read_load1(tmp_path) == 1.5
+    load = read_host_load(tmp_path)
+    assert load.mem_available_mb == 2048 and load.load1 == 1.5
+
+
+def test_missing_proc_is_unknown(tmp_path):
+    assert read_mem_available_mb(tmp_path) is None
+    assert read_load1(tmp_path) is None
+    assert read_host_load(tmp_path) is None
+
+
+def test_reads_proc_stat_with_awkward_comm(tmp_path):
+    from procfs import _CLK_TCK, _PAGE_SIZE, list_processes, read_proc_stat
+
+    (tmp_path / "42").mkdir()
+    # comm may contain spaces and parentheses
+    (tmp_path / "42" / "stat").write_text(
+        f"42 (node (x) y) S 7 40 40 0 -1 4194560 1 0 0 0 {2 * _CLK_TCK} {_CLK_TCK} 0 0 20 0 3 0 99 1000 "
+        f"{(10 * 1024 * 1024) // _PAGE_SIZE} 0\n"
+    )
+    (tmp_path / "self").mkdir()
+    stat = read_proc_stat(42, tmp_path)
+    assert (stat.pid, stat.ppid, stat.pgrp, stat.session, stat.state) == (42, 7, 40, 40, "S")
+    assert stat.cpu_seconds == 3.0
+    assert stat.rss_mb == 10.0
+    assert [p.pid for p in list_processes(tmp_path)] == [42]
+    assert read_proc_stat(43, tmp_path) is None
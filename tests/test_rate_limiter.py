@@ -0,0 +1,84 @@
+"""Tests for rate_limiter.py: token bucket, priority ordering, global hold."""
+
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import Priority, RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_burst_is_immediate():
+    limiter = RateLimiter(rate=1.0, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+@pytest.mark.asyncio
+async def test_refill_rate_is_enforced():
+    limiter = RateLimiter(rate=50.0, burst=1)
+    start = time.monotonic()
+    for _ in range(4):
+        await limiter.acquire()
+    # 3 refills at 50/s ~= 60ms
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_waiters_served_by_priority_then_fifo():
+    limiter = RateLimiter(rate=100.0, burst=1)
+    await limiter.acquire()  # drain the bucket
+    order = []
+
+    async def take(name, prio):
+        await limiter.acquire(prio)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(take("cosmetic", Priority.COSMETIC)),
+        asyncio.create_task(take("poll-1", Priority.POLL)),
+        asyncio.create_task(take("reply", Priority.REPLY)),
+        asyncio.create_task(take("poll-2", Priority.POLL)),
+    ]
+    await asyncio.gather(*tasks)
+    assert order == ["reply", "poll-1", "poll-2", "cosmetic"]
+
+
+@pytest.mark.asyncio
+async def test_hold_blocks_everyone_until_it_expires():
+    limiter = RateLimiter(rate=100.0, burst=10)
+    limiter.hold(0.05)
+    assert limiter.congested()
+    start = time.monotonic()
+    await limiter.acquire(Priority.REPLY)
+    assert time.monotonic() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_caller_that_waited_out_the_hold_is_not_held_again():
+    limiter = RateLimiter(rate=100.0, burst=10)
+    deadline = limiter.hold(5.0)
+    start = time.monotonic()
+    await limiter.acquire(Priority.REPLY, waited_until=deadline)
+    assert time.monotonic() - start < 0.05
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    limiter = RateLimiter(rate=100.0, burst=1)
+    await limiter.acquire()
+    doomed = asyncio.create_task(limiter.acquire(Priority.REPLY))
+    await asyncio.sleep(0)
+    doomed.cancel()
+    await asyncio.wait_for(limiter.acquire(Priority.POLL), timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_never_waits():
+    limiter = RateLimiter(rate=0, burst=1)
+    limiter.hold(10)
+    await asyncio.wait_for(limiter.acquire(), timeout=0.1)
+    assert not limiter.congested()
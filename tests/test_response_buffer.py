@@ -0,0 +1,83 @@
+"""Tests for response_buffer.py: spooling, replace/head, split_message-compatible chunks."""
+
+import os
+import random
+import sys
+
+os.environ.setdefault("WEBEX_BOT_TOKEN", "test-token")
+os.environ.setdefault("WEBEX_USER_EMAIL", "test@example.com")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+from bot import split_message
+from response_buffer import ResponseBuffer
+
+
+def _buffer(text: str, spool_bytes: int = 1024) -> ResponseBuffer:
+    buf = ResponseBuffer(spool_bytes)
+    buf.append(text)
+    return buf
+
+
+class TestAccumulation:
+    def test_spills_past_threshold(self):
+        buf = ResponseBuffer(spool_bytes=100)
+        buf.append("a" * 60)
+        assert not buf.spilled
+        buf.append("b" * 60)
+        assert buf.spilled
+        assert len(buf) == 120
+        assert buf.getvalue() == "a" * 60 + "b" * 60
+        buf.close()
+
+    def test_len_counts_utf8_bytes(self):
+        buf = _buffer("héllo")
+        assert len(buf) == 6
+        assert not ResponseBuffer()
+
+    def test_replace_discards_previous_text(self):
+        buf = _buffer("partial answer " * 200, spool_bytes=64)
+        buf.replace("final")
+        assert buf.getvalue() == "final"
+        assert len(buf) == 5
+
+    def test_head_stops_at_char_boundary(self):
+        buf = _buffer("Error: é" * 3)
+        assert buf.head(6) == "Error:"
+        assert buf.head(8) == "Error: "
+        assert buf.head(9) == "Error: é"
+
+    def test_fileobj_is_rewound(self):
+        buf = _buffer("x" * 500, spool_bytes=64)
+        buf.head(10)
+        assert buf.fileobj().read() == b"x" * 500
+
+
+class TestChunks:
+    @pytest.mark.parametrize("text", [
+        "",
+        "short",
+        "line\n" * 50,
+        "x" * 250,
+        "a\n" + "é" * 120 + "\nb",
+        "\n\nend\n\n",
+    ])
+    def test_matches_split_message(self, text):
+        buf = _buffer(text, spool_bytes=64)
+        assert list(buf.chunks(100)) == split_message(text, 100)
+
+    def test_matches_split_message_on_random_text(self):
+        rng = random.Random(18)
+        alphabet = ["a", "b", " ", "\n", "\n\n", "é", "€", "🙂", "```"]
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) * rng.randint(1, 40) for _ in range(rng.randint(0, 30)))
+            buf = _buffer(text, spool_bytes=128)
+            assert list(buf.chunks(64)) == split_message(text, 64), repr(text)
+
+
+def test_tail_starts_on_char_boundary():
+    buf = _buffer("abc" + "é" * 4, spool_bytes=4)
+    assert buf.tail(3) == "é"
+    assert buf.tail(100) == "abc" + "é" * 4
@@ -0,0 +1,34 @@
+from room_index import RoomIndex
+
+
+def _room(i, last="2026-01-01T00:00:00.000Z"):
+    return {"id": f"r{i}", "lastActivity": last}
+
+
+def test_full_refresh_due_initially_and_after_interval():
+    idx = RoomIndex(full_refresh_seconds=100)
+    assert idx.full_refresh_due(0.0)
+    assert not idx.has_full_listing
+    idx.replace([_room(1)], now=0.0)
+    assert idx.has_full_listing
+    assert not idx.full_refresh_due(99.0)
+    assert idx.full_refresh_due(100.0)
+
+
+def test_replace_reports_added_and_removed():
+    idx = RoomIndex(3600)
+    idx.replace([_room(1), _room(2)], now=0.0)
+    added, removed = idx.replace([_room(2), _room(3)], now=1.0)
+    assert [r["id"] for r in added] == ["r3"]
+    assert removed == ["r1"]
+    assert idx.ids() == {"r2", "r3"}
+
+
+def test_merge_updates_existing_and_returns_new():
+    idx = RoomIndex(3600)
+    idx.replace([_room(i) for i in range(100)], now=0.0)
+    added = idx.merge([_room(5, last="2026-01-02T00:00:00.000Z"), _room(200)])
+    assert [r["id"] for r in added] == ["r200"]
+    assert len(idx) == 101
+    # Most recently active first, including the long tail.
+    assert idx.rooms()[0]["id"] == "r5"
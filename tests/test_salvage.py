@@ -0,0 +1,74 @@
+"""Tests for salvage.py: tool-activity summaries and follow-up prompts."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from response_buffer import ResponseBuffer
+from salvage import MAX_LISTED, TurnActivity, follow_up_prompt, salvage
+
+
+def _activity(*calls):
+    activity = TurnActivity()
+    for name, preview in calls:
+        activity.record(name, preview)
+    return activity
+
+
+class TestTurnActivity:
+    def test_groups_files_and_commands(self):
+        activity = _activity(
+            ("Read", "a.py"), ("Edit", "a.py"), ("Read", "b.py"), ("Read", "b.py"),
+            ("Bash", "pytest -q"), ("Grep", "TODO"), ("Grep", "FIXME"), ("WebFetch", ""),
+        )
+        assert activity.files_changed == ["a.py"]
+        assert activity.files_read == ["b.py"]  # changed files aren't listed twice
+        assert activity.commands == ["pytest -q"]
+        assert activity.summary_lines() == [
+            "- Changed: `a.py`",
+            "- Read: `b.py`",
+            "- Ran: `pytest -q`",
+            "- Other: Grep ×2, WebFetch ×1",
+        ]
+
+    def test_long_lists_are_capped(self):
+        activity = _activity(*[("Read", f"f{i}.py") for i in range(MAX_LISTED + 3)])
+        assert activity.summary_lines()[0].endswith("(+3 more)")
+
+
+class TestSalvage:
+    def test_nothing_to_salvage(self):
+        buf = ResponseBuffer()
+        assert not salvage(buf, TurnActivity(), "Error: timed out.")
+        assert buf.getvalue() == ""
+
+    def test_appends_notice_and_summary_after_text(self):
+        buf = ResponseBuffer()
+        buf.append("Step 1 done.")
+        activity = _activity(("Write", "out.txt"))
+        assert salvage(buf, activity, "Error: Claude timed out after 5m of inactivity.")
+        text = buf.getvalue()
+        assert text.startswith("Step 1 done.\n\n---\nError: Claude timed out after 5m of inactivity. Partial output")
+        assert "**Done before it stopped** (1 tool calls)" in text
+        assert "- Changed: `out.txt`" in text
+        assert text.endswith("Send `/continue` to pick up from here.")
+        assert activity.interrupted == "Claude timed out after 5m of inactivity"
+        assert activity.partial_tail == "Step 1 done."
+
+    def test_tools_without_text(self):
+        buf = ResponseBuffer()
+        assert salvage(buf, _activity(("Bash", "make")), "Cancelled.")
+        assert buf.getvalue().startswith("Cancelled.\n\n**Done before it stopped**")
+
+
+def test_follow_up_prompt_mentions_work_and_last_text():
+    buf = ResponseBuffer()
+    buf.append("Now running the tests\nthen the linter")
+    activity = _activity(("Edit", "app.py"), ("Bash", "pytest"))
+    salvage(buf, activity, "Cancelled.")
+    prompt = follow_up_prompt(activity)
+    assert prompt.startswith("Your previous turn was interrupted (Cancelled)")
+    assert "- Changed: `app.py`" in prompt
+    assert "> Now running the tests\n> then the linter" in prompt
+    assert "Don't redo work" in prompt
@@ -0,0 +1,149 @@
+"""Tests for session_lease.py: per-session turn serialization, in-process and across processes."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from session_lease import IN_PROCESS, OTHER_INSTANCE, SessionLeases, fcntl
+
+
+@pytest.mark.asyncio
+async def test_second_turn_waits_and_is_told(tmp_path):
+    leases = SessionLeases(tmp_path)
+    order = []
+    waits = []
+    release = asyncio.Event()
+
+    async def turn(name, on_wait=None):
+        async with leases.lease("sess", on_wait) as changed_elsewhere:
+            assert changed_elsewhere is False
+            order.append(f"{name} start")
+            if name == "first":
+                await release.wait()
+            order.append(f"{name} end")
+
+    first = asyncio.create_task(turn("first"))
+    await asyncio.sleep(0)
+    assert leases.busy("sess")
+    second = asyncio.create_task(turn("second", waits.append))
+    await asyncio.sleep(0.05)
+    assert order == ["first start"]
+    assert waits == [IN_PROCESS]
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert order == ["first start", "first end", "second start", "second end"]
+    assert not leases.busy("sess")
+    assert leases._entries == {}
+
+
+@pytest.mark.asyncio
+async def test_other_sessions_are_not_blocked(tmp_path):
+    leases = SessionLeases(tmp_path)
+    async with leases.lease("a"):
+        async with leases.lease("b"):
+            assert leases.busy("a") and leases.busy("b")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_no_entry(tmp_path):
+    leases = SessionLeases(tmp_path)
+    async with leases.lease("sess"):
+        waiter = asyncio.create_task(leases.lease("sess").__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+    assert leases._entries == {}
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+@pytest.mark.asyncio
+async def test_waits_for_lock_held_by_another_process(tmp_path):
+    holder = subprocess.Popen(
+        [sys.executable, "-c", textwrap.dedent(f"""
+            import fcntl, os, sys, time
+            fd = os.open({str(tmp_path / "sess.lock")!r}, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            print("locked", flush=True)
+            time.sleep(0.3)
+        """)],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        assert holder.stdout.readline() == b"locked\n"
+        leases = SessionLeases(tmp_path, poll_seconds=0.02)
+        waits = []
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with leases.lease("sess", waits.append) as changed_elsewhere:
+            assert changed_elsewhere is True
+            assert waits == [OTHER_INSTANCE]
+            assert loop.time() - start >= 0.1
+    finally:
+        holder.wait()
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+@pytest.mark.asyncio
+async def test_turn_by_another_instance_while_idle_is_detected(tmp_path):
+    ours, theirs = SessionLeases(tmp_path), SessionLeases(tmp_path)  # two bot instances
+    async with ours.lease("sess") as changed_elsewhere:
+        assert changed_elsewhere is False
+    async with ours.lease("sess") as changed_elsewhere:
+        assert changed_elsewhere is False
+
+    async with theirs.lease("sess"):  # uncontended: we were idle
+        pass
+
+    async with ours.lease("sess") as changed_elsewhere:
+        assert changed_elsewhere is True
+    async with ours.lease("sess") as changed_elsewhere:
+        assert changed_elsewhere is False
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+@pytest.mark.asyncio
+async def test_cleanup_removes_only_stale_unheld_lock_files(tmp_path):
+    leases = SessionLeases(tmp_path)
+    for sid in ("old", "held", "fresh"):
+        async with leases.lease(sid):
+            pass
+    past = os.path.getmtime(tmp_path / "old.lock") - 3600
+    for name in ("old.lock", "held.lock"):
+        os.utime(tmp_path / name, (past, past))
+
+    async with leases.lease("held"):
+        os.utime(tmp_path / "held.lock", (past, past))
+        assert leases.cleanup(max_age=60) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["fresh.lock", "held.lock"]
+    assert "old" not in leases._seen
+
+    async with leases.lease("old") as changed_elsewhere:
+        assert changed_elsewhere is False  # forgotten along with its file
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+@pytest.mark.asyncio
+async def test_waiter_relocks_a_file_removed_while_it_waited(tmp_path):
+    ours, theirs = SessionLeases(tmp_path, poll_seconds=0.01), SessionLeases(tmp_path)
+    lease = ours.lease("sess")
+    async with theirs.lease("sess"):
+        waiter = asyncio.create_task(lease.__aenter__())
+        await asyncio.sleep(0.03)
+        os.unlink(tmp_path / "sess.lock")  # as cleanup() does once it gets the lock
+    await waiter
+    try:
+        fd = os.open(tmp_path / "sess.lock", os.O_RDWR)
+        try:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        finally:
+            os.close(fd)
+    finally:
+        await lease.__aexit__(None, None, None)
@@ -0,0 +1,129 @@
+"""Tests for session_size.py: incremental session file size/token estimates."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import session_size
+from session_size import BYTES_PER_TOKEN, SessionSize, SessionSizes, scan
+
+
+def _line(entry: dict) -> str:
+    return json.dumps(entry) + "\n"
+
+
+def _user(text: str) -> str:
+    return _line({"type": "user", "message": {"role": "user", "content": text}})
+
+
+def _assistant(input_tokens: int, cache_read: int = 0, output: int = 0) -> str:
+    usage = {"input_tokens": input_tokens, "cache_read_input_tokens": cache_read, "output_tokens": output}
+    return _line({"type": "assistant", "message": {"role": "assistant", "content": "ok", "usage": usage}})
+
+
+BOUNDARY = _line({"type": "system", "subtype": "compact_boundary", "content": "Conversation compacted"})
+
+
+def test_bytes_estimate_without_usage(tmp_path):
+    path = tmp_path / "s.jsonl"
+    text = _user("x" * 400)
+    path.write_text(text)
+    size = scan(SessionSize(path))
+    assert size.file_bytes == len(text)
+    assert size.tokens == (len(text) - 1) // BYTES_PER_TOKEN
+
+
+def test_last_usage_replaces_earlier_bytes(tmp_path):
+    path = tmp_path / "s.jsonl"
+    after = _user("next question")
+    path.write_text(_user("x" * 4000) + _assistant(1000, cache_read=20000, output=500) + after)
+    size = scan(SessionSize(path))
+    assert size.context_tokens == 21500
+    assert size.tokens == 21500 + (len(after) - 1) // BYTES_PER_TOKEN
+
+
+def test_reads_only_appended_bytes(tmp_path, monkeypatch):
+    path = tmp_path / "s.jsonl"
+    path.write_text(_assistant(5000))
+    size = scan(SessionSize(path))
+    assert size.tokens == 5000
+
+    seen = []
+    real = SessionSize._add_line
+    monkeypatch.setattr(SessionSize, "_add_line", lambda self, line: (seen.append(line), real(self, line)))
+    with open(path, "a") as f:
+        f.write(_assistant(7000))
+    scan(size)
+    assert len(seen) == 1
+    assert size.tokens == 7000
+    assert size.file_bytes == path.stat().st_size
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    path = tmp_path / "s.jsonl"
+    line = _assistant(3000)
+    path.write_text(line[:20])
+    size = scan(SessionSize(path))
+    assert size.offset == 0 and size.tokens == 0
+
+    with open(path, "a") as f:
+        f.write(line[20:])
+    scan(size)
+    assert size.tokens == 3000
+    assert size.offset == len(line)
+
+
+def test_compact_boundary_resets_estimate(tmp_path):
+    path = tmp_path / "s.jsonl"
+    summary = _user("summary of the conversation")
+    path.write_text(_assistant(150000) + BOUNDARY + summary)
+    size = scan(SessionSize(path))
+    assert size.compactions == 1
+    assert size.tokens == (len(summary) - 1) // BYTES_PER_TOKEN
+    assert size.file_bytes == path.stat().st_size
+
+
+def test_rewritten_file_is_rescanned(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_text(_user("y" * 1000) + _assistant(9000))
+    size = scan(SessionSize(path))
+    assert size.tokens == 9000
+
+    replacement = tmp_path / "new.jsonl"
+    replacement.write_text(_assistant(10))
+    os.replace(replacement, path)
+    scan(size)
+    assert size.tokens == 10
+    assert size.offset == path.stat().st_size
+
+
+def test_missing_file_reads_as_empty(tmp_path):
+    size = scan(SessionSize(tmp_path / "gone.jsonl"))
+    assert size.tokens == 0 and size.file_bytes == 0
+
+
+def test_large_file_read_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_size, "READ_CHUNK_BYTES", 64)
+    path = tmp_path / "s.jsonl"
+    path.write_text("".join(_user(f"message {i}") for i in range(50)) + _assistant(42))
+    size = scan(SessionSize(path))
+    assert size.tokens == 42
+    assert size.offset == path.stat().st_size
+
+
+@pytest.mark.asyncio
+async def test_session_sizes_keeps_recent_files(tmp_path):
+    sizes = SessionSizes(max_files=2)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.jsonl"
+        path.write_text(_assistant(100 * (i + 1)))
+        paths.append(path)
+        assert (await sizes.measure(path)).tokens == 100 * (i + 1)
+    assert len(sizes) == 2
+    assert sizes.get(paths[0]) is None
+    assert sizes.get(paths[2]).tokens == 300
@@ -0,0 +1,67 @@
+"""Tests for spawner.py: spawning through the helper process, with real processes."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from proc_groups import kill_tree
+from spawner import SUPPORTED, SpawnHelper, SpawnHelperError
+
+pytestmark = pytest.mark.skipif(not SUPPORTED, reason="spawn helper needs Linux")
+
+
+@pytest_asyncio.fixture
+async def helper():
+    helper = SpawnHelper()
+    await helper.start({**os.environ, "SPAWNER_TEST": "from-helper"})
+    yield helper
+    await helper.close()
+
+
+@pytest.mark.asyncio
+async def test_pipes_env_and_exit_status(helper, tmp_path):
+    process = await helper.spawn(
+        ["/bin/sh", "-c", 'read line; echo "$line $SPAWNER_TEST $(pwd)"; exit 3'], str(tmp_path),
+    )
+    assert os.getsid(process.pid) == process.pid  # own session / process group
+    process.stdin.write(b"hello\n")
+    await process.stdin.drain()
+    assert await process.stdout.readline() == f"hello from-helper {tmp_path}\n".encode()
+    assert await asyncio.wait_for(process.wait(), 5) == 3
+    assert process.stdout.at_eof() or await process.stdout.read() == b""
+
+
+@pytest.mark.asyncio
+async def test_spawn_errors_are_oserrors(helper, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        await helper.spawn(["/bin/true"], str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError):
+        await helper.spawn([str(tmp_path / "no-such-binary")], str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_kill_tree_works_on_helper_children(helper, tmp_path):
+    process = await helper.spawn(["/bin/sh", "-c", "sleep 60 & wait"], str(tmp_path))
+    await kill_tree(process, grace=1.0)
+    assert process.returncode == -15
+
+
+@pytest.mark.asyncio
+async def test_helper_loss_falls_back(helper, tmp_path, monkeypatch):
+    monkeypatch.setattr("spawner.WATCH_INTERVAL_SECONDS", 0.05)
+    process = await helper.spawn(["/bin/sh", "-c", "sleep 0.3"], str(tmp_path))
+    helper._helper.kill()
+    await asyncio.sleep(0.2)
+    assert not helper.running
+    assert len(helper._watchers) == 1  # held until the process is seen to end
+    with pytest.raises(SpawnHelperError):
+        await helper.spawn(["/bin/true"], str(tmp_path))
+    # Exit status went with the helper, but the process is still seen to end.
+    assert await asyncio.wait_for(process.wait(), 5) == -1
+    await asyncio.sleep(0)
+    assert not helper._watchers
@@ -0,0 +1,164 @@
+"""Tests for stream_decode.py: type dispatch, skipping, bounded previews."""
+
+import asyncio
+import json
+import tracemalloc
+
+import pytest
+
+import metrics
+from stream_decode import (
+    TRUNCATED_NOTE, LineReader, compact_json, decode_line, decode_truncated, line_type, tool_preview,
+)
+
+
+def _line(obj, ensure_ascii=True) -> bytes:
+    return (json.dumps(obj, ensure_ascii=ensure_ascii) + "\n").encode()
+
+
+def test_assistant_blocks_decode_in_order():
+    line = _line({"type": "assistant", "message": {"content": [
+        {"type": "text", "text": "Let me look."},
+        {"type": "tool_use", "id": "t1", "name": "Read", "input": {"file_path": "/a.py"}},
+    ]}})
+    assert decode_line(line) == [("text", "Let me look."), ("tool_use", "Read", "t1", "/a.py")]
+
+
+def test_unused_types_are_skipped_without_parsing():
+    def never(_):
+        raise AssertionError("should not parse")
+
+    tool_result = _line({"type": "user", "message": {"content": [{"type": "tool_result", "content": "x" * 10000}]}})
+    assert line_type(tool_result) == "user"
+    assert decode_line(tool_result, loads=never) == []
+    assert decode_line(_line({"type": "system", "subtype": "init"}), loads=never) == []
+    signature = {"type": "stream_event", "event": {"type": "content_block_delta", "delta": {"type": "input_json_delta"}}}
+    assert decode_line(_line(signature), loads=never) == []
+
+
+def test_non_leading_type_still_parsed():
+    line = _line({"message": {"content": [{"type": "text", "text": "hi"}]}, "type": "assistant"})
+    assert line_type(line) is None
+    assert decode_line(line) == [("text", "hi")]
+
+
+def test_text_delta_and_result():
+    delta = {"type": "stream_event", "event": {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "He"}}}
+    assert decode_line(_line(delta)) == [("text_delta", "He")]
+    [(kind, data)] = decode_line(_line({"type": "result", "result": "done", "total_cost_usd": 0.1}))
+    assert kind == "result" and data["result"] == "done"
+
+
+@pytest.mark.parametrize("garbage", [b"", b"not json\n", b"[1, 2]\n", b'{"type": "assistant"\n', b"\xff\xfe\n"])
+def test_garbage_is_ignored(garbage):
+    assert decode_line(garbage) == []
+
+
+@pytest.mark.parametrize("value", [
+    {"url": "https://example.com", "prompt": "summarize"},
+    {"todos": [{"content": "a" * 100, "status": "pending"}, {"content": "b"}]},
+    {"n": 1, "flag": True, "none": None, "nested": {"deep": ["x", 2.5]}},
+    {"s": "quote\" and \\ backslash and é" * 5},
+])
+def test_compact_json_matches_truncated_dumps(value):
+    assert compact_json(value, 60) == json.dumps(value)[:60]
+
+
+def test_preview_of_huge_input_is_bounded():
+    big = {"notebook_path": "/n.ipynb", "new_source": "y" * 5_000_000}
+    assert tool_preview("NotebookEdit", big) == json.dumps(big)[:60]
+    assert tool_preview("Write", {"file_path": "/f", "content": "z" * 5_000_000}) == "/f"
+
+
+async def _read_all(data: bytes, max_line_bytes: int, chunk_size: int = 1000) -> list[tuple[bytes, bool]]:
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return [item async for item in LineReader(stream, max_line_bytes, chunk_size=chunk_size)]
+
+
+@pytest.mark.asyncio
+async def test_reader_reassembles_lines_longer_than_chunks():
+    long_line = _line({"type": "assistant", "message": {"content": [{"type": "text", "text": "x" * 5000}]}})
+    lines = await _read_all(_line({"type": "system"}) + long_line + b"tail-without-newline", 10_000)
+    assert lines == [(_line({"type": "system"}), False), (long_line, False), (b"tail-without-newline", False)]
+
+
+@pytest.mark.asyncio
+async def test_reader_drops_oversized_unwanted_line():
+    before = metrics.get("cli.oversized_lines_skipped")
+    echo = _line({"type": "user", "message": {"content": [{"type": "tool_result", "content": "y" * 50_000}]}})
+    result = _line({"type": "result", "result": "ok"})
+    assert await _read_all(echo + result, 4096) == [(result, False)]
+    assert metrics.get("cli.oversized_lines_skipped") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_reader_truncates_oversized_wanted_line_and_keeps_going():
+    write = _line({"type": "assistant", "message": {"content": [
+        {"type": "tool_use", "id": "t1", "name": "Write", "input": {"file_path": "/big.txt", "content": "z" * 50_000}},
+    ]}})
+    result = _line({"type": "result", "result": "ok"})
+    [(prefix, truncated), after] = await _read_all(write + result, 4096)
+    assert truncated and len(prefix) == 4096 and write.startswith(prefix)
+    assert after == (result, False)
+    assert decode_truncated(prefix) == [("tool_use", "Write", "t1", "/big.txt")]
+
+
+def test_decode_truncated_ignores_other_types():
+    assert decode_truncated(b'{"type": "stream_event", "event": {"delta": {"text": "aaaa') == []
+
+
+def test_decode_truncated_salvages_result_text():
+    line = _line({"type": "result", "duration_ms": 1234, "result": "answer " * 1000, "total_cost_usd": 0.5})
+    [(kind, data)] = decode_truncated(line[:300])
+    assert kind == "result"
+    assert data["duration_ms"] == 1234
+    assert data["result"].startswith("answer answer")
+    assert data["result"].endswith(TRUNCATED_NOTE)
+
+
+def test_decode_truncated_salvages_assistant_text_in_order():
+    line = _line({"type": "assistant", "message": {"content": [
+        {"type": "text", "text": 'Done \u00e9 "quoted"'},
+        {"type": "tool_use", "id": "t1", "name": "Write", "input": {"file_path": "/f"}},
+        {"type": "text", "text": "\u00e9" * 2000},
+    ]}}, ensure_ascii=False)
+    items = decode_truncated(line[:1001])  # cuts a 2-byte character in half
+    assert items[0] == ("text", 'Done \u00e9 "quoted"')
+    assert items[1] == ("tool_use", "Write", "t1", "/f")
+    kind, text = items[2]
+    assert kind == "text" and text.endswith(TRUNCATED_NOTE)
+    assert set(text[:-len(TRUNCATED_NOTE)]) == {"\u00e9"}
+
+
+def test_decode_truncated_handles_escape_cut_in_half():
+    line = _line({"type": "result", "result": "ab\u2603cd"})  # ascii-escaped: ab\\u2603cd
+    cut = line.index(b"\\u2603") + 4
+    [(_, data)] = decode_truncated(line[:cut])
+    assert data["result"] == "ab" + TRUNCATED_NOTE
+
+
+def test_large_tool_call_line_is_scanned_not_parsed():
+    big = "z\n" * 2_000_000
+    line = _line({"type": "assistant", "message": {"content": [
+        {"type": "text", "text": 'Writing "it" ☃.'},
+        {"type": "tool_use", "id": "t1", "name": "Write", "input": {"file_path": "/big.txt", "content": big}},
+        {"type": "tool_use", "id": "t2", "name": "Bash", "input": {"command": "wc -l /big.txt"}},
+    ]}})
+
+    def no_parse(_line):
+        raise AssertionError("parsed")
+
+    tracemalloc.start()
+    try:
+        items = decode_line(line, loads=no_parse)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert items == [
+        ("text", 'Writing "it" ☃.'),
+        ("tool_use", "Write", "t1", "/big.txt"),
+        ("tool_use", "Bash", "t2", "wc -l /big.txt"),
+    ]
+    assert peak < 1_000_000  # the line is 4 MB
@@ -0,0 +1,159 @@
+"""Tests for streaming.py: progressive edits, rollover, final render."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure config can import without real env vars
+os.environ.setdefault("WEBEX_BOT_TOKEN", "test-token")
+os.environ.setdefault("WEBEX_USER_EMAIL", "test@example.com")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot import split_message
+from claude_cli import TextDeltaEvent, TextEvent
+from rate_limiter import Priority
+from streaming import StreamingReply
+
+
+class _FakeLimiter:
+    def __init__(self):
+        self.busy = False
+
+    def congested(self):
+        return self.busy
+
+
+class _FakeAPI:
+    def __init__(self):
+        self.limiter = _FakeLimiter()
+        self.messages = {"thinking": "Thinking..."}
+        self.edits = []
+        self.sends = []
+        self.deleted = []
+        self.fail_edits = set()  # priorities whose edits fail
+        self.fail_sends = False
+        self._next = 0
+
+    async def edit_message(self, message_id, room_id, text, priority=Priority.REPLY):
+        self.edits.append((message_id, text, priority))
+        if priority in self.fail_edits:
+            return None
+        self.messages[message_id] = text
+        return {"id": message_id}
+
+    async def send_message(self, room_id, text, parent_id=None, priority=Priority.REPLY):
+        self.sends.append((text, priority))
+        if self.fail_sends:
+            return {}
+        self._next += 1
+        message_id = f"m{self._next}"
+        self.messages[message_id] = text
+        return {"id": message_id}
+
+    async def delete_message(self, message_id):
+        self.deleted.append(message_id)
+        self.messages.pop(message_id, None)
+
+
+def _stream(api, max_bytes=7000, interval=0.01):
+    return StreamingReply(api, "room", "thinking", lambda t: split_message(t, max_bytes), interval)
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_edited_into_thinking_message():
+    api = _FakeAPI()
+    stream = _stream(api)
+    assert not stream.started
+    for word in ("Hel", "lo", " world"):
+        stream.feed(TextDeltaEvent(text=word))
+    await asyncio.sleep(0.02)
+    assert api.messages["thinking"] == "Hello world"
+    assert api.edits[-1][2] is Priority.COSMETIC
+
+    stream.feed(TextEvent(text="Hello world"))  # full block: no duplicate
+    stream.feed(TextDeltaEvent(text="Done"))
+    await stream.finish("Done")
+    assert api.messages == {"thinking": "Done"}
+    assert api.edits[-1][2] is Priority.REPLY
+
+
+@pytest.mark.asyncio
+async def test_without_partial_messages_whole_blocks_stream():
+    api = _FakeAPI()
+    stream = _stream(api)
+    stream.feed(TextEvent(text="Looking at the file."))
+    stream.feed(TextEvent(text="Found it."))
+    await asyncio.sleep(0.02)
+    assert api.messages["thinking"] == "Looking at the file.\n\nFound it."
+    stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_rolls_over_and_final_render_drops_extra_messages():
+    api = _FakeAPI()
+    stream = _stream(api, max_bytes=20)
+    stream.feed(TextDeltaEvent(text="line one\nline two\nline three\nline four"))
+    await asyncio.sleep(0.02)
+    assert api.messages == {"thinking": "line one\nline two", "m1": "line three\nline four"}
+
+    assert api.sends == [("line three\nline four", Priority.COSMETIC)]
+
+    await stream.finish("short")
+    assert api.messages == {"thinking": "short"}
+    assert api.deleted == ["m1"]
+
+
+@pytest.mark.asyncio
+async def test_failed_preview_edit_does_not_skip_final_render():
+    api = _FakeAPI()
+    api.fail_edits = {Priority.COSMETIC}
+    stream = _stream(api)
+    stream.feed(TextDeltaEvent(text="Final answer"))
+    await asyncio.sleep(0.02)
+    assert api.messages["thinking"] == "Thinking..."
+
+    await stream.finish("Final answer")
+    assert api.edits[-1] == ("thinking", "Final answer", Priority.REPLY)
+    assert api.messages == {"thinking": "Final answer"}
+
+
+@pytest.mark.asyncio
+async def test_failed_rollover_send_is_not_tracked():
+    api = _FakeAPI()
+    api.fail_sends = True
+    stream = _stream(api, max_bytes=20)
+    stream.feed(TextDeltaEvent(text="line one\nline two\nline three\nline four"))
+    await asyncio.sleep(0.02)
+    assert stream._message_ids == ["thinking"]
+
+    api.fail_sends = False
+    await stream.finish("line one\nline two\nline three\nline four")
+    assert api.messages == {"thinking": "line one\nline two", "m1": "line three\nline four"}
+    assert api.deleted == []
+
+
+@pytest.mark.asyncio
+async def test_preview_waits_while_rate_limited():
+    api = _FakeAPI()
+    api.limiter.busy = True
+    stream = _stream(api)
+    stream.feed(TextDeltaEvent(text="partial"))
+    await asyncio.sleep(0.03)
+    assert api.edits == []
+    api.limiter.busy = False
+    await asyncio.sleep(0.03)
+    assert api.messages["thinking"] == "partial"
+    stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_unclosed_code_fence_is_closed_in_preview():
+    api = _FakeAPI()
+    stream = _stream(api)
+    stream.feed(TextDeltaEvent(text="```python\nprint(1)"))
+    await asyncio.sleep(0.02)
+    assert api.messages["thinking"].endswith("\n```")
+    stream.stop()
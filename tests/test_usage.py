@@ -0,0 +1,85 @@
+"""Tests for usage.py: process-tree sampling and per-key usage totals."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from procfs import _CLK_TCK, _PAGE_SIZE
+from usage import TurnUsage, UsageLedger, UsageSampler
+
+
+def _write_proc(root, pid, session, cpu_ticks, rss_mb, child_ticks=0):
+    d = root / str(pid)
+    d.mkdir(exist_ok=True)
+    pages = int(rss_mb * 1024 * 1024) // _PAGE_SIZE
+    (d / "stat").write_text(
+        f"{pid} (proc) S 1 {session} {session} 0 -1 0 0 0 0 0 {cpu_ticks} 0 {child_ticks} 0 20 0 1 0 1 0 {pages} 0\n"
+    )
+
+
+class TestUsageSampler:
+    @pytest.mark.asyncio
+    async def test_sums_tree_and_tracks_peak(self, tmp_path):
+        sampler = UsageSampler(interval=0, proc=tmp_path)
+        _write_proc(tmp_path, 100, 100, cpu_ticks=_CLK_TCK, rss_mb=100)
+        _write_proc(tmp_path, 101, 100, cpu_ticks=_CLK_TCK, rss_mb=50)
+        _write_proc(tmp_path, 200, 200, cpu_ticks=50 * _CLK_TCK, rss_mb=900)  # another session
+        usage = TurnUsage()
+        meter = sampler.start(100, usage)
+        assert (usage.cpu_seconds, usage.peak_rss_mb) == (2.0, 150.0)
+
+        # The child exits (reaped by the leader) and RSS drops: CPU keeps growing, peak stays.
+        (tmp_path / "101" / "stat").unlink()
+        (tmp_path / "101").rmdir()
+        _write_proc(tmp_path, 100, 100, cpu_ticks=2 * _CLK_TCK, rss_mb=80, child_ticks=_CLK_TCK)
+        sampler.sample()
+        assert (usage.cpu_seconds, usage.peak_rss_mb) == (3.0, 150.0)
+
+        # Process gone: the last reading stands.
+        (tmp_path / "100" / "stat").unlink()
+        assert sampler.stop(meter) is usage
+        assert usage.cpu_seconds == 3.0
+        assert usage.wall_seconds >= 0
+        assert len(sampler) == 0
+
+    @pytest.mark.asyncio
+    async def test_reused_process_counts_only_this_turn(self, tmp_path):
+        sampler = UsageSampler(interval=0, proc=tmp_path)
+        _write_proc(tmp_path, 100, 100, cpu_ticks=40 * _CLK_TCK, rss_mb=300)
+        usage = TurnUsage()
+        meter = sampler.start(100, usage, fresh=False)
+        _write_proc(tmp_path, 100, 100, cpu_ticks=45 * _CLK_TCK, rss_mb=320)
+        sampler.stop(meter)
+        assert usage.cpu_seconds == 5.0
+        assert usage.peak_rss_mb == 320.0
+
+
+class TestUsageLedger:
+    def test_aggregates_per_key(self):
+        ledger = UsageLedger()
+        ledger.record(TurnUsage(wall_seconds=10, cpu_seconds=2, peak_rss_mb=100, cost_usd=0.1), room="r", session="s1")
+        ledger.record(TurnUsage(wall_seconds=5, cpu_seconds=1, peak_rss_mb=300, cost_usd=0.2), room="r", session="s2")
+        room = ledger.get("room", "r")
+        assert room.turns == 2
+        assert room.cpu_seconds == 3
+        assert room.peak_rss_mb == 300
+        assert room.cost_usd == pytest.approx(0.3)
+        assert room.last.cost_usd == 0.2
+        assert ledger.get("session", "s1").turns == 1
+        assert ledger.get("thread", "t") is None
+        assert [k for k, _ in ledger.top("session")] == ["s1", "s2"]
+        assert ledger.snapshot()["room"]["r"]["turns"] == 2
+
+    def test_evicts_least_recently_used_keys(self):
+        ledger = UsageLedger(max_keys=2)
+        for key in ("a", "b", "a", "c"):
+            ledger.record(TurnUsage(), session=key)
+        assert set(ledger.snapshot()["session"]) == {"a", "c"}
+
+
+def test_describe():
+    usage = TurnUsage(wall_seconds=12.4, cpu_seconds=3.25, peak_rss_mb=350.2, cost_usd=0.0421)
+    assert usage.describe() == "12s wall · 3.2s CPU · peak 350 MB · $0.042"
@@ -86,6 +86,18 @@ class TestRequestRetry:
         assert result == {"ok": True}
         mock_sleep.assert_called_once_with(5)
 
+    @pytest.mark.asyncio
+    async def test_rate_limit_holds_other_callers(self, api):
+        rate_limited = _make_response(429, headers={"Retry-After": "30"})
+        success = _make_response(200, {"ok": True})
+        api._client.request.side_effect = [rate_limited, success]
+
+        with patch("webex_api.asyncio.sleep", new_callable=AsyncMock):
+            await api._request("GET", "/test")
+
+        # The retrying caller slept it out; everyone else sees the hold.
+        assert api.limiter.congested()
+
     @pytest.mark.asyncio
     async def test_rate_limit_exhausted_raises(self, api):
         rate_limited = _make_response(429, headers={"Retry-After": "0"})
@@ -146,3 +158,115 @@ class TestClientNotStarted:
         api = WebexAPI()
         with pytest.raises(RuntimeError, match="Call start"):
             await api._request("GET", "/test")
+
+
+class TestMapConcurrent:
+    @pytest.mark.asyncio
+    async def test_results_in_input_order(self, api):
+        async def fetch(n):
+            await asyncio.sleep(0.001 * (5 - n))
+            return n * 10
+
+        assert await api.map_concurrent(fetch, [0, 1, 2, 3, 4], concurrency=3) == [0, 10, 20, 30, 40]
+
+    @pytest.mark.asyncio
+    async def test_respects_concurrency_limit(self, api):
+        in_flight = 0
+        peak = 0
+
+        async def fetch(n):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return n
+
+        await api.map_concurrent(fetch, list(range(20)), concurrency=4)
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_failure_is_returned_in_place(self, api):
+        async def fetch(n):
+            if n == 1:
+                raise httpx.ConnectError("down")
+            return n
+
+        results = await api.map_concurrent(fetch, [0, 1, 2], concurrency=2)
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], httpx.ConnectError)
+
+
+class TestMessagePagination:
+    @pytest.mark.asyncio
+    async def test_follows_link_header_until_exhausted(self, api):
+        page1 = _make_response(
+            200, {"items": [{"id": "m3"}, {"id": "m2"}]},
+            headers={"Link": '<https://webexapis.com/v1/messages?roomId=R&max=2&beforeMessage=m2>; rel="next"'},
+        )
+        page2 = _make_response(200, {"items": [{"id": "m1"}]})
+        api._client.request.side_effect = [page1, page2]
+
+        pages = [page async for page in api.iter_message_pages("R", page_size=2)]
+
+        assert pages == [[{"id": "m3"}, {"id": "m2"}], [{"id": "m1"}]]
+        first, second = api._client.request.call_args_list
+        assert first.kwargs["params"] == {"roomId": "R", "max": "2"}
+        assert second.args[1].endswith("beforeMessage=m2")
+        assert second.kwargs["params"] is None
+
+    @pytest.mark.asyncio
+    async def test_mentions_and_before_message_params(self, api):
+        api._client.request.return_value = _make_response(200, {"items": []})
+
+        pages = [page async for page in api.iter_message_pages("R", mentioned=True, before_message="m9")]
+
+        assert pages == []
+        assert api._client.request.call_args.kwargs["params"] == {
+            "roomId": "R", "max": "50", "mentionedPeople": "me", "beforeMessage": "m9",
+        }
+
+
+class TestRoomListing:
+    @pytest.mark.asyncio
+    async def test_iter_rooms_walks_every_page(self, api):
+        page1 = _make_response(
+            200, {"items": [{"id": "r1"}]},
+            headers={"Link": '<https://webexapis.com/v1/rooms?cursor=abc>; rel="next"'},
+        )
+        page2 = _make_response(200, {"items": [{"id": "r2"}]})
+        api._client.request.side_effect = [page1, page2]
+
+        pages = [page async for page in api.iter_rooms("group")]
+
+        assert pages == [[{"id": "r1"}], [{"id": "r2"}]]
+        assert api._client.request.call_args_list[0].kwargs["params"] == {
+            "type": "group", "sortBy": "lastactivity", "max": "1000",
+        }
+
+
+class TestSendFile:
+    @pytest.mark.asyncio
+    async def test_multipart_upload_rewinds_on_retry(self, api):
+        import io
+
+        seen = []
+
+        def request(method, path, **kwargs):
+            fileobj = kwargs["files"]["files"][1]
+            seen.append(fileobj.read())
+            if len(seen) == 1:
+                return _make_response(503)
+            return _make_response(200, {"id": "m1"})
+
+        api._client.request.side_effect = request
+        with patch("webex_api.asyncio.sleep", new_callable=AsyncMock):
+            result = await api.send_file("r1", "see file", "out.md", io.BytesIO(b"# big"), parent_id="p1")
+
+        assert result == {"id": "m1"}
+        assert seen == [b"# big", b"# big"]
+        kwargs = api._client.request.call_args.kwargs
+        assert kwargs["data"] == {"roomId": "r1", "markdown": "see file", "parentId": "p1"}
+        assert kwargs["files"]["files"][0] == "out.md"
+        assert kwargs["files"]["files"][2] == "text/markdown"
+        assert kwargs["json"] is None
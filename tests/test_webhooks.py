@@ -0,0 +1,107 @@
+"""Tests for webhooks.py helpers and the http_server.py receiver they feed."""
+
+import asyncio
+import json
+
+import pytest
+
+from http_server import HttpServer, Request, Response
+from webhooks import parse_message_event, sign, verify_signature
+
+SECRET = "s3cret"
+
+# Recorded messages:created delivery (ids shortened).
+RECORDED_EVENT = {
+    "id": "WH1",
+    "name": "claude-webex-bridge direct",
+    "resource": "messages",
+    "event": "created",
+    "filter": "roomType=direct",
+    "orgId": "ORG",
+    "createdBy": "BOT",
+    "appId": "APP",
+    "ownedBy": "creator",
+    "status": "active",
+    "actorId": "USER",
+    "data": {
+        "id": "MSG1",
+        "roomId": "ROOM1",
+        "roomType": "direct",
+        "personId": "USER",
+        "personEmail": "test@example.com",
+        "created": "2026-01-01T00:00:00.000Z",
+    },
+}
+
+
+def test_signature_roundtrip():
+    body = json.dumps(RECORDED_EVENT).encode()
+    assert verify_signature(body, sign(body, SECRET), SECRET)
+
+
+def test_signature_rejects_tampered_body_or_wrong_secret():
+    body = json.dumps(RECORDED_EVENT).encode()
+    sig = sign(body, SECRET)
+    assert not verify_signature(body + b" ", sig, SECRET)
+    assert not verify_signature(body, sig, "other")
+    assert not verify_signature(body, "", SECRET)
+    assert not verify_signature(body, sig, "")
+
+
+def test_signature_header_case_insensitive():
+    body = b"{}"
+    assert verify_signature(body, sign(body, SECRET).upper(), SECRET)
+
+
+def test_parse_message_event_returns_data():
+    data = parse_message_event(json.dumps(RECORDED_EVENT).encode())
+    assert data["id"] == "MSG1"
+    assert data["roomType"] == "direct"
+
+
+def test_parse_ignores_other_events_and_garbage():
+    other = dict(RECORDED_EVENT, event="deleted")
+    assert parse_message_event(json.dumps(other).encode()) is None
+    assert parse_message_event(b"not json") is None
+    assert parse_message_event(b"[]") is None
+    assert parse_message_event(json.dumps(dict(RECORDED_EVENT, data={})).encode()) is None
+
+
+async def _post(port: int, path: str, body: bytes, headers: dict[str, str]) -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(head.encode() + b"\r\n" + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    status_line, _, rest = raw.partition(b"\r\n")
+    return int(status_line.split()[1]), rest.split(b"\r\n\r\n", 1)[1]
+
+
+@pytest.mark.asyncio
+async def test_server_routes_recorded_payload():
+    received = []
+
+    async def handler(request: Request) -> Response:
+        if not verify_signature(request.body, request.headers.get("x-spark-signature", ""), SECRET):
+            return Response(status=401)
+        received.append(parse_message_event(request.body))
+        return Response(status=200, body=b"ok")
+
+    server = HttpServer("127.0.0.1", 0)
+    server.add_route("POST", "/webhooks/messages", handler)
+    await server.start()
+    try:
+        body = json.dumps(RECORDED_EVENT).encode()
+        status, payload = await _post(server.port, "/webhooks/messages", body, {"X-Spark-Signature": sign(body, SECRET)})
+        assert (status, payload) == (200, b"ok")
+        assert received[0]["id"] == "MSG1"
+
+        status, _ = await _post(server.port, "/webhooks/messages", body, {"X-Spark-Signature": "bad"})
+        assert status == 401
+
+        status, _ = await _post(server.port, "/nope", body, {})
+        assert status == 404
+    finally:
+        await server.close()
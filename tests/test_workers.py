@@ -0,0 +1,174 @@
+"""Tests for workers.py: per-key serial execution, isolation, cancellation, coalescing."""
+
+import asyncio
+
+import pytest
+
+from workers import Coalescer, RoomWorkers
+
+
+@pytest.mark.asyncio
+async def test_jobs_for_one_key_run_in_order():
+    workers = RoomWorkers()
+    seen = []
+
+    async def job(n):
+        await asyncio.sleep(0.01 * (3 - n))
+        seen.append(n)
+
+    for n in range(3):
+        workers.submit("room", lambda n=n: job(n))
+    await asyncio.sleep(0.1)
+    assert seen == [0, 1, 2]
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_key_does_not_block_other_keys():
+    workers = RoomWorkers()
+    release = asyncio.Event()
+    done = []
+
+    async def slow():
+        await release.wait()
+        done.append("slow")
+
+    async def fast():
+        done.append("fast")
+
+    workers.submit("a", slow)
+    workers.submit("b", fast)
+    await asyncio.sleep(0.01)
+    assert done == ["fast"]
+    assert workers.busy("a")
+    release.set()
+    await asyncio.sleep(0.01)
+    assert done == ["fast", "slow"]
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_current_keeps_worker_and_queue():
+    workers = RoomWorkers()
+    done = []
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    async def after():
+        done.append("after")
+
+    workers.submit("room", forever)
+    workers.submit("room", after)
+    await asyncio.sleep(0.01)
+    assert workers.pending("room") == 1
+    assert workers.cancel_current("room") is True
+    await asyncio.sleep(0.01)
+    assert done == ["after"]
+    assert not workers.busy("room")
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_job_does_not_kill_worker():
+    workers = RoomWorkers()
+    done = []
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    async def ok():
+        done.append("ok")
+
+    workers.submit("room", boom)
+    workers.submit("room", ok)
+    await asyncio.sleep(0.01)
+    assert done == ["ok"]
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_worker_exits_and_restarts_on_submit():
+    workers = RoomWorkers(idle_seconds=0.01)
+    done = []
+
+    async def job():
+        done.append(1)
+
+    workers.submit("room", job)
+    await asyncio.sleep(0.05)
+    assert "room" not in workers._workers
+    workers.submit("room", job)
+    await asyncio.sleep(0.01)
+    assert done == [1, 1]
+    await workers.close()
+
+
+def _recorder():
+    batches = []
+
+    async def run(items):
+        batches.append(items)
+
+    return batches, run
+
+
+@pytest.mark.asyncio
+async def test_burst_within_window_becomes_one_batch():
+    workers = RoomWorkers()
+    co = Coalescer(workers, window=0.02)
+    batches, run = _recorder()
+    assert co.add("room", "a", run) is True
+    await asyncio.sleep(0.01)
+    assert co.add("room", "b", run) is False
+    await asyncio.sleep(0.01)
+    co.add("room", "c", run)
+    assert batches == []  # debounce re-armed by each message
+    await asyncio.sleep(0.05)
+    assert batches == [["a", "b", "c"]]
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_messages_during_a_turn_ride_along_in_the_next():
+    workers = RoomWorkers()
+    co = Coalescer(workers, window=0)
+    release = asyncio.Event()
+    seen = []
+
+    async def run(items):
+        seen.append(items)
+        if len(seen) == 1:
+            await release.wait()
+
+    co.add("room", "first", run)
+    await asyncio.sleep(0.01)
+    for text in ("x", "y", "z"):
+        co.add("room", text, run)
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.sleep(0.01)
+    assert seen == [["first"], ["x", "y", "z"]]
+    await workers.close()
+
+
+@pytest.mark.asyncio
+async def test_seal_keeps_batch_ahead_of_following_job():
+    workers = RoomWorkers()
+    co = Coalescer(workers, window=10)
+    order = []
+
+    async def run(items):
+        order.append(items)
+
+    async def command():
+        order.append("/new")
+
+    co.add("room", "before", run)
+    co.seal("room")
+    workers.submit("room", command)
+    co.add("room", "after", run)
+    co.seal("room")
+    await asyncio.sleep(0.01)
+    assert order == [["before"], "/new", ["after"]]
+    await workers.close()
@@ -0,0 +1,169 @@
+"""Per-turn resource accounting for CLI processes.
+
+UsageSampler meters the process tree of every running turn: all processes
+in the `claude` process's session (see proc_groups.py), read from
+/proc/<pid>/stat in one sweep per interval shared by all turns. A turn's CPU
+time is the growth of the tree's user+system time (including children it
+has already reaped) over the turn, and its peak RSS the largest tree total
+seen. The `result` event adds Claude's own cost and duration.
+
+UsageLedger aggregates finished turns per room, thread and session for
+/status and the metrics endpoint.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from procfs import PROC, list_processes, read_peak_rss_mb
+
+
+@dataclass
+class TurnUsage:
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    cost_usd: float = 0.0  # from the result event
+    duration_ms: int = 0  # from the result event
+
+    def describe(self) -> str:
+        parts = [f"{self.wall_seconds:.0f}s wall", f"{self.cpu_seconds:.1f}s CPU"]
+        if self.peak_rss_mb:
+            parts.append(f"peak {self.peak_rss_mb:.0f} MB")
+        if self.cost_usd:
+            parts.append(f"${self.cost_usd:.3f}")
+        return " · ".join(parts)
+
+
+class TurnMeter:
+    """One turn's running measurements; created by UsageSampler.start()."""
+
+    def __init__(self, pid: int, usage: TurnUsage, fresh: bool) -> None:
+        self.pid = pid
+        self.usage = usage
+        self.fresh = fresh  # process started for this turn (its lifetime peak RSS counts)
+        self.started = time.monotonic()
+        self._cpu_base: float | None = None
+
+    def observe(self, cpu_seconds: float, rss_mb: float) -> None:
+        if self._cpu_base is None:
+            self._cpu_base = 0.0 if self.fresh else cpu_seconds
+        self.usage.cpu_seconds = max(self.usage.cpu_seconds, cpu_seconds - self._cpu_base)
+        self.usage.peak_rss_mb = max(self.usage.peak_rss_mb, rss_mb)
+
+
+class UsageSampler:
+    """Samples every metered turn's process tree every `interval` seconds."""
+
+    def __init__(self, interval: float, proc: Path = PROC) -> None:
+        self._interval = interval
+        self._proc = proc
+        self._meters: list[TurnMeter] = []
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._meters)
+
+    def start(self, pid: int, usage: TurnUsage, fresh: bool = True) -> TurnMeter:
+        meter = TurnMeter(pid, usage, fresh)
+        self._meters.append(meter)
+        self.sample([meter])
+        if self._interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return meter
+
+    def stop(self, meter: TurnMeter) -> TurnUsage:
+        """Take a last sample (if the tree is still there) and finish the turn."""
+        self.sample([meter])
+        if meter in self._meters:
+            self._meters.remove(meter)
+        meter.usage.wall_seconds = time.monotonic() - meter.started
+        return meter.usage
+
+    def sample(self, meters: list[TurnMeter] | None = None) -> None:
+        """One /proc sweep, credited to each meter's session."""
+        meters = self._meters if meters is None else meters
+        if not meters:
+            return
+        sessions = {m.pid for m in meters}
+        cpu: defaultdict[int, float] = defaultdict(float)
+        rss: defaultdict[int, float] = defaultdict(float)
+        for p in list_processes(self._proc):
+            if p.session in sessions:
+                cpu[p.session] += p.cpu_seconds + p.children_cpu_seconds
+                rss[p.session] += p.rss_mb
+        for meter in meters:
+            if meter.pid not in cpu:
+                continue  # exited: keep the last reading
+            meter.observe(cpu[meter.pid], rss[meter.pid])
+            if meter.fresh:
+                meter.usage.peak_rss_mb = max(
+                    meter.usage.peak_rss_mb, read_peak_rss_mb(meter.pid, self._proc) or 0.0,
+                )
+
+    async def _run(self) -> None:
+        while self._meters:
+            await asyncio.sleep(self._interval)
+            self.sample()
+
+
+@dataclass
+class UsageTotals:
+    turns: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    cost_usd: float = 0.0
+    peak_rss_mb: float = 0.0  # largest single-turn peak
+    last: TurnUsage | None = None
+
+    def add(self, usage: TurnUsage) -> None:
+        self.turns += 1
+        self.wall_seconds += usage.wall_seconds
+        self.cpu_seconds += usage.cpu_seconds
+        self.cost_usd += usage.cost_usd
+        self.peak_rss_mb = max(self.peak_rss_mb, usage.peak_rss_mb)
+        self.last = usage
+
+    def describe(self) -> str:
+        text = f"{self.turns} turn{'s' if self.turns != 1 else ''} · {self.cpu_seconds:.1f}s CPU"
+        text += f" · peak {self.peak_rss_mb:.0f} MB"
+        if self.cost_usd:
+            text += f" · ${self.cost_usd:.2f}"
+        return text
+
+
+class UsageLedger:
+    """Finished-turn totals per (kind, key), e.g. ("room", room_id).
+
+    Each kind keeps its `max_keys` most recently used keys.
+    """
+
+    def __init__(self, max_keys: int = 1000) -> None:
+        self._max_keys = max_keys
+        self._totals: dict[str, OrderedDict[str, UsageTotals]] = defaultdict(OrderedDict)
+
+    def record(self, usage: TurnUsage, **keys: str | None) -> None:
+        """Add a turn under each given key, e.g. record(u, room=r, session=s)."""
+        for kind, key in keys.items():
+            if not key:
+                continue
+            table = self._totals[kind]
+            totals = table.get(key)
+            if totals is None:
+                totals = table[key] = UsageTotals()
+            table.move_to_end(key)
+            totals.add(usage)
+            while len(table) > self._max_keys:
+                table.popitem(last=False)
+
+    def get(self, kind: str, key: str | None) -> UsageTotals | None:
+        return self._totals[kind].get(key) if key else None
+
+    def top(self, kind: str, n: int = 5, by: str = "cpu_seconds") -> list[tuple[str, UsageTotals]]:
+        return sorted(self._totals[kind].items(), key=lambda kv: getattr(kv[1], by), reverse=True)[:n]
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        return {kind: {key: asdict(t) for key, t in table.items()} for kind, table in self._totals.items()}
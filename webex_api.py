@@ -2,15 +2,28 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
+from typing import IO, Any, AsyncIterator, Awaitable, Callable, Sequence, TypeVar
 
 import httpx
 
-from config import WEBEX_BASE_URL, WEBEX_BOT_TOKEN
+from config import POLL_FETCH_CONCURRENCY, WEBEX_BASE_URL, WEBEX_BOT_TOKEN, WEBEX_BURST, WEBEX_REQUESTS_PER_SECOND
+from rate_limiter import Priority, RateLimiter
 
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 3
 
+T = TypeVar("T")
+
+_LINK_NEXT = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+
+def _next_link(response: httpx.Response) -> str | None:
+    """URL of the next page from a Webex `Link: <...>; rel="next"` header."""
+    match = _LINK_NEXT.search(response.headers.get("Link", ""))
+    return match.group(1) if match else None
+
 
 class WebexAPI:
     """Thin async wrapper around the Webex REST API using httpx."""
@@ -19,16 +32,19 @@ class WebexAPI:
         self._client: httpx.AsyncClient | None = None
         self.bot_id: str | None = None
         self.bot_display_name: str = ""
+        # One bucket for every call this client makes, so polling, replies
+        # and "Thinking..." edits share (and back off from) the same limit.
+        self.limiter = RateLimiter(WEBEX_REQUESTS_PER_SECOND, WEBEX_BURST)
 
     async def start(self) -> None:
         """Initialize the HTTP client, verify the token, and cache bot_id."""
         self._client = httpx.AsyncClient(
             base_url=WEBEX_BASE_URL,
-            headers={
-                "Authorization": f"Bearer {WEBEX_BOT_TOKEN}",
-                "Content-Type": "application/json",
-            },
+            # No default Content-Type: httpx sets JSON or multipart per request.
+            headers={"Authorization": f"Bearer {WEBEX_BOT_TOKEN}"},
             timeout=30.0,
+            # Keep enough warm connections for a full concurrent poll fan-out.
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=max(20, POLL_FETCH_CONCURRENCY)),
         )
         data = await self._request("GET", "/people/me")
         self.bot_id = data["id"]
@@ -47,14 +63,40 @@ class WebexAPI:
         path: str,
         json: dict | None = None,
         params: dict | None = None,
+        priority: Priority = Priority.REPLY,
     ) -> dict:
         """Make an API request with rate-limit and transient-error retry handling."""
+        response = await self._send(method, path, json=json, params=params, priority=priority)
+        return response.json()
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        json: dict | None = None,
+        params: dict | None = None,
+        priority: Priority = Priority.REPLY,
+        data: dict | None = None,
+        files: dict | None = None,
+    ) -> httpx.Response:
+        """_request, but returning the raw response (for headers like Link).
+
+        data/files send a multipart form instead of JSON; file objects are
+        rewound before each attempt.
+        """
         if self._client is None:
             raise RuntimeError("Call start() before making requests")
 
+        waited_until = 0.0
         for attempt in range(1, MAX_RETRIES + 1):
+            await self.limiter.acquire(priority, waited_until=waited_until)
+            upload = {}
+            if files is not None:
+                for _, fileobj, _ in files.values():
+                    fileobj.seek(0)
+                upload = {"data": data, "files": files}
             try:
-                response = await self._client.request(method, path, json=json, params=params)
+                response = await self._client.request(method, path, json=json, params=params, **upload)
             except httpx.RequestError as exc:
                 # Transient network errors (connect, read, DNS, etc.)
                 if attempt < MAX_RETRIES:
@@ -76,6 +118,8 @@ class WebexAPI:
                     "Rate limited (attempt %d/%d), retrying in %ds",
                     attempt, MAX_RETRIES, retry_after,
                 )
+                # Hold every other caller too; this one sleeps it out itself.
+                waited_until = self.limiter.hold(retry_after)
                 await asyncio.sleep(retry_after)
                 continue
 
@@ -94,7 +138,7 @@ class WebexAPI:
                 continue
 
             response.raise_for_status()
-            return response.json()
+            return response
 
         # Exhausted retries
         logger.error("Retries exhausted after %d attempts", MAX_RETRIES)
@@ -104,12 +148,36 @@ class WebexAPI:
             response=response,
         )
 
+    async def map_concurrent(
+        self,
+        fn: Callable[[T], Awaitable[Any]],
+        items: Sequence[T],
+        concurrency: int = POLL_FETCH_CONCURRENCY,
+    ) -> list[Any]:
+        """Run fn(item) for every item with at most `concurrency` calls in flight.
+
+        Results are returned in input order. A call that raises yields its
+        exception in place of a result, so one failing room does not abort the
+        rest of the fan-out.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(item: T) -> Any:
+            async with semaphore:
+                try:
+                    return await fn(item)
+                except Exception as e:
+                    return e
+
+        return list(await asyncio.gather(*(run(item) for item in items)))
+
     async def list_direct_rooms(self, max_rooms: int = 50) -> list[dict]:
         """List direct (1:1) rooms sorted by last activity."""
         data = await self._request(
             "GET",
             "/rooms",
             params={"type": "direct", "sortBy": "lastactivity", "max": str(max_rooms)},
+            priority=Priority.POLL,
         )
         return data.get("items", [])
 
@@ -119,6 +187,7 @@ class WebexAPI:
             "GET",
             "/rooms",
             params={"type": "group", "sortBy": "lastactivity", "max": str(max_rooms)},
+            priority=Priority.POLL,
         )
         return data.get("items", [])
 
@@ -128,6 +197,7 @@ class WebexAPI:
             "GET",
             "/messages",
             params={"roomId": room_id, "max": str(max_messages)},
+            priority=Priority.POLL,
         )
         return data.get("items", [])
 
@@ -137,15 +207,130 @@ class WebexAPI:
             "GET",
             "/messages",
             params={"roomId": room_id, "mentionedPeople": "me", "max": str(max_messages)},
+            priority=Priority.POLL,
         )
         return data.get("items", [])
 
-    async def send_message(self, room_id: str, text: str, parent_id: str | None = None) -> dict:
+    async def get_message(self, message_id: str) -> dict:
+        """Fetch a single message by id (webhook payloads omit the text)."""
+        return await self._request("GET", f"/messages/{message_id}", priority=Priority.POLL)
+
+    async def list_webhooks(self) -> list[dict]:
+        """List webhooks registered by this bot."""
+        data = await self._request("GET", "/webhooks", params={"max": "100"}, priority=Priority.POLL)
+        return data.get("items", [])
+
+    async def create_webhook(
+        self, name: str, target_url: str, resource: str, event: str,
+        filter: str = "", secret: str = "",
+    ) -> dict:
+        """Register a webhook."""
+        payload = {"name": name, "targetUrl": target_url, "resource": resource, "event": event}
+        if filter:
+            payload["filter"] = filter
+        if secret:
+            payload["secret"] = secret
+        return await self._request("POST", "/webhooks", json=payload)
+
+    async def delete_webhook(self, webhook_id: str) -> None:
+        """Delete a webhook. Failures are logged and swallowed."""
+        if self._client is None:
+            return
+        try:
+            await self.limiter.acquire(Priority.POLL)
+            response = await self._client.request("DELETE", f"/webhooks/{webhook_id}")
+            response.raise_for_status()
+        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+            logger.warning("Failed to delete webhook %s: %s", webhook_id, e)
+
+    async def ensure_webhooks(self, wanted: dict[str, str], target_url: str, secret: str) -> None:
+        """Make the bot's messages:created webhooks match `wanted` ({name: filter}).
+
+        Same-named hooks pointing elsewhere, with a different filter, or left
+        disabled by Webex after delivery failures are replaced; matching hooks
+        are kept. Webex does not return the secret, so a changed secret needs
+        the hooks deleted by hand (or a renamed hook).
+        """
+        existing = await self.list_webhooks()
+        for name, filter in wanted.items():
+            current = [h for h in existing if h.get("name") == name]
+            keep = next(
+                (
+                    h for h in current
+                    if h.get("targetUrl") == target_url
+                    and h.get("filter", "") == filter
+                    and h.get("status", "active") == "active"
+                ),
+                None,
+            )
+            for hook in current:
+                if hook is not keep:
+                    await self.delete_webhook(hook["id"])
+            if keep is None:
+                await self.create_webhook(name, target_url, "messages", "created", filter=filter, secret=secret)
+                logger.info("Registered webhook %r -> %s", name, target_url)
+
+    async def iter_message_pages(
+        self,
+        room_id: str,
+        mentioned: bool = False,
+        before_message: str | None = None,
+        page_size: int = 50,
+    ) -> AsyncIterator[list[dict]]:
+        """Yield pages of a room's messages (newest first), walking back in time.
+
+        Starts before `before_message` if given, then follows the `Link:
+        rel="next"` header until Webex reports no more pages. Stop iterating
+        early to bound the number of requests.
+        """
+        params = {"roomId": room_id, "max": str(page_size)}
+        if mentioned:
+            params["mentionedPeople"] = "me"
+        if before_message:
+            params["beforeMessage"] = before_message
+        async for items in self._iter_pages("/messages", params):
+            yield items
+
+    async def iter_rooms(self, room_type: str, page_size: int = 1000) -> AsyncIterator[list[dict]]:
+        """Yield every room of a type ("direct" or "group"), a page at a time."""
+        params = {"type": room_type, "sortBy": "lastactivity", "max": str(page_size)}
+        async for items in self._iter_pages("/rooms", params):
+            yield items
+
+    async def _iter_pages(self, path: str, params: dict) -> AsyncIterator[list[dict]]:
+        """GET path, then follow `Link: rel="next"` until no pages remain."""
+        url: str | None = path
+        query: dict | None = params
+        while url is not None:
+            response = await self._send("GET", url, params=query, priority=Priority.POLL)
+            items = response.json().get("items", [])
+            if not items:
+                return
+            yield items
+            url = _next_link(response)
+            query = None  # the next link carries its own query string
+
+    async def send_message(
+        self, room_id: str, text: str, parent_id: str | None = None, priority: Priority = Priority.REPLY,
+    ) -> dict:
         """Send a text message to a room, optionally as a threaded reply."""
         payload = {"roomId": room_id, "markdown": text}
         if parent_id:
             payload["parentId"] = parent_id
-        return await self._request("POST", "/messages", json=payload)
+        return await self._request("POST", "/messages", json=payload, priority=priority)
+
+    async def send_file(
+        self, room_id: str, text: str, filename: str, fileobj: IO[bytes],
+        content_type: str = "text/markdown", parent_id: str | None = None,
+    ) -> dict:
+        """Send a message with one file attachment (multipart upload, max 100 MB)."""
+        form = {"roomId": room_id, "markdown": text}
+        if parent_id:
+            form["parentId"] = parent_id
+        response = await self._send(
+            "POST", "/messages", data=form, files={"files": (filename, fileobj, content_type)},
+        )
+        return response.json()
 
     async def send_card_message(self, room_id: str, card: dict, fallback_text: str) -> dict:
         """Send a message with an Adaptive Card attachment."""
@@ -181,13 +366,19 @@ class WebexAPI:
             },
         )
 
-    async def edit_message(self, message_id: str, room_id: str, text: str) -> dict | None:
-        """Edit an existing message. Returns None on failure (caller should fallback)."""
+    async def edit_message(
+        self, message_id: str, room_id: str, text: str, priority: Priority = Priority.REPLY,
+    ) -> dict | None:
+        """Edit an existing message. Returns None on failure (caller should fallback).
+
+        Pass Priority.COSMETIC for progress edits that may yield to replies and polling.
+        """
         try:
             return await self._request(
                 "PUT",
                 f"/messages/{message_id}",
                 json={"roomId": room_id, "markdown": text},
+                priority=priority,
             )
         except (httpx.HTTPStatusError, httpx.RequestError) as e:
             logger.warning("Failed to edit message %s: %s", message_id, e)
@@ -198,6 +389,7 @@ class WebexAPI:
         if self._client is None:
             return
         try:
+            await self.limiter.acquire(Priority.REPLY)
             response = await self._client.request("DELETE", f"/messages/{message_id}")
             response.raise_for_status()
         except (httpx.HTTPStatusError, httpx.RequestError) as e:
@@ -0,0 +1,47 @@
+"""Pure helpers for Webex webhook ingestion (no I/O, unit-tested)."""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+
+WEBHOOK_PATH = "/webhooks/messages"
+
+# Webhooks this bot owns, by name. Registration replaces any same-named hook
+# whose target or filter drifted, and leaves everyone else's hooks alone.
+MESSAGE_WEBHOOKS = {
+    "claude-webex-bridge direct": "roomType=direct",
+    "claude-webex-bridge mentions": "roomType=group&mentionedPeople=me",
+}
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Hex HMAC-SHA1 of the raw body, as Webex sends in X-Spark-Signature."""
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha1).hexdigest()
+
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    """Constant-time check of an X-Spark-Signature header against the body."""
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature.strip().lower())
+
+
+def parse_message_event(body: bytes) -> dict | None:
+    """Return the `data` of a messages:created event, or None for anything else.
+
+    The payload carries ids and room type but not the message text; callers
+    fetch the message itself with GET /messages/{id}.
+    """
+    try:
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("resource") != "messages" or payload.get("event") != "created":
+        return None
+    data = payload.get("data")
+    if not isinstance(data, dict) or not data.get("id") or not data.get("roomId"):
+        return None
+    return data
@@ -0,0 +1,166 @@
+"""Per-conversation serial workers.
+
+The poll loop only ingests messages; each conversation key (a DM room id or a
+space thread id) gets its own queue and worker task, so a long Claude turn in
+one conversation never blocks polling or the other conversations. Jobs for the
+same key still run strictly in arrival order. Coalescer sits in front of the
+queue and folds bursts of chat messages into a single job.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+WORKER_IDLE_SECONDS = 300.0
+
+
+class RoomWorkers:
+    """Lazily-created worker task per key, each draining its own FIFO queue.
+
+    Workers exit after WORKER_IDLE_SECONDS with an empty queue so the map does
+    not grow without bound as space threads come and go.
+    """
+
+    def __init__(self, idle_seconds: float = WORKER_IDLE_SECONDS) -> None:
+        self._idle_seconds = idle_seconds
+        self._queues: dict[str, asyncio.Queue[Job]] = {}
+        self._workers: dict[str, asyncio.Task[None]] = {}
+        self._current: dict[str, asyncio.Task[None]] = {}
+
+    def submit(self, key: str, job: Job) -> None:
+        """Queue a job for key, starting its worker if needed."""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._queues[key] = queue
+            self._workers[key] = asyncio.create_task(self._run(key, queue))
+        queue.put_nowait(job)
+
+    def pending(self, key: str) -> int:
+        """Number of jobs waiting behind the current one for key."""
+        queue = self._queues.get(key)
+        return queue.qsize() if queue is not None else 0
+
+    def busy(self, key: str) -> bool:
+        """True while a job for key is executing."""
+        return key in self._current
+
+    def cancel_current(self, key: str) -> bool:
+        """Cancel the job currently running for key. Queued jobs are kept."""
+        task = self._current.get(key)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def close(self) -> None:
+        """Cancel every worker and its running job."""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._current.clear()
+
+    async def _run(self, key: str, queue: asyncio.Queue[Job]) -> None:
+        try:
+            while True:
+                try:
+                    job = await asyncio.wait_for(queue.get(), timeout=self._idle_seconds)
+                except asyncio.TimeoutError:
+                    # No await between the emptiness check and removal, so a
+                    # concurrent submit() either lands before (we keep going)
+                    # or after (it creates a fresh worker).
+                    if queue.empty():
+                        return
+                    continue
+
+                # Run each job as its own task so cancel_current() can stop one
+                # turn without taking the worker (and its queue) down with it.
+                task = asyncio.create_task(job())
+                self._current[key] = task
+                try:
+                    await asyncio.wait({task})
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                finally:
+                    self._current.pop(key, None)
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error("Job for %s failed", key[:12], exc_info=task.exception())
+        finally:
+            if self._workers.get(key) is asyncio.current_task():
+                del self._workers[key]
+                del self._queues[key]
+
+
+class _Batch:
+    __slots__ = ("items", "run", "scheduled", "timer")
+
+    def __init__(self, run: Callable[[list], Awaitable[None]]) -> None:
+        self.items: list = []
+        self.run = run
+        self.scheduled = False
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class Coalescer:
+    """Merge bursts of items per key into one job on a RoomWorkers queue.
+
+    Items for a key collect in an open batch. The batch is submitted once no
+    new item has arrived for `window` seconds, but stays open - still taking
+    items - until its job actually starts. So messages sent while the previous
+    turn is running all ride along in the next one. seal() closes the open
+    batch immediately, to keep it ahead of a command that follows it.
+    """
+
+    def __init__(self, workers: RoomWorkers, window: float) -> None:
+        self._workers = workers
+        self._window = window
+        self._open: dict[str, _Batch] = {}
+
+    def add(self, key: str, item, run: Callable[[list], Awaitable[None]]) -> bool:
+        """Add item to key's open batch. `run` is used if this starts a new batch.
+
+        Returns True if a new batch was started.
+        """
+        batch = self._open.get(key)
+        created = batch is None
+        if batch is None:
+            batch = self._open[key] = _Batch(run)
+        batch.items.append(item)
+
+        if not batch.scheduled:
+            if batch.timer is not None:
+                batch.timer.cancel()
+            if self._window > 0:
+                batch.timer = asyncio.get_running_loop().call_later(self._window, self._schedule, key, batch)
+            else:
+                self._schedule(key, batch)
+        return created
+
+    def seal(self, key: str) -> None:
+        """Submit key's open batch now and stop it taking further items."""
+        batch = self._open.pop(key, None)
+        if batch is not None:
+            self._schedule(key, batch)
+
+    def _schedule(self, key: str, batch: _Batch) -> None:
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        if batch.scheduled:
+            return
+        batch.scheduled = True
+        self._workers.submit(key, lambda: self._execute(key, batch))
+
+    async def _execute(self, key: str, batch: _Batch) -> None:
+        if self._open.get(key) is batch:
+            del self._open[key]
+        await batch.run(list(batch.items))